@@ -0,0 +1,76 @@
+# agents/batch.py
+"""
+OpenAI Batch API plumbing for offline generation (half price, 24h window).
+
+  request_line(custom_id, system, user, ...)  one /v1/chat/completions request
+  write_jsonl(lines, path)                     the batch input file
+  submit(path)                                 upload + create the batch -> batch id
+  wait(batch_id)                               poll until it reaches a final status
+  results(batch)                               {custom_id: (text | None, error | None)}
+
+Chat Completions is used for batch lines whatever agents.llm detected for live
+calls: every OpenAI-compatible batch endpoint accepts it.
+"""
+from __future__ import annotations
+import json, time
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from agents.llm import MODEL, get_client
+
+ENDPOINT = "/v1/chat/completions"
+FINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+def request_line(custom_id: str, system: str | None, user: str, model: str | None = None,
+                 temperature: float = 0.4, **body) -> dict:
+    messages = ([{"role": "system", "content": system}] if system else []) + [{"role": "user", "content": user}]
+    return {"custom_id": custom_id, "method": "POST", "url": ENDPOINT,
+            "body": {"model": model or MODEL, "messages": messages, "temperature": temperature, **body}}
+
+def write_jsonl(lines: Iterable[dict], path: str | Path) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        for line in lines:
+            f.write(json.dumps(line) + "\n")
+    return path
+
+def submit(path: str | Path, metadata: dict | None = None) -> str:
+    client = get_client()
+    with open(path, "rb") as f:
+        up = client.files.create(file=f, purpose="batch")
+    batch = client.batches.create(input_file_id=up.id, endpoint=ENDPOINT, completion_window="24h",
+                                  metadata=metadata)
+    return batch.id
+
+def wait(batch_id: str, interval: float = 30.0, timeout: float | None = None, on_poll=None):
+    """Poll until the batch reaches a final status (or timeout seconds pass); returns the Batch."""
+    client = get_client()
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        batch = client.batches.retrieve(batch_id)
+        if on_poll:
+            on_poll(batch)
+        if batch.status in FINAL_STATUSES:
+            return batch
+        if deadline is not None and time.monotonic() >= deadline:
+            return batch
+        time.sleep(interval)
+
+def _lines(file_id: Optional[str]):
+    if not file_id:
+        return []
+    text = get_client().files.content(file_id).text
+    return [json.loads(l) for l in text.splitlines() if l.strip()]
+
+def results(batch) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
+    """custom_id -> (reply text, None) or (None, error message), from the output and error files."""
+    out: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+    for line in _lines(batch.output_file_id) + _lines(getattr(batch, "error_file_id", None)):
+        cid, resp, err = line.get("custom_id"), line.get("response") or {}, line.get("error")
+        if err or resp.get("status_code", 200) != 200:
+            msg = (err or {}).get("message") or json.dumps((resp.get("body") or {}).get("error") or err)
+            out[cid] = (None, msg)
+        else:
+            out[cid] = (resp["body"]["choices"][0]["message"]["content"] or "", None)
+    return out
@@ -0,0 +1,236 @@
+# agents/budget.py
+"""
+Token budgets for the JD and resume inside agent prompts.
+
+Long JDs (benefits, EEO boilerplate, repeated "about us") used to go to the model
+verbatim, or, in outreach, sliced at a character count mid-sentence. budget_inputs()
+keeps each text within its per-agent token budget instead:
+
+  1. count tokens with tiktoken (o200k_base; rag.chunker.count_tokens approximates them,
+     with a warning, only if tiktoken or its encoding file is unavailable),
+  2. return the text untouched if it already fits,
+  3. else split it into units: JD items per section (rag.chunker.split_sections;
+     long paragraphs by sentence, repeats and benefits/perks dropped), resume
+     bullets/lines under their headings,
+  4. score the units: JD items by section prior + cosine to the resume, resume units by
+     cosine to the JD (embeddings via rag.embedder, so they hit the embedding cache),
+  5. pack the best units greedily within the budget and emit them in document order,
+     with their headings.
+
+Without sentence-transformers the scores fall back to the section prior and document
+order. Every call is tallied per agent (savings_summary) so the saving is visible.
+"""
+from __future__ import annotations
+import contextlib, logging, os, re, threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from rag.chunker import count_tokens as _approx_count, split_sections, _split_long
+
+log = logging.getLogger(__name__)
+
+# (jd, resume) token budgets per agent
+BUDGETS: Dict[str, Tuple[int, int]] = {
+    "composer": (1200, 1200),
+    "star": (1000, 1500),
+    "prep": (1200, 0),
+    "gap": (1000, 1000),
+    "outreach": (450, 800),
+    "coach": (600, 800),
+    "packet": (1500, 1500),
+}
+SCALE = float(os.getenv("PROMPT_BUDGET_SCALE", "1.0"))   # 0 disables trimming
+
+# JD section priors; 0 = dropped whenever the JD has to be trimmed
+SECTION_WEIGHT = {"requirements": 1.0, "responsibilities": 0.9, "preferred": 0.7,
+                  "about": 0.4, "other": 0.4, "benefits": 0.0}
+MAX_UNIT = 60       # tokens; longer JD paragraphs are ranked sentence by sentence
+
+_enc = None
+_enc_lock = threading.Lock()
+_stats: Dict[str, Dict[str, int]] = {}
+_stats_lock = threading.Lock()
+_local = threading.local()
+
+def count_tokens(text: str) -> int:
+    """Tokens for the OpenAI 4o family; a words+punctuation estimate if tiktoken can't load."""
+    global _enc
+    if _enc is None:
+        with _enc_lock:
+            if _enc is None:
+                try:
+                    import tiktoken
+                    _enc = tiktoken.get_encoding("o200k_base")
+                except Exception as e:  # not installed, or the encoding file can't be fetched
+                    log.warning("budget: tiktoken unavailable (%s); token counts and savings are "
+                                "estimates", e)
+                    _enc = False
+    return len(_enc.encode(text, disallowed_special=())) if _enc else _approx_count(text)
+
+def _embed(texts: Sequence[str]) -> Optional[np.ndarray]:
+    try:
+        from rag.embedder import encode
+        return encode(list(texts))
+    except ImportError:
+        return None
+
+def _centroid(X: Optional[np.ndarray]) -> Optional[np.ndarray]:
+    if X is None or not len(X):
+        return None
+    c = X.mean(axis=0)
+    return c / (np.linalg.norm(c) or 1.0)
+
+# --- units -------------------------------------------------------------------
+
+def _pieces(item: str) -> List[str]:
+    if count_tokens(item) <= MAX_UNIT:
+        return [item]
+    return [p for sent in re.split(r"(?<=[.;!?])\s+", item) if sent.strip()
+            for p in (_split_long(sent, MAX_UNIT) if count_tokens(sent) > MAX_UNIT else [sent])]
+
+def _jd_units(text: str) -> List[dict]:
+    """Items per section; long paragraphs split into sentences, repeats and zero-weight sections dropped."""
+    units, seen = [], set()
+    for si, sec in enumerate(split_sections(text)):
+        prior = SECTION_WEIGHT.get(sec["section"], 0.4)
+        if prior <= 0:
+            continue
+        for item in sec["items"]:
+            for piece in _pieces(item):
+                if piece.lower() in seen:
+                    continue
+                seen.add(piece.lower())
+                units.append({"group": si, "head": [f"{sec['heading']}:"] if sec["heading"] else [],
+                              "text": piece, "prior": prior})
+    return units
+
+_RESUME_HEAD = re.compile(r"^(#{1,6}\s|\*\*[^*]+\*\*\s*$)")
+
+def _resume_units(text: str) -> Tuple[List[str], List[dict]]:
+    """(pinned lead lines, units). Headings ('## Skills', '**Role — Co (dates)**') travel with their units."""
+    lead, units, heads = [], [], []
+    seen_section = False
+    for raw in (text or "").splitlines():
+        line = raw.rstrip()
+        if not line.strip():
+            continue
+        if line.startswith("## "):
+            seen_section = True
+            heads = [line]
+        elif not seen_section:
+            lead.append(line)                # name + contact line: always kept
+        elif _RESUME_HEAD.match(line.strip()):
+            heads = heads[:1] + [line]
+        else:
+            units.append({"group": tuple(heads), "head": list(heads), "text": line, "prior": 0.5})
+    return lead, units
+
+def _pack(units: List[dict], scores: np.ndarray, budget: int, fixed: int = 0) -> List[int]:
+    """Indices of the best units whose text (plus first-seen headings) fits in budget, in document order."""
+    used, keep, groups = fixed, [], set()
+    for i in np.argsort(-scores, kind="stable"):
+        u = units[i]
+        cost = count_tokens(u["text"]) + (0 if u["group"] in groups else sum(count_tokens(h) for h in u["head"]))
+        if used + cost <= budget:
+            used += cost
+            keep.append(int(i))
+            groups.add(u["group"])
+    return sorted(keep)
+
+def _render(units: List[dict], keep: List[int], lead: Sequence[str] = ()) -> str:
+    out, last = list(lead), []
+    for i in keep:
+        heads = units[i]["head"]
+        k = 0                      # headings shared with the previous unit are not repeated
+        while k < min(len(heads), len(last)) and heads[k] == last[k]:
+            k += 1
+        if heads[k:]:
+            if out and k == 0:
+                out.append("")
+            out.extend(heads[k:])
+        last = heads
+        out.append(units[i]["text"])
+    return "\n".join(out).strip()
+
+# --- public ------------------------------------------------------------------
+
+def fit_jd(jd_text: str, budget: int, focus: Optional[np.ndarray] = None) -> str:
+    """jd_text trimmed to budget tokens, keeping the sections/items that matter most (see module doc)."""
+    jd_text = jd_text or ""
+    if budget <= 0 or count_tokens(jd_text) <= budget:
+        return jd_text
+    units = _jd_units(jd_text)
+    if not units:
+        return jd_text
+    prior = np.array([u["prior"] for u in units], dtype=np.float32)
+    scores = prior - 1e-6 * np.arange(len(units))        # ties: earlier first
+    if focus is not None:
+        E = _embed([u["text"] for u in units])
+        if E is not None:
+            scores = scores + E @ focus
+    return _render(units, _pack(units, scores, budget))
+
+def fit_resume(resume_md: str, budget: int, focus: Optional[np.ndarray] = None) -> str:
+    """resume_md trimmed to budget tokens, keeping its header and the bullets closest to focus."""
+    resume_md = resume_md or ""
+    if budget <= 0 or count_tokens(resume_md) <= budget:
+        return resume_md
+    lead, units = _resume_units(resume_md)
+    if not units:
+        return resume_md
+    scores = -1e-6 * np.arange(len(units), dtype=np.float32)
+    if focus is not None:
+        E = _embed([u["text"] for u in units])
+        if E is not None:
+            scores = scores + E @ focus
+    fixed = sum(count_tokens(l) for l in lead)
+    return _render(units, _pack(units, scores, budget, fixed), lead)
+
+def budget_inputs(agent: str, jd_text: str, resume_md: str = "") -> Tuple[str, str]:
+    """
+    (jd, resume) for agent's prompt, each within its BUDGETS entry (scaled by
+    PROMPT_BUDGET_SCALE). JD items are ranked against the resume and resume lines
+    against the JD, so each side keeps what the other can use.
+    """
+    jd_text, resume_md = jd_text or "", resume_md or ""
+    jd_budget, res_budget = (int(b * SCALE) for b in BUDGETS.get(agent, (0, 0)))
+    before = count_tokens(jd_text) + count_tokens(resume_md)
+    over_jd = jd_budget > 0 and count_tokens(jd_text) > jd_budget
+    over_res = res_budget > 0 and count_tokens(resume_md) > res_budget
+    if over_jd or over_res:
+        jd_units = _jd_units(jd_text)
+        _, res_units = _resume_units(resume_md)
+        jd_focus = _centroid(_embed([u["text"] for u in jd_units])) if over_res and jd_units else None
+        res_focus = _centroid(_embed([u["text"] for u in res_units])) if over_jd and res_units else None
+        if over_jd:
+            jd_text = fit_jd(jd_text, jd_budget, focus=res_focus)
+        if over_res:
+            resume_md = fit_resume(resume_md, res_budget, focus=jd_focus)
+    after = count_tokens(jd_text) + count_tokens(resume_md)
+    if getattr(_local, "untracked", False):
+        return jd_text, resume_md
+    with _stats_lock:
+        st = _stats.setdefault(agent, {"calls": 0, "trimmed": 0, "tokens_before": 0, "tokens_after": 0})
+        st["calls"] += 1
+        st["trimmed"] += int(over_jd or over_res)
+        st["tokens_before"] += before
+        st["tokens_after"] += after
+    if after < before:
+        log.debug("budget %s: %d -> %d tokens", agent, before, after)
+    return jd_text, resume_md
+
+@contextlib.contextmanager
+def untracked():
+    """budget_inputs() calls in this block (on this thread) are left out of savings_summary()."""
+    prev = getattr(_local, "untracked", False)
+    _local.untracked = True
+    try:
+        yield
+    finally:
+        _local.untracked = prev
+
+def savings_summary() -> Dict[str, dict]:
+    """Per agent: calls, how many were trimmed, JD+resume tokens before/after and saved."""
+    with _stats_lock:
+        return {a: dict(st, saved=st["tokens_before"] - st["tokens_after"]) for a, st in _stats.items()}
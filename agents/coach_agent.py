@@ -1,8 +1,7 @@
 # agents/coach_agent.py
-import os, io
-from openai import OpenAI
-
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+import io
+from agents.llm import complete, get_client
+from agents.budget import budget_inputs
 
 SCORE_SYSTEM = """You are an interview coach. Score the candidate's answer (transcript)
 on a 1–10 scale across: Clarity, Structure (STAR), Technical Depth, Impact/Results,
@@ -12,6 +11,7 @@ Return a tidy markdown report."""
 def transcribe_and_score(file_bytes: bytes, filename: str,
                          company: str, title: str, jd_text: str, resume_md: str) -> dict:
     # --- Transcribe (try gpt-4o-transcribe, fall back to whisper-1) ---
+    client = get_client()
     audio_file = io.BytesIO(file_bytes); audio_file.name = filename
     try:
         tr = client.audio.transcriptions.create(model="gpt-4o-transcribe", file=audio_file)
@@ -22,6 +22,7 @@ def transcribe_and_score(file_bytes: bytes, filename: str,
         transcript = getattr(tr, "text", None) or (tr.get("text") if isinstance(tr, dict) else "")
 
     # --- Score ---
+    jd_text, resume_md = budget_inputs("coach", jd_text, resume_md)
     user = f"""Company: {company}
 Role: {title}
 
@@ -34,13 +35,5 @@ Role: {title}
 [TRANSCRIPT]
 {transcript}
 """
-    resp = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role":"system", "content": SCORE_SYSTEM},
-            {"role":"user", "content": user}
-        ],
-        temperature=0.3,
-    )
-    report = resp.choices[0].message.content.strip()
+    report = complete(SCORE_SYSTEM, user, temperature=0.3, tag="coach").strip()
     return {"transcript": transcript, "report": report}
@@ -1,38 +1,8 @@
 # agents/composer.py
+from __future__ import annotations
 import os, pathlib, json, re
-from dotenv import load_dotenv
-from openai import OpenAI
-
-load_dotenv()
-client = OpenAI()  # reads OPENAI_API_KEY from .env
-
-def _call_llm(system_prompt: str, user_prompt: str) -> str:
-    """
-    Try the unified Responses API; if unavailable in this SDK, fall back to Chat Completions.
-    Returns plain text.
-    """
-    # Try unified Responses API
-    try:
-        rsp = client.responses.create(
-            model="gpt-4o-mini",
-            input=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-            temperature=0.4,
-        )
-        return rsp.output_text
-    except Exception:
-        # Fallback to Chat Completions
-        rsp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-            temperature=0.4,
-        )
-        return rsp.choices[0].message.content
+from agents.llm import complete
+from agents.budget import budget_inputs
 
 def _extract_json_block(text: str):
     """
@@ -48,15 +18,10 @@ def _extract_json_block(text: str):
     except Exception:
         return None
 
-def compose_artifacts(job, base_resume_md: str, rag_snippets: list, out_dir: str):
-    """
-    Creates:
-      - tailored_resume_section.md
-      - cover_letter.md
-    Returns file paths + parsed JSON payload.
-    """
-    pathlib.Path(out_dir).mkdir(parents=True, exist_ok=True)
+def artifact_prompts(job, base_resume_md: str, rag_snippets: list):
+    """(system, user) prompts for the resume bullets + cover letter."""
     ctx = "\n\n".join(rag_snippets or [])
+    jd_text, base_resume_md = budget_inputs("composer", job.jd_text, base_resume_md)
 
     system_prompt = "You are a precise career assistant. Be specific, honest, and concise."
     user_prompt = f"""
@@ -65,7 +30,7 @@ COMPANY: {job.company}
 LOCATION: {job.location}
 
 JOB DESCRIPTION:
-{job.jd_text}
+{jd_text}
 
 CONTEXT (company/JD snippets):
 {ctx}
@@ -78,8 +43,25 @@ TASKS:
 2) Produce a 180-250 word cover letter referencing 1-2 company-specific details from CONTEXT.
 3) Return JSON with keys: resume_bullets (array of strings), cover_letter (string).
 """
+    return system_prompt, user_prompt
 
-    text = _call_llm(system_prompt, user_prompt)
+def compose_artifacts(job, base_resume_md: str, rag_snippets: list, out_dir: str,
+                      timeout: float | None = None, refresh: bool = False):
+    """
+    Creates:
+      - tailored_resume_section.md
+      - cover_letter.md
+    Returns file paths + parsed JSON payload. timeout bounds the LLM call, retries included;
+    refresh=True bypasses the LLM reply cache.
+    """
+    system_prompt, user_prompt = artifact_prompts(job, base_resume_md, rag_snippets)
+    text = complete(system_prompt, user_prompt, temperature=0.4, timeout=timeout, tag="composer",
+                    refresh=refresh)
+    return write_artifacts(out_dir, text)
+
+def write_artifacts(out_dir: str, text: str):
+    """Parse a composer reply and write its two files; returns (resume_path, cl_path, payload)."""
+    pathlib.Path(out_dir).mkdir(parents=True, exist_ok=True)
     data = _extract_json_block(text) or {"resume_bullets": [], "cover_letter": text.strip()}
 
     resume_path = os.path.join(out_dir, "tailored_resume_section.md")
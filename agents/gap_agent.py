@@ -1,8 +1,6 @@
 # agents/gap_agent.py
-import os
-from openai import OpenAI
-
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from agents.llm import complete
+from agents.budget import budget_inputs
 
 SYSTEM = """You are a career mentor. Given a job description (JD) and a candidate resume,
 produce:
@@ -11,7 +9,9 @@ produce:
 3) 5 short interview practice prompts tailored to the gaps.
 Keep it concise, actionable, US market-relevant, and realistic for a week."""
 
-def build_skill_gap_plan(company: str, title: str, jd_text: str, resume_md: str) -> str:
+def gap_prompts(company: str, title: str, jd_text: str, resume_md: str):
+    """(system, user) prompts for the skill-gap plan."""
+    jd_text, resume_md = budget_inputs("gap", jd_text, resume_md)
     user = f"""Company: {company}
 Role: {title}
 
@@ -20,12 +20,9 @@ Role: {title}
 
 [RESUME]
 {resume_md}"""
-    resp = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role":"system", "content": SYSTEM},
-            {"role":"user", "content": user}
-        ],
-        temperature=0.4,
-    )
-    return resp.choices[0].message.content.strip()
+    return SYSTEM, user
+
+def build_skill_gap_plan(company: str, title: str, jd_text: str, resume_md: str,
+                         refresh: bool = False) -> str:
+    system, user = gap_prompts(company, title, jd_text, resume_md)
+    return complete(system, user, temperature=0.4, tag="gap", refresh=refresh).strip()
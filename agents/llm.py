@@ -0,0 +1,276 @@
+# agents/llm.py
+"""
+One gateway for every text LLM call the agents make.
+
+  client      one OpenAI client per process, created on first use, over a pooled
+              keep-alive httpx client (LLM_MAX_CONNECTIONS), so importing an agent
+              costs nothing and concurrent callers share connections
+  API choice  the Responses API when this SDK and endpoint support it, otherwise
+              Chat Completions. Detected on the first call and cached, so a missing
+              Responses API costs one failed round trip per process, not per request
+              (LLM_API=responses|chat skips detection)
+  retries     429 / timeout / connection / 5xx errors are retried with jittered
+              exponential backoff (never sooner than Retry-After); `timeout` bounds the whole
+              call including retries
+  streaming   stream() yields text deltas as they arrive; stream_to_file() tees them
+              into a file as they come
+  cache       replies are cached by (model, temperature, prompts) in agents.llm_cache;
+              refresh=True bypasses it for an explicit "regenerate"
+  usage       every call appends {tag, model, api, latency_s, input_tokens,
+              output_tokens, attempts, ok} to an in-memory log (usage_log/usage_summary);
+              cache hits are recorded with api="cache"
+
+    from agents.llm import complete
+    text = complete(system_prompt, user_prompt, temperature=0.4, tag="composer")
+"""
+from __future__ import annotations
+import logging, os, random, threading, time
+from collections import deque
+from typing import Dict, Iterable, Iterator, List
+
+import httpx
+from dotenv import load_dotenv
+from openai import (OpenAI, DefaultHttpxClient, APIConnectionError, APITimeoutError,
+                    InternalServerError, NotFoundError, RateLimitError)
+from agents.llm_cache import cache_key, default_cache
+
+load_dotenv()
+log = logging.getLogger(__name__)
+
+MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")
+TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))        # seconds per call, retries included
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "32"))
+BACKOFF_CAP = 30.0
+USAGE_LOG_SIZE = 2000
+
+RETRYABLE = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
+
+_client: OpenAI | None = None
+_api: str | None = os.getenv("LLM_API") or None     # "responses" | "chat", set on first call
+_lock = threading.Lock()
+_usage: deque = deque(maxlen=USAGE_LOG_SIZE)
+
+def get_client() -> OpenAI:
+    """The shared client (reads OPENAI_API_KEY / OPENAI_BASE_URL). SDK retries are off; _send retries."""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                http = DefaultHttpxClient(limits=httpx.Limits(max_connections=MAX_CONNECTIONS,
+                                                              max_keepalive_connections=MAX_CONNECTIONS))
+                _client = OpenAI(http_client=http, max_retries=0, timeout=TIMEOUT)
+    return _client
+
+def api() -> str:
+    """'responses' or 'chat': what the next call will use (detected on the first call)."""
+    return _api or ("responses" if hasattr(get_client(), "responses") else "chat")
+
+def _set_api(value: str):
+    global _api
+    if _api != value:
+        log.info("LLM gateway: using the %s API", value)
+    _api = value
+
+def _messages(system: str | None, user: str) -> List[Dict[str, str]]:
+    msgs = [{"role": "system", "content": system}] if system else []
+    return msgs + [{"role": "user", "content": user}]
+
+def _backoff(err: Exception, attempt: int) -> float:
+    """Full-jitter exponential backoff, but never sooner than the server's Retry-After."""
+    delay = random.uniform(0, min(BACKOFF_CAP, 2 ** attempt))
+    try:
+        return max(delay, float(err.response.headers.get("retry-after")))
+    except (TypeError, ValueError, AttributeError):
+        return delay
+
+def _record(tag, model, which, t0, attempts, ok, usage=None):
+    rec = {"ts": time.time(), "tag": tag, "model": model, "api": which,
+           "latency_s": round(time.perf_counter() - t0, 3), "attempts": attempts, "ok": ok,
+           "input_tokens": 0, "output_tokens": 0}
+    if usage is not None:
+        # Responses reports input/output_tokens, Chat Completions prompt/completion_tokens
+        rec["input_tokens"] = getattr(usage, "input_tokens", None) or getattr(usage, "prompt_tokens", 0) or 0
+        rec["output_tokens"] = getattr(usage, "output_tokens", None) or getattr(usage, "completion_tokens", 0) or 0
+    _usage.append(rec)
+    log.debug("llm call %s", rec)
+
+def _request(which: str, msgs, model, temperature, timeout, stream, extra):
+    cl = get_client().with_options(timeout=timeout)
+    schema = extra.get("json_schema")
+    if schema is not None:
+        # structured output: {"name": ..., "schema": {...}}, spelled differently per API
+        extra = {k: v for k, v in extra.items() if k != "json_schema"}
+        if which == "responses":
+            extra["text"] = {"format": {"type": "json_schema", "strict": True, **schema}}
+        else:
+            extra["response_format"] = {"type": "json_schema", "json_schema": {"strict": True, **schema}}
+    if which == "responses":
+        return cl.responses.create(model=model, input=msgs, temperature=temperature, stream=stream, **extra)
+    if stream:
+        extra = {"stream_options": {"include_usage": True}, **extra}
+    return cl.chat.completions.create(model=model, messages=msgs, temperature=temperature, stream=stream, **extra)
+
+def _missing_route(err: NotFoundError) -> bool:
+    """
+    A 404 for the /responses route itself (no Responses API behind this base URL), as
+    opposed to one about the model the request names, which Chat Completions would hit too.
+    """
+    code = str(getattr(err, "code", None) or "").lower()
+    msg = str(getattr(err, "message", None) or err).lower()
+    return "model" not in code and "model" not in msg
+
+def _send(msgs, model, temperature, timeout, max_retries, stream=False, extra=None):
+    """Issue the request with capability fallback and retries. Returns (response, api, attempts)."""
+    extra = extra or {}
+    deadline = time.monotonic() + (timeout or TIMEOUT)
+    retries = MAX_RETRIES if max_retries is None else max_retries
+    attempt = 0
+    while True:
+        which = api()
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"LLM call gave up after {timeout or TIMEOUT:.0f}s ({attempt} attempts)")
+        try:
+            rsp = _request(which, msgs, model, temperature, remaining, stream, extra)
+            if _api is None:
+                _set_api(which)
+            return rsp, which, attempt + 1
+        except AttributeError:
+            if which != "responses":
+                raise
+            _set_api("chat")          # this SDK has no Responses API: fall back once, for good
+        except NotFoundError as e:
+            if which != "responses" or not _missing_route(e):
+                raise                 # e.g. a mistyped or retired model: not an API capability
+            _set_api("chat")          # the endpoint has no /responses: fall back once, for good
+        except RETRYABLE as e:
+            attempt += 1
+            if attempt > retries:
+                raise
+            time.sleep(min(_backoff(e, attempt), max(0.0, deadline - time.monotonic())))
+
+def _text(rsp, which: str) -> str:
+    if which == "responses":
+        return getattr(rsp, "output_text", "") or ""
+    return rsp.choices[0].message.content or ""
+
+def _cached(model, temperature, system, user, extra, refresh):
+    """(cache, key, cached text or None); cache is None when LLM_CACHE=0."""
+    cache = default_cache()
+    if cache is None:
+        return None, None, None
+    key = cache_key(model, temperature, system, user, extra)
+    return cache, key, (None if refresh else cache.get(key))
+
+def complete(system: str | None, user: str, *, model: str | None = None, temperature: float = 0.4,
+             timeout: float | None = None, max_retries: int | None = None, tag: str = "",
+             refresh: bool = False, **extra) -> str:
+    """
+    One system + user turn; returns the reply text.
+    timeout bounds the whole call, retries included (default LLM_TIMEOUT).
+    Replies are cached (agents.llm_cache); refresh=True skips the lookup and stores
+    the new reply in place of the old one.
+    json_schema={"name": ..., "schema": {...}} requests strict structured output.
+    Other keyword arguments are passed to the underlying create() call.
+    """
+    model = model or MODEL
+    t0 = time.perf_counter()
+    cache, key, hit = _cached(model, temperature, system, user, extra, refresh)
+    if hit is not None:
+        _record(tag, model, "cache", t0, 0, True)
+        return hit
+    attempts, which = 0, api()
+    try:
+        rsp, which, attempts = _send(_messages(system, user), model, temperature, timeout, max_retries,
+                                     extra=extra)
+    except Exception:
+        _record(tag, model, which, t0, attempts, False)
+        raise
+    _record(tag, model, which, t0, attempts, True, getattr(rsp, "usage", None))
+    text = _text(rsp, which)
+    if cache is not None and text:
+        cache.put(key, model, text)
+    return text
+
+def stream(system: str | None, user: str, *, model: str | None = None, temperature: float = 0.4,
+           timeout: float | None = None, max_retries: int | None = None, tag: str = "",
+           refresh: bool = False, **extra) -> Iterator[str]:
+    """
+    Like complete(), but yields the reply text in pieces as the model produces it
+    (a cached reply comes back in one piece). Retries only cover opening the stream;
+    a failure mid-stream is raised to the caller and nothing is cached.
+    """
+    model = model or MODEL
+    t0 = time.perf_counter()
+    cache, key, hit = _cached(model, temperature, system, user, extra, refresh)
+    if hit is not None:
+        _record(tag, model, "cache", t0, 0, True)
+        yield hit
+        return
+    rsp, which, attempts = _send(_messages(system, user), model, temperature, timeout, max_retries,
+                                 stream=True, extra=extra)
+    usage, ok, parts = None, False, []
+    try:
+        for event in rsp:
+            delta = None
+            if which == "responses":
+                etype = getattr(event, "type", "")
+                if etype == "response.output_text.delta":
+                    delta = event.delta
+                elif etype == "response.completed":
+                    usage = getattr(event.response, "usage", None)
+            else:
+                if getattr(event, "usage", None):
+                    usage = event.usage
+                if event.choices and event.choices[0].delta.content:
+                    delta = event.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                yield delta
+        ok = True
+    finally:
+        _record(tag, model, which, t0, attempts, ok, usage)
+    if cache is not None and parts:
+        cache.put(key, model, "".join(parts))
+
+def stream_to_file(pieces: Iterable[str], path: str) -> Iterator[str]:
+    """
+    Pass pieces through while appending them to path + ".part", flushed as they come,
+    then move the (whitespace-trimmed) result to path. A stream that fails midway
+    leaves only the .part file, never a truncated path.
+    """
+    part = f"{path}.part"
+    chunks = []
+    with open(part, "w") as f:
+        for piece in pieces:
+            chunks.append(piece)
+            f.write(piece)
+            f.flush()
+            yield piece
+    text = "".join(chunks)
+    if text != text.strip():
+        with open(part, "w") as f:
+            f.write(text.strip())
+    os.replace(part, path)
+
+def usage_log() -> List[dict]:
+    """Per-call records, oldest first (the last USAGE_LOG_SIZE calls)."""
+    return list(_usage)
+
+def usage_summary() -> Dict[str, dict]:
+    """Totals per tag: calls, cache hits, failures, tokens, mean and max latency."""
+    out: Dict[str, dict] = {}
+    for r in list(_usage):
+        agg = out.setdefault(r["tag"] or "-", {"calls": 0, "cache_hits": 0, "failed": 0, "input_tokens": 0,
+                                                "output_tokens": 0, "latency_s": 0.0, "max_latency_s": 0.0})
+        agg["calls"] += 1
+        agg["cache_hits"] += r["api"] == "cache"
+        agg["failed"] += 0 if r["ok"] else 1
+        agg["input_tokens"] += r["input_tokens"]
+        agg["output_tokens"] += r["output_tokens"]
+        agg["latency_s"] += r["latency_s"]
+        agg["max_latency_s"] = max(agg["max_latency_s"], r["latency_s"])
+    for agg in out.values():
+        agg["mean_latency_s"] = round(agg.pop("latency_s") / agg["calls"], 3)
+    return out
@@ -0,0 +1,103 @@
+# agents/llm_cache.py
+"""
+Persistent, content-addressed cache of LLM replies, consulted by agents.llm.
+
+Replies live in one SQLite table (data/cache/llm.sqlite3):
+    key = sha256(model, temperature, system prompt, user prompt, extra args) -> text
+so regenerating a prep pack, STAR pack or cover letter for the same JD, resume and
+prompt (or a Streamlit rerun repeating a click) is answered locally. Rows expire
+after ttl seconds, and once the table grows past max_rows the least recently used
+rows are evicted. Callers pass refresh=True to agents.llm.complete() to skip the
+lookup (the fresh reply still replaces the cached one).
+
+LLM_CACHE=0 turns it off.
+"""
+from __future__ import annotations
+import hashlib, json, os, sqlite3, threading, time
+from pathlib import Path
+from typing import Optional
+
+CACHE_PATH = Path(os.getenv("LLM_CACHE_PATH", "data/cache/llm.sqlite3"))
+MAX_ROWS = int(os.getenv("LLM_CACHE_MAX_ROWS", "5000"))
+TTL = float(os.getenv("LLM_CACHE_TTL_DAYS", "30")) * 86400
+ENABLED = os.getenv("LLM_CACHE", "1") != "0"
+
+def cache_key(model: str, temperature: float, system: str | None, user: str, extra: dict | None = None) -> str:
+    h = hashlib.sha256()
+    for part in (model, repr(float(temperature)), system or "", user,
+                 json.dumps(extra or {}, sort_keys=True, default=str)):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+class LLMCache:
+    def __init__(self, path: str | Path = CACHE_PATH, max_rows: int = MAX_ROWS, ttl: float = TTL):
+        self.path = Path(path)
+        self.max_rows, self.ttl = max_rows, ttl
+        self._lock = threading.Lock()  # one connection, shared by Streamlit's script threads
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""CREATE TABLE IF NOT EXISTS responses (
+                                key TEXT PRIMARY KEY, model TEXT NOT NULL, text TEXT NOT NULL,
+                                created_at REAL NOT NULL, last_used REAL NOT NULL)""")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_responses_last_used ON responses(last_used)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            row = db.execute("SELECT text, created_at FROM responses WHERE key=?", (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl:
+                db.execute("DELETE FROM responses WHERE key=?", (key,))
+                db.commit()
+                return None
+            db.execute("UPDATE responses SET last_used=? WHERE key=?", (now, key))
+            db.commit()
+        return row[0]
+
+    def put(self, key: str, model: str, text: str) -> None:
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute("INSERT OR REPLACE INTO responses(key, model, text, created_at, last_used) "
+                       "VALUES (?,?,?,?,?)", (key, model, text, now, now))
+            self._evict(db, now)
+            db.commit()
+
+    def _evict(self, db: sqlite3.Connection, now: float) -> None:
+        db.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+        (n,) = db.execute("SELECT COUNT(*) FROM responses").fetchone()
+        if n > self.max_rows:
+            # trim to 90% so we don't evict on every insert once full
+            drop = n - int(self.max_rows * 0.9)
+            db.execute("""DELETE FROM responses WHERE key IN (
+                              SELECT key FROM responses ORDER BY last_used LIMIT ?)""", (drop,))
+
+    def clear(self) -> None:
+        with self._lock:
+            db = self._db()
+            db.execute("DELETE FROM responses")
+            db.commit()
+
+_default: Optional[LLMCache] = None
+_default_lock = threading.Lock()
+
+def default_cache() -> Optional[LLMCache]:
+    """The shared cache, or None when LLM_CACHE=0."""
+    global _default
+    if not ENABLED:
+        return None
+    with _default_lock:
+        if _default is None:
+            _default = LLMCache()
+        return _default
@@ -1,12 +1,11 @@
 # agents/outreach_agent.py
 from __future__ import annotations
-import os, json, re
+import json, re
 from typing import Dict
-from openai import OpenAI
+from agents.llm import complete
+from agents.budget import budget_inputs
 from db.bandit import pick_template
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
 # Outreach template styles (options the bandit will choose among)
 TEMPLATES = {
     "ai_personalized_v1": (
@@ -42,6 +41,39 @@ def _json_from_text(text: str) -> Dict[str, str]:
     if m3: dm = m3.group(1).strip()
     return {"email_subject": subj, "email_body": body, "linkedin_dm": dm}
 
+def default_template(company: str, role_title: str) -> str:
+    """The bandit's pick for this role/company bucket."""
+    bucket = f"role:{(role_title or '').lower()}|company:{(company or '').lower()}"
+    return pick_template(bucket, ALL_TEMPLATES)
+
+def outreach_prompts(company: str, role_title: str, jd_text: str, contact_name: str,
+                     contact_title: str, base_resume_md: str, chosen_template: str):
+    """(system, user) prompts for one outreach draft in the given template style."""
+    style = TEMPLATES[chosen_template]
+    jd_text, base_resume_md = budget_inputs("outreach", jd_text, base_resume_md)
+    system = (
+        "You draft recruiter outreach for a job seeker. "
+        "Write crisp, professional copy that maps resume achievements to the role. "
+        "Avoid exaggeration; keep facts consistent with the resume. "
+        "Return ONLY JSON with keys: email_subject, email_body, linkedin_dm."
+    )
+    user = (
+        f"Template style: {chosen_template} — {style}\n\n"
+        f"Company: {company}\nRole: {role_title}\n\n"
+        "JD snippet (context; don't copy verbatim):\n"
+        f"---\n{jd_text}\n---\n\n"
+        "Candidate resume (markdown):\n"
+        f"---\n{base_resume_md}\n---\n\n"
+        f"Recruiter/Contact: {contact_name or '(unknown)'}  |  Title: {contact_title or '(unknown)'}\n\n"
+        "Return JSON only, e.g.:\n"
+        '{\n'
+        '  "email_subject": "...",\n'
+        '  "email_body": "Hi <name>, ...",\n'
+        '  "linkedin_dm": "Hi <name>, ..."\n'
+        "}\n"
+    )
+    return system, user
+
 def draft_outreach(
     company: str,
     role_title: str,
@@ -50,62 +82,18 @@ def draft_outreach(
     contact_title: str,
     base_resume_md: str,
     template: str | None = None,
+    refresh: bool = False,
 ) -> Dict[str, str]:
     """
     Create subject/body/DM tailored to JD + resume.
     Returns: {email_subject, email_body, linkedin_dm, template_used}
+    refresh=True skips the LLM reply cache.
     """
-    # If no template provided, let the bandit choose a default for this bucket
-    bucket = f"role:{(role_title or '').lower()}|company:{(company or '').lower()}"
-    chosen_template = template or pick_template(bucket, ALL_TEMPLATES)
-    style = TEMPLATES[chosen_template]
-
-    messages = [
-        {
-            "role": "system",
-            "content": (
-                "You draft recruiter outreach for a job seeker. "
-                "Write crisp, professional copy that maps resume achievements to the role. "
-                "Avoid exaggeration; keep facts consistent with the resume. "
-                "Return ONLY JSON with keys: email_subject, email_body, linkedin_dm."
-            ),
-        },
-        {
-            "role": "user",
-            "content": (
-                f"Template style: {chosen_template} — {style}\n\n"
-                f"Company: {company}\nRole: {role_title}\n\n"
-                "JD snippet (context; don't copy verbatim):\n"
-                f"---\n{(jd_text or '')[:1800]}\n---\n\n"
-                "Candidate resume (markdown):\n"
-                f"---\n{(base_resume_md or '')[:3500]}\n---\n\n"
-                f"Recruiter/Contact: {contact_name or '(unknown)'}  |  Title: {contact_title or '(unknown)'}\n\n"
-                "Return JSON only, e.g.:\n"
-                '{\n'
-                '  "email_subject": "...",\n'
-                '  "email_body": "Hi <name>, ...",\n'
-                '  "linkedin_dm": "Hi <name>, ..."\n'
-                "}\n"
-            ),
-        },
-    ]
+    chosen_template = template or default_template(company, role_title)
 
-    # Prefer Responses API; fall back to Chat Completions
-    text: str
-    try:
-        rsp = client.responses.create(model="gpt-4o-mini", input=messages, temperature=0.6)
-        text = getattr(rsp, "output_text", "") or ""
-        if not text and getattr(rsp, "output", None):
-            for part in rsp.output or []:
-                for c in getattr(part, "content", []) or []:
-                    if getattr(c, "type", "") == "output_text":
-                        text = getattr(c, "text", "") or ""
-                        break
-                if text:
-                    break
-    except Exception:
-        rsp = client.chat.completions.create(model="gpt-4o-mini", messages=messages, temperature=0.6)
-        text = rsp.choices[0].message.content
+    system, user = outreach_prompts(company, role_title, jd_text, contact_name, contact_title,
+                                    base_resume_md, chosen_template)
+    text = complete(system, user, temperature=0.6, tag="outreach", refresh=refresh)
 
     out = _json_from_text(text)
     out["template_used"] = chosen_template
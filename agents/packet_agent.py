@@ -0,0 +1,150 @@
+# agents/packet_agent.py
+"""
+"Full packet" mode: resume bullets, cover letter, prep pack, STAR pack, skill-gap
+plan and an outreach draft for one job from a single structured-output request.
+
+The per-agent path sends the JD, resume and context five times (once per agent);
+here they go once, followed by the five task lists, and the reply is a JSON object
+validated against PACKET_SCHEMA. estimate_savings() compares the input tokens of
+the two paths for the same job.
+"""
+from __future__ import annotations
+import json, os, pathlib
+from typing import Dict, List
+
+from agents.llm import complete
+from agents.budget import budget_inputs, count_tokens, untracked
+from agents.composer import artifact_prompts, _extract_json_block
+from agents.prep_agent import prep_prompts, PREP_FILE
+from agents.star_agent import star_prompts, STAR_FILE
+from agents.gap_agent import gap_prompts
+from agents.outreach_agent import outreach_prompts, default_template, TEMPLATES
+
+GAP_FILE = "gap_plan.md"
+OUTREACH_FILE = "outreach_draft.json"
+
+_OUTREACH = {"type": "object", "additionalProperties": False,
+             "required": ["email_subject", "email_body", "linkedin_dm"],
+             "properties": {k: {"type": "string"} for k in ("email_subject", "email_body", "linkedin_dm")}}
+
+PACKET_SCHEMA = {
+    "name": "job_packet",
+    "schema": {
+        "type": "object",
+        "additionalProperties": False,
+        "required": ["resume_bullets", "cover_letter", "prep_pack_md", "star_pack_md", "gap_plan_md", "outreach"],
+        "properties": {
+            "resume_bullets": {"type": "array", "items": {"type": "string"}},
+            "cover_letter": {"type": "string"},
+            "prep_pack_md": {"type": "string"},
+            "star_pack_md": {"type": "string"},
+            "gap_plan_md": {"type": "string"},
+            "outreach": _OUTREACH,
+        },
+    },
+}
+
+SYSTEM = (
+    "You are a precise career assistant and interview coach. Be specific, honest, and concise. "
+    "Everything about the candidate must STRICTLY reflect the resume: do NOT invent employers, dates, "
+    "tools or metrics; keep unclear details generic (e.g., <team>, <dataset>) rather than fabricating."
+)
+
+def packet_prompts(job, base_resume_md: str, ctx_snippets: list, contact_name: str = "",
+                   contact_title: str = "", template: str | None = None):
+    """(system, user) prompts for the one-call packet."""
+    ctx = "\n\n".join(ctx_snippets or [])
+    template = template or default_template(job.company, job.title)
+    jd_text, base_resume_md = budget_inputs("packet", job.jd_text, base_resume_md)
+    user = f"""
+COMPANY: {job.company}
+ROLE: {job.title}
+LOCATION: {job.location}
+
+JOB DESCRIPTION:
+{jd_text}
+
+CONTEXT (company/JD snippets):
+{ctx}
+
+CANDIDATE RESUME (Markdown):
+{base_resume_md}
+
+RECRUITER/CONTACT: {contact_name or '(unknown)'}  |  Title: {contact_title or '(unknown)'}
+
+Produce every field of the JSON object:
+- resume_bullets: a tailored 6-10 bullet resume section that maps directly to JD must-haves.
+- cover_letter: a 180-250 word cover letter referencing 1-2 company-specific details from CONTEXT.
+- prep_pack_md: a Markdown interview prep pack (~500-700 words) with sections
+  1) Likely Interview Questions — 5 technical + 5 behavioral, each with 2–3 bullets of what a strong answer covers;
+  2) Talking Points — 6 company/product facts (<=25 words each) that are safe to mention;
+  3) Competitors & Differentiators — 3 competitors/categories with 1 differentiator each;
+  4) Flashcards — 5 short Q→A pairs.
+- star_pack_md: EXACTLY 20 interview question/answer pairs (mix technical + behavioral), each as
+  ### Q<n>. <question>
+  **S:** ... **T:** ... **A:** <3-5 concise bullets> **R:** <measurable outcome> **Why it maps to JD:** <1 sentence>
+- gap_plan_md: top skill gaps (ranked) with 2–3 subskills each, a 7-day plan (daily goal, 1–2 free
+  reputable resources, one hands-on micro-task per day), and 5 practice prompts tailored to the gaps.
+- outreach: a recruiter email (email_subject, email_body) and a LinkedIn DM (linkedin_dm) in this style:
+  {template} — {TEMPLATES[template]}
+"""
+    return SYSTEM, user
+
+def per_agent_prompts(job, base_resume_md: str, ctx_snippets: list, contact_name: str = "",
+                      contact_title: str = "", template: str | None = None) -> Dict[str, tuple]:
+    """The prompts the five separate agents would send for the same job."""
+    template = template or default_template(job.company, job.title)
+    return {
+        "composer": artifact_prompts(job, base_resume_md, ctx_snippets),
+        "prep": prep_prompts(job.company, job.title, job.jd_text, ctx_snippets),
+        "star": star_prompts(job.company, job.title, job.jd_text, base_resume_md, ctx_snippets),
+        "gap": gap_prompts(job.company, job.title, job.jd_text, base_resume_md),
+        "outreach": outreach_prompts(job.company, job.title, job.jd_text, contact_name, contact_title,
+                                     base_resume_md, template),
+    }
+
+def estimate_savings(job, base_resume_md: str, ctx_snippets: list, **kw) -> Dict[str, int]:
+    """Input tokens of the packet request vs the five per-agent requests."""
+    with untracked():     # an estimate, not prompts that are sent: keep them out of savings_summary()
+        per_agent = {name: count_tokens(sys + user)
+                     for name, (sys, user) in per_agent_prompts(job, base_resume_md, ctx_snippets, **kw).items()}
+        sys, user = packet_prompts(job, base_resume_md, ctx_snippets, **kw)
+    packet = count_tokens(sys + user)
+    total = sum(per_agent.values())
+    return {"packet_input_tokens": packet, "per_agent_input_tokens": total,
+            "saved_input_tokens": total - packet, "per_agent": per_agent}
+
+def build_full_packet(job, base_resume_md: str, ctx_snippets: list, out_dir: str,
+                      contact_name: str = "", contact_title: str = "", template: str | None = None,
+                      refresh: bool = False) -> Dict:
+    """
+    One LLM call for the whole packet. Writes the same files as the individual agents
+    (tailored_resume_section.md, cover_letter.md, prep_pack.md, star_pack.md) plus
+    gap_plan.md and outreach_draft.json.
+    Returns {"paths": {...}, "data": parsed JSON, "tokens": estimate_savings(...)}.
+    """
+    pathlib.Path(out_dir).mkdir(parents=True, exist_ok=True)
+    template = template or default_template(job.company, job.title)
+    kw = dict(contact_name=contact_name, contact_title=contact_title, template=template)
+    sys, user = packet_prompts(job, base_resume_md, ctx_snippets, **kw)
+    text = complete(sys, user, temperature=0.4, tag="packet", refresh=refresh, json_schema=PACKET_SCHEMA)
+    data = _extract_json_block(text)
+    if not data or not isinstance(data.get("outreach"), dict):
+        raise ValueError("packet reply is not the expected JSON object")
+    data["outreach"]["template_used"] = template
+
+    bullets: List[str] = data.get("resume_bullets", [])
+    files = {
+        "resume": ("tailored_resume_section.md", "\n".join(f"- {b}" for b in bullets)),
+        "cover_letter": ("cover_letter.md", data.get("cover_letter", "")),
+        "prep": (PREP_FILE, data.get("prep_pack_md", "")),
+        "star": (STAR_FILE, data.get("star_pack_md", "")),
+        "gap": (GAP_FILE, data.get("gap_plan_md", "")),
+        "outreach": (OUTREACH_FILE, json.dumps(data["outreach"], indent=2)),
+    }
+    paths = {}
+    for name, (fname, content) in files.items():
+        paths[name] = os.path.join(out_dir, fname)
+        with open(paths[name], "w") as f:
+            f.write(content.strip())
+    return {"paths": paths, "data": data, "tokens": estimate_savings(job, base_resume_md, ctx_snippets, **kw)}
@@ -1,36 +1,15 @@
 # agents/prep_agent.py
 import os, pathlib
-from dotenv import load_dotenv
-from openai import OpenAI
-
-load_dotenv()
-client = OpenAI()  # reads OPENAI_API_KEY from .env
-
-def _call_llm(system_prompt: str, user_prompt: str) -> str:
-    """Try Responses API; if not present in this SDK, fall back to Chat Completions."""
-    try:
-        rsp = client.responses.create(
-            model="gpt-4o-mini",
-            input=[{"role":"system","content":system_prompt},
-                   {"role":"user","content":user_prompt}],
-            temperature=0.4,
-        )
-        return rsp.output_text
-    except Exception:
-        rsp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role":"system","content":system_prompt},
-                      {"role":"user","content":user_prompt}],
-            temperature=0.4,
-        )
-        return rsp.choices[0].message.content
-
-def build_prep_pack(company: str, title: str, jd_text: str, ctx_snippets: list, out_dir: str) -> str:
-    """
-    Generates artifacts/<company>_<title>/prep_pack.md and returns its path.
-    """
-    pathlib.Path(out_dir).mkdir(parents=True, exist_ok=True)
+from typing import Iterator
+from agents.llm import complete, stream, stream_to_file
+from agents.budget import budget_inputs
+
+PREP_FILE = "prep_pack.md"
+
+def prep_prompts(company: str, title: str, jd_text: str, ctx_snippets: list):
+    """(system, user) prompts for the prep pack."""
     ctx = "\n\n".join(ctx_snippets or [])
+    jd_text, _ = budget_inputs("prep", jd_text)
 
     sys = "You are a concise interview prep coach for tech roles. Be specific and recent."
     user = f"""
@@ -51,8 +30,29 @@ Produce a Markdown pack with these sections:
 
 Keep it under ~500–700 words total. Avoid fluff.
 """
-    md = _call_llm(sys, user)
-    path = os.path.join(out_dir, "prep_pack.md")
+    return sys, user
+
+def build_prep_pack(company: str, title: str, jd_text: str, ctx_snippets: list, out_dir: str,
+                    refresh: bool = False) -> str:
+    """
+    Generates artifacts/<company>_<title>/prep_pack.md and returns its path.
+    refresh=True skips the LLM reply cache (regenerate).
+    """
+    pathlib.Path(out_dir).mkdir(parents=True, exist_ok=True)
+    sys, user = prep_prompts(company, title, jd_text, ctx_snippets)
+    md = complete(sys, user, temperature=0.4, tag="prep", refresh=refresh)
+    path = os.path.join(out_dir, PREP_FILE)
     with open(path, "w") as f:
         f.write(md.strip())
     return path
+
+def stream_prep_pack(company: str, title: str, jd_text: str, ctx_snippets: list, out_dir: str,
+                     refresh: bool = False) -> Iterator[str]:
+    """
+    Streaming build_prep_pack: yields the markdown as it arrives while writing it to
+    out_dir/prep_pack.md as it goes.
+    """
+    pathlib.Path(out_dir).mkdir(parents=True, exist_ok=True)
+    sys, user = prep_prompts(company, title, jd_text, ctx_snippets)
+    yield from stream_to_file(stream(sys, user, temperature=0.4, tag="prep", refresh=refresh),
+                              os.path.join(out_dir, PREP_FILE))
@@ -1,35 +1,105 @@
 # agents/rolefit.py
-import os
+"""
+RoleFit v2: probability that a JD is a good match, from a logistic regression over
+[cosine(JD, resume)] (scripts/train_fit_model.py).
+
+Probabilities are computed during scoring (main.py passes the cosines it already
+has to store_rolefit) and kept in rolefit_scores keyed by (job, resume hash, model
+version), so the UI reads one row instead of loading the classifier and embedding
+two texts per job. A changed resume or models/fit_clf.joblib gives a new key, so
+old rows are simply never read (and are replaced on the next scoring run).
+The classifier is loaded once per process and reloaded only when the file changes.
+"""
+import hashlib, threading
+from typing import Dict, Optional
 import numpy as np
 from pathlib import Path
-from sentence_transformers import SentenceTransformer
 from sklearn.linear_model import LogisticRegression
-from sklearn.metrics.pairwise import cosine_similarity
 import joblib
+from rag.embedder import encode
+from db.models import RoleFitScore
 
-_EMB_MODEL = None
+_EMB_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 _CLF_PATH = Path("models/fit_clf.joblib")
 
-def _embedder():
-    global _EMB_MODEL
-    if _EMB_MODEL is None:
-        _EMB_MODEL = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
-    return _EMB_MODEL
+_clf: Optional[LogisticRegression] = None
+_clf_stat = None             # (mtime_ns, size) of the file _clf / _clf_version came from
+_clf_version: Optional[str] = None
+_lock = threading.Lock()
 
 def _cos_sim(a: str, b: str) -> float:
-    enc = _embedder()
-    ea = enc.encode([a], normalize_embeddings=True)
-    eb = enc.encode([b], normalize_embeddings=True)
-    return float(cosine_similarity(ea, eb)[0,0])
+    ea, eb = encode([a, b], _EMB_NAME)
+    return float(ea @ eb)  # normalized, so dot == cosine
+
+def resume_hash(resume_md: str) -> str:
+    return hashlib.sha256((resume_md or "").encode("utf-8")).hexdigest()[:16]
+
+def load_classifier():
+    """(classifier, version) — version is a hash of the model file; (None, None) if untrained."""
+    global _clf, _clf_stat, _clf_version
+    try:
+        st = _CLF_PATH.stat()
+    except FileNotFoundError:
+        return None, None
+    stat = (st.st_mtime_ns, st.st_size)
+    with _lock:
+        if _clf is None or _clf_stat != stat:
+            data = _CLF_PATH.read_bytes()
+            _clf_version = hashlib.sha256(data).hexdigest()[:16]
+            _clf = joblib.load(_CLF_PATH)
+            _clf_stat = stat
+        return _clf, _clf_version
+
+def rolefit_probs(cosines) -> Optional[np.ndarray]:
+    """Probabilities for many JD/resume cosines at once, or None if no model is trained."""
+    clf, _ = load_classifier()
+    if clf is None:
+        return None
+    x = np.asarray(cosines, dtype=float).reshape(-1, 1)
+    return clf.predict_proba(x)[:, 1] if len(x) else np.zeros(0)
 
 def rolefit_score(jd_text: str, resume_md: str) -> float | None:
     """
     Returns probability (0..1) from the trained logistic regression on simple features:
     [cosine_similarity(jd, resume)]  — if model exists. Else None.
     """
-    if not _CLF_PATH.exists():
+    if load_classifier()[0] is None:
         return None
-    clf: LogisticRegression = joblib.load(_CLF_PATH)
-    x = np.array([[ _cos_sim(jd_text, resume_md) ]], dtype=float)
-    p = float(clf.predict_proba(x)[0,1])
+    return float(rolefit_probs([_cos_sim(jd_text, resume_md)])[0])
+
+def store_rolefit(s, cosines: Dict[str, float], resume_md: str) -> int:
+    """
+    Persist probabilities for {job_id: cosine(JD, resume)} under the current resume and
+    model version, dropping those jobs' rows for older versions. Caller commits.
+    Returns rows written (0 when no model is trained).
+    """
+    clf, version = load_classifier()
+    if clf is None or not cosines:
+        return 0
+    rh = resume_hash(resume_md)
+    ids = list(cosines)
+    probs = rolefit_probs([cosines[j] for j in ids])
+    (s.query(RoleFitScore)
+       .filter(RoleFitScore.job_id.in_(ids),
+               (RoleFitScore.resume_hash != rh) | (RoleFitScore.model_version != version))
+       .delete(synchronize_session=False))
+    for job_id, p in zip(ids, probs):
+        s.merge(RoleFitScore(job_id=job_id, resume_hash=rh, model_version=version, prob=float(p)))
+    return len(ids)
+
+def stored_rolefit(s, job_id: str, resume_md: str) -> float | None:
+    """The stored probability for this job, resume and model version (a primary-key get), else None."""
+    _, version = load_classifier()
+    if version is None:
+        return None
+    row = s.get(RoleFitScore, (job_id, resume_hash(resume_md), version))
+    return row.prob if row else None
+
+def job_rolefit(s, job, resume_md: str) -> float | None:
+    """stored_rolefit, computing and storing it first for jobs not scored yet (e.g. added in the UI)."""
+    p = stored_rolefit(s, job.id, resume_md)
+    if p is None and load_classifier()[0] is not None:
+        store_rolefit(s, {job.id: _cos_sim(job.jd_text or "", resume_md)}, resume_md)
+        s.commit()
+        p = stored_rolefit(s, job.id, resume_md)
     return p
@@ -1,19 +1,46 @@
 # agents/scorer.py
-from sentence_transformers import SentenceTransformer, util
-import re
+from rag.embedder import encode
+from typing import List
+import os, re
 
-_model = SentenceTransformer("all-MiniLM-L6-v2")
+MODEL_NAME = "all-MiniLM-L6-v2"
+
+BATCH_SIZE = int(os.getenv("SCORER_BATCH_SIZE", "128"))
 
 def keyword_coverage(text, keywords):
     text_l = text.lower()
     hits = sum(1 for k in keywords if k.lower() in text_l)
     return hits / max(1, len(keywords))
 
+def _rationale(resume_text, required_keywords):
+    return {
+        "matched_keywords": [k for k in required_keywords if re.search(rf'\\b{k}\\b', resume_text, re.I)]
+    }
+
 def fit_score(jd_text, resume_text, required_keywords):
-    emb = _model.encode([jd_text, resume_text], convert_to_tensor=True, normalize_embeddings=True)
-    semantic = float(util.cos_sim(emb[0], emb[1])[0][0])
+    emb = encode([jd_text, resume_text], MODEL_NAME)
+    semantic = float(emb[0] @ emb[1])
     keywords = keyword_coverage(resume_text, required_keywords)
     total = 0.7 * semantic + 0.3 * keywords
-    return dict(total=total, semantic=semantic, keywords=keywords, rationale={
-        "matched_keywords": [k for k in required_keywords if re.search(rf'\\b{k}\\b', resume_text, re.I)]
-    })
+    return dict(total=total, semantic=semantic, keywords=keywords,
+                rationale=_rationale(resume_text, required_keywords))
+
+def fit_score_many(jd_texts, resume_text, required_keywords, batch_size: int = BATCH_SIZE) -> List[dict]:
+    """
+    fit_score() for many JDs against one resume, in input order.
+    The resume is encoded once, JDs in batches of batch_size, and all cosines come
+    from a single matrix-vector product (embeddings are normalized, so dot == cosine).
+    """
+    jd_texts = [t or "" for t in jd_texts]
+    if not jd_texts:
+        return []
+    res = encode([resume_text], MODEL_NAME)[0]
+    jds = encode(jd_texts, MODEL_NAME, batch_size=batch_size)  # only unseen JDs hit the model
+    semantic = jds @ res
+
+    # keyword coverage / rationale only look at the resume, so they are the same for every JD
+    keywords = keyword_coverage(resume_text, required_keywords)
+    rationale = _rationale(resume_text, required_keywords)
+    return [dict(total=0.7 * float(sem) + 0.3 * keywords, semantic=float(sem), keywords=keywords,
+                 rationale=dict(rationale))
+            for sem in semantic]
@@ -1,38 +1,15 @@
 # agents/star_agent.py
 import os, pathlib
-from dotenv import load_dotenv
-from openai import OpenAI
+from typing import Iterator
+from agents.llm import complete, stream, stream_to_file
+from agents.budget import budget_inputs
 
-load_dotenv()
-client = OpenAI()  # reads OPENAI_API_KEY from .env
+STAR_FILE = "star_pack.md"
 
-def _call_llm(system_prompt: str, user_prompt: str) -> str:
-    """Try Responses API; if not available, fall back to Chat Completions."""
-    try:
-        rsp = client.responses.create(
-            model="gpt-4o-mini",
-            input=[{"role": "system", "content": system_prompt},
-                   {"role": "user", "content": user_prompt}],
-            temperature=0.4,
-        )
-        return rsp.output_text
-    except Exception:
-        rsp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "system", "content": system_prompt},
-                      {"role": "user", "content": user_prompt}],
-            temperature=0.4,
-        )
-        return rsp.choices[0].message.content
-
-def build_star_pack(company: str, title: str, jd_text: str,
-                    base_resume_md: str, ctx_snippets: list, out_dir: str) -> str:
-    """
-    Generates artifacts/<company>_<title>/star_pack.md and returns its path.
-    Produces 20 STAR question/answers tailored to the JD and the resume.
-    """
-    pathlib.Path(out_dir).mkdir(parents=True, exist_ok=True)
+def star_prompts(company: str, title: str, jd_text: str, base_resume_md: str, ctx_snippets: list):
+    """(system, user) prompts for the 20-answer STAR pack."""
     ctx = "\n\n".join(ctx_snippets or [])
+    jd_text, base_resume_md = budget_inputs("star", jd_text, base_resume_md)
 
     sys = (
         "You are an expert interview coach. Generate STAR (Situation, Task, Action, Result) "
@@ -71,8 +48,32 @@ RULES:
 - Return a single Markdown document containing all 20 pairs.
 """
 
-    md = _call_llm(sys, user).strip()
-    path = os.path.join(out_dir, "star_pack.md")
+    return sys, user
+
+def build_star_pack(company: str, title: str, jd_text: str,
+                    base_resume_md: str, ctx_snippets: list, out_dir: str,
+                    refresh: bool = False) -> str:
+    """
+    Generates artifacts/<company>_<title>/star_pack.md and returns its path.
+    Produces 20 STAR question/answers tailored to the JD and the resume.
+    refresh=True skips the LLM reply cache (regenerate).
+    """
+    pathlib.Path(out_dir).mkdir(parents=True, exist_ok=True)
+    sys, user = star_prompts(company, title, jd_text, base_resume_md, ctx_snippets)
+    md = complete(sys, user, temperature=0.4, tag="star", refresh=refresh).strip()
+    path = os.path.join(out_dir, STAR_FILE)
     with open(path, "w") as f:
         f.write(md)
     return path
+
+def stream_star_pack(company: str, title: str, jd_text: str,
+                     base_resume_md: str, ctx_snippets: list, out_dir: str,
+                     refresh: bool = False) -> Iterator[str]:
+    """
+    Streaming build_star_pack: yields the markdown as it arrives while writing it to
+    out_dir/star_pack.md as it goes.
+    """
+    pathlib.Path(out_dir).mkdir(parents=True, exist_ok=True)
+    sys, user = star_prompts(company, title, jd_text, base_resume_md, ctx_snippets)
+    yield from stream_to_file(stream(sys, user, temperature=0.4, tag="star", refresh=refresh),
+                              os.path.join(out_dir, STAR_FILE))
@@ -15,8 +15,9 @@ import matplotlib.pyplot as plt
 from dotenv import load_dotenv
 load_dotenv()
 
-from db.models import Session as JobSession, JobPosting, FitScore
-from db.crm import Session as CRMSession, Contact, OutreachEvent, init_crm
+from db.models import session_scope, JobPosting
+from db.queue import job_status_counts, outreach_counts, outreach_by_company
+from db.crm import Contact, OutreachEvent, init_crm
 
 st.set_page_config(page_title="AI Job Agent — Dashboard", layout="wide")
 st.title("AI Job Agent — Dashboard")
@@ -25,17 +26,15 @@ init_crm()
 
 # ---------- helpers ----------
 def df_jobs():
-    s = JobSession()
-    rows = s.query(JobPosting).all()
-    return pd.DataFrame([{
-        "job_id": j.id, "company": j.company, "title": j.title,
-        "location": j.location, "status": j.status,
-        "posted_at": j.posted_at
-    } for j in rows])
+    # only the exported columns: jd_text is by far the biggest and isn't shown here
+    with session_scope(commit=False) as s:
+        rows = s.query(JobPosting.id, JobPosting.company, JobPosting.title, JobPosting.location,
+                       JobPosting.status, JobPosting.posted_at).all()
+    return pd.DataFrame(rows, columns=["job_id", "company", "title", "location", "status", "posted_at"])
 
 def df_events():
-    s = CRMSession()
-    rows = s.query(OutreachEvent).all()
+    with session_scope(commit=False) as s:
+        rows = s.query(OutreachEvent).all()
     return pd.DataFrame([{
         "event_id": r.id,
         "job_id": r.job_id,
@@ -48,8 +47,8 @@ def df_events():
     } for r in rows])
 
 def df_contacts():
-    s = CRMSession()
-    rows = s.query(Contact).all()
+    with session_scope(commit=False) as s:
+        rows = s.query(Contact).all()
     return pd.DataFrame([{
         "contact_id": c.id,
         "name": c.name or "",
@@ -66,44 +65,41 @@ def is_success(outcome: str) -> bool:
     return outcome in {"positive_reply", "interview", "offer"}
 
 # ---------- load ----------
-jobs = df_jobs()
+# KPIs and per-status/outcome counts are GROUP BY queries (db.queue); the full
+# tables are only loaded for the per-event breakdowns and the CSV exports.
+with session_scope(commit=False) as s:
+    status_counts = job_status_counts(s)
+    outcome_counts = outreach_counts(s)
+    by_company_rows = outreach_by_company(s)
 events = df_events()
 contacts = df_contacts()
 
+def _counts_frame(counts: dict, name: str) -> pd.DataFrame:
+    return (pd.DataFrame(list(counts.items()), columns=[name, "count"])
+              .sort_values("count", ascending=False).set_index(name))
+
 # ---------- KPIs ----------
 c1, c2, c3, c4 = st.columns(4)
-c1.metric("Jobs in queue", int(len(jobs)))
-c2.metric("Applied", int((jobs.status == "applied").sum()) if not jobs.empty else 0)
-c3.metric("Outreach events", int(len(events)))
-c4.metric("Interviews logged", int((events.outcome == "interview").sum()) if not events.empty else 0)
+c1.metric("Jobs in queue", sum(status_counts.values()))
+c2.metric("Applied", status_counts.get("applied", 0))
+c3.metric("Outreach events", sum(outcome_counts.values()))
+c4.metric("Interviews logged", outcome_counts.get("interview", 0))
 
 st.markdown("---")
 
 # ---------- Jobs by status ----------
 st.subheader("Jobs by status")
-if jobs.empty:
+if not status_counts:
     st.info("No jobs yet.")
 else:
-    status_counts = (
-        jobs.groupby("status", dropna=False)
-            .size()
-            .reset_index(name="count")
-            .sort_values("count", ascending=False)
-    )
-    st.bar_chart(status_counts.set_index("status"))
+    st.bar_chart(_counts_frame(status_counts, "status"))
 
 # ---------- Outreach by outcome ----------
 st.subheader("Outreach by outcome")
-if events.empty:
+if not outcome_counts:
     st.info("No outreach yet.")
 else:
-    outcome_counts = (
-        events.groupby("outcome")
-              .size()
-              .reset_index(name="count")
-              .sort_values("count", ascending=False)
-    )
-    st.bar_chart(outcome_counts.set_index("outcome"))
+    st.bar_chart(_counts_frame(outcome_counts, "outcome"))
 
 # ---------- Channel performance ----------
 st.subheader("Channel performance (rate of positive outcomes)")
@@ -136,15 +132,14 @@ else:
 
 # ---------- Company x Outcome heatmap ----------
 st.subheader("Company × Outcome heatmap")
-if events.empty or jobs.empty:
+if events.empty or not status_counts:
     st.info("Need jobs and outreach to draw heatmap.")
 else:
-    # attach company to events via job_id
-    jj = jobs[["job_id", "company"]]
-    ev_join = events.merge(jj, how="left", on="job_id")
-    mat = ev_join.pivot_table(
+    # company x outcome counts come pre-aggregated from SQL (outreach_events joined to job_postings)
+    by_company = pd.DataFrame(by_company_rows, columns=["company", "outcome", "count"])
+    mat = by_company.pivot_table(
         index="company", columns="outcome",
-        values="event_id", aggfunc="count", fill_value=0
+        values="count", aggfunc="sum", fill_value=0
     )
 
     st.dataframe(mat, use_container_width=True)
@@ -177,6 +172,6 @@ st.markdown("---")
 # ---------- Downloads ----------
 st.subheader("Export raw tables")
 colA, colB, colC = st.columns(3)
-colA.download_button("Download jobs.csv", data=jobs.to_csv(index=False), file_name="jobs.csv", mime="text/csv")
+colA.download_button("Download jobs.csv", data=df_jobs().to_csv(index=False), file_name="jobs.csv", mime="text/csv")
 colB.download_button("Download outreach_events.csv", data=events.to_csv(index=False), file_name="outreach_events.csv", mime="text/csv")
 colC.download_button("Download contacts.csv", data=contacts.to_csv(index=False), file_name="contacts.csv", mime="text/csv")
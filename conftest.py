@@ -0,0 +1,6 @@
+# conftest.py
+# Repo root on sys.path, so a bare `pytest` imports utils/, scripts/, agents/ ... like `python -m pytest`.
+# Tests get a throwaway database: importing main runs init_db() on DB_URL.
+import os, tempfile
+
+os.environ["DB_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='jobs-test-')}/jobs.db"
@@ -6,12 +6,14 @@ from datetime import datetime
 from typing import List
 
 from sqlalchemy import (
-    Column, Integer, String, DateTime, create_engine, select
+    Column, Integer, String, DateTime, select
 )
 from sqlalchemy.orm import declarative_base, sessionmaker
 
-# SQLite file next to the repo root (same style as crm.py)
-ENGINE = create_engine("sqlite:///bandit.sqlite3", future=True)
+from db.engine import get_engine
+
+# SQLite file next to the repo root, tuned and pooled by db.engine
+ENGINE = get_engine("sqlite:///bandit.sqlite3")
 Session = sessionmaker(bind=ENGINE, expire_on_commit=False, future=True)
 Base = declarative_base()
 
@@ -1,13 +1,19 @@
 # db/crm.py
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text, ForeignKey
-from sqlalchemy.orm import declarative_base, sessionmaker, relationship
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Index
+from sqlalchemy.orm import sessionmaker, relationship
 from datetime import datetime
 import os
 
+# same database and metadata as db.models, so outreach_events.job_id can reference job_postings
+from db.models import Base
+from db.engine import get_engine, session_scope as _session_scope
+
 DB_URL = os.getenv("DB_URL", "sqlite:///db/jobs.db")
-engine = create_engine(DB_URL, echo=False)
+engine = get_engine(DB_URL)          # the same engine (and pool) as db.models
 Session = sessionmaker(bind=engine)
-Base = declarative_base()
+
+def session_scope(commit: bool = True):
+    return _session_scope(Session, commit=commit)
 
 class Contact(Base):
     __tablename__ = "contacts"
@@ -19,18 +25,25 @@ class Contact(Base):
     linkedin_url = Column(String)
     source = Column(String)              # portal|linkedin|manual|hunter_*
     created_at = Column(DateTime, default=datetime.utcnow)
+    __table_args__ = (Index('ix_contacts_company', 'company'),)
 
 class OutreachEvent(Base):
     __tablename__ = "outreach_events"
     id = Column(Integer, primary_key=True)
     contact_id = Column(Integer, ForeignKey("contacts.id"))
-    job_id = Column(String)              # references job_postings.id
+    job_id = Column(String, ForeignKey("job_postings.id", ondelete="SET NULL"))
     channel = Column(String)             # email|linkedin|portal
     template_name = Column(String)
     sent_at = Column(DateTime, default=datetime.utcnow)
     outcome = Column(String)             # no_reply|reply|bounce|screen_invite
     notes = Column(Text)
     contact = relationship("Contact")
+    __table_args__ = (
+        Index('ix_outreach_events_job_id', 'job_id'),
+        Index('ix_outreach_events_contact_id', 'contact_id'),
+    )
 
 def init_crm():
+    from db.migrations import migrate
     Base.metadata.create_all(engine)
+    migrate(engine)
@@ -0,0 +1,91 @@
+# db/engine.py
+"""
+One engine per database URL, shared by every module that opens it, plus a scoped
+session helper.
+
+db.models and db.crm both live in DB_URL (db/jobs.db) and now share one engine
+and pool instead of one each; db.bandit gets its own file's engine from here too.
+SQLite file databases get a tuning profile on every new connection:
+
+  journal_mode=WAL      readers don't block the writer (UI vs. ingest / main.py)
+  synchronous=NORMAL    fsync at checkpoints only; safe with WAL
+  mmap_size             SQLITE_MMAP_MB (256) of the file memory-mapped
+  cache_size            SQLITE_CACHE_MB (64) of page cache per connection
+  busy_timeout          SQLITE_BUSY_TIMEOUT_MS (5000): wait for a lock instead of failing
+  temp_store=MEMORY     sorts / temp b-trees in memory
+
+foreign_keys stays off: the declared keys (db.migrations) document the schema,
+and turning enforcement on would change what deleting a job does.
+
+    from db.models import session_scope
+    with session_scope() as s:            # commit on success, rollback on error, always closed
+        s.add(...)
+"""
+from __future__ import annotations
+import os, threading
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import Session as OrmSession
+
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "8"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+MMAP_MB = int(os.getenv("SQLITE_MMAP_MB", "256"))
+CACHE_MB = int(os.getenv("SQLITE_CACHE_MB", "64"))
+BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+_engines: Dict[str, Engine] = {}
+_lock = threading.Lock()
+
+def _sqlite_pragmas(dbapi_conn, _record):
+    cur = dbapi_conn.cursor()
+    cur.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    cur.execute("PRAGMA journal_mode=WAL")          # persistent: a no-op after the first connection
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.execute(f"PRAGMA mmap_size={MMAP_MB * 1024 * 1024}")
+    cur.execute(f"PRAGMA cache_size={-CACHE_MB * 1024}")   # negative = KiB
+    cur.execute("PRAGMA temp_store=MEMORY")
+    cur.close()
+
+def get_engine(url: str) -> Engine:
+    """The process-wide engine for url (created on first call, tuned if it is a SQLite file)."""
+    key = str(make_url(url))
+    eng = _engines.get(key)
+    if eng is None:
+        with _lock:
+            eng = _engines.get(key)
+            if eng is None:
+                u = make_url(url)
+                file_db = u.get_backend_name() == "sqlite" and u.database not in (None, "", ":memory:")
+                kw = {}
+                if file_db or u.get_backend_name() != "sqlite":
+                    kw = dict(pool_size=POOL_SIZE, max_overflow=MAX_OVERFLOW, pool_timeout=POOL_TIMEOUT)
+                if file_db:
+                    # Streamlit reruns and main.py's workers hand connections across threads
+                    kw["connect_args"] = {"check_same_thread": False}
+                eng = create_engine(url, echo=False, **kw)
+                if file_db:
+                    event.listen(eng, "connect", _sqlite_pragmas)
+                _engines[key] = eng
+    return eng
+
+@contextmanager
+def session_scope(factory, commit: bool = True) -> Iterator[OrmSession]:
+    """
+    A session from factory that is committed (commit=True) or just released
+    (commit=False, for reads) on success, rolled back on error, and always closed.
+    With commit=False the loaded objects stay usable after the block.
+    """
+    s = factory()
+    try:
+        yield s
+        if commit:
+            s.commit()
+    except BaseException:
+        s.rollback()
+        raise
+    finally:
+        s.close()
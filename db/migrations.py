@@ -0,0 +1,142 @@
+# db/migrations.py
+"""
+Versioned, idempotent schema migrations, run by init_db() / init_crm() after
+create_all().
+
+create_all() only creates missing tables, so an index or foreign key added to a
+model never reaches a database created before it. Each entry in MIGRATIONS is
+applied once, in order, and recorded in the schema_version table; every step also
+checks the live schema first, so a fresh database (where create_all already built
+everything) just records the versions.
+
+SQLite cannot add a foreign key to an existing table, so those tables are rebuilt:
+renamed aside, re-created from the model, rows copied, old table dropped, all in
+the migration's transaction. Foreign keys are declared, not enforced: SQLite only
+checks them with PRAGMA foreign_keys=ON, which this app does not set.
+
+Add a migration by appending (next version, description, fn(conn)) to MIGRATIONS.
+"""
+from __future__ import annotations
+import logging
+from datetime import datetime
+from typing import Callable, List, Tuple
+
+from sqlalchemy import (Column, DateTime, Integer, MetaData, String, Table, inspect, select)
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.schema import AddConstraint, CreateColumn
+
+from db.models import Base
+import db.crm  # noqa: F401  (registers contacts/outreach_events on the shared metadata)
+
+log = logging.getLogger(__name__)
+
+schema_version = Table(
+    "schema_version", MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("description", String),
+    Column("applied_at", DateTime, default=datetime.utcnow),
+)
+
+# --- steps ---------------------------------------------------------------------
+
+def _add_indexes(conn) -> None:
+    """CREATE INDEX for every index the models declare that the database lacks."""
+    existing = set(inspect(conn).get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name in existing:
+            for ix in table.indexes:
+                ix.create(conn, checkfirst=True)
+
+def _fk_key(fk) -> tuple:
+    return tuple(fk["constrained_columns"]), fk["referred_table"], tuple(fk["referred_columns"])
+
+def _missing_fks(conn, table: Table) -> list:
+    have = {_fk_key(fk) for fk in inspect(conn).get_foreign_keys(table.name)}
+    return [c for c in table.foreign_key_constraints
+            if (tuple(c.column_keys), c.referred_table.name, tuple(e.column.name for e in c.elements))
+            not in have]
+
+def _rebuild_sqlite(conn, table: Table) -> None:
+    """Re-create table from its model (new constraints included), keeping its rows."""
+    old = f"_old_{table.name}"
+    conn.exec_driver_sql(f'ALTER TABLE "{table.name}" RENAME TO "{old}"')
+    for ix in inspect(conn).get_indexes(old):     # index names are global: free them for the new table
+        conn.exec_driver_sql(f'DROP INDEX IF EXISTS "{ix["name"]}"')
+    table.create(conn)
+    have = {c["name"] for c in inspect(conn).get_columns(old)}
+    cols = ", ".join(f'"{c.name}"' for c in table.columns if c.name in have)
+    conn.exec_driver_sql(f'INSERT INTO "{table.name}" ({cols}) SELECT {cols} FROM "{old}"')
+    conn.exec_driver_sql(f'DROP TABLE "{old}"')
+
+def _add_foreign_keys(conn) -> None:
+    """Declare the models' foreign keys on tables created without them."""
+    existing = set(inspect(conn).get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing:
+            continue
+        missing = _missing_fks(conn, table)
+        if not missing:
+            continue
+        log.info("migrations: adding %d foreign key(s) to %s", len(missing), table.name)
+        if conn.dialect.name == "sqlite":
+            _rebuild_sqlite(conn, table)
+            continue
+        for fk in missing:
+            try:
+                with conn.begin_nested():
+                    conn.execute(AddConstraint(fk))
+            except IntegrityError as e:
+                # rows pointing at deleted jobs: leave the constraint off rather than drop data
+                log.warning("migrations: %s.%s not added (%s)", table.name, fk.column_keys, e.orig)
+
+def _add_columns(conn) -> None:
+    """ALTER TABLE ADD COLUMN for nullable model columns the database lacks."""
+    existing = set(inspect(conn).get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing:
+            continue
+        have = {c["name"] for c in inspect(conn).get_columns(table.name)}
+        for col in table.columns:
+            if col.name not in have:
+                ddl = CreateColumn(col).compile(dialect=conn.dialect)
+                conn.exec_driver_sql(f'ALTER TABLE "{table.name}" ADD COLUMN {ddl}')
+
+MIGRATIONS: List[Tuple[int, str, Callable]] = [
+    (1, "indexes on job_id / contact_id / company / status / posted_at lookups", _add_indexes),
+    (2, "foreign keys to job_postings and contacts", _add_foreign_keys),
+    (3, "board_cursors.filter_hash", _add_columns),
+]
+
+# --- runner --------------------------------------------------------------------
+
+def current_version(conn) -> int:
+    return conn.execute(select(schema_version.c.version).order_by(schema_version.c.version.desc())
+                        .limit(1)).scalar() or 0
+
+def migrate(engine) -> int:
+    """Apply pending migrations; returns the schema version afterwards. Safe to call on every start."""
+    schema_version.create(engine, checkfirst=True)
+    with engine.connect() as conn:
+        done = current_version(conn)
+        conn.rollback()
+        for version, description, step in MIGRATIONS:
+            if version <= done:
+                continue
+            # claim the version first: the INSERT opens the transaction (and on SQLite takes
+            # the write lock) before any DDL, so a failed step rolls back whole and a second
+            # process starting at the same time skips instead of re-running it
+            try:
+                conn.execute(schema_version.insert().values(version=version, description=description,
+                                                            applied_at=datetime.utcnow()))
+            except IntegrityError:
+                conn.rollback()
+                continue
+            try:
+                step(conn)
+            except Exception:
+                conn.rollback()
+                raise
+            conn.commit()
+            log.info("migrations: applied %d (%s)", version, description)
+            done = version
+    return done
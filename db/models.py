@@ -1,14 +1,22 @@
 # db/models.py
-from sqlalchemy import create_engine, Column, String, Text, Float, DateTime, Integer, JSON, UniqueConstraint
+from sqlalchemy import (Column, String, Text, Float, DateTime, Integer, JSON, ForeignKey,
+                        UniqueConstraint, Index, insert, select, update, tuple_, bindparam)
 from sqlalchemy.orm import declarative_base, sessionmaker
 from datetime import datetime
+from typing import Dict, Iterable, Set, Tuple
 import uuid, os
 
+from db.engine import get_engine, session_scope as _session_scope
+
 DB_URL = os.getenv("DB_URL", "sqlite:///db/jobs.db")  # SQLite file inside /db
-engine = create_engine(DB_URL, echo=False)
+engine = get_engine(DB_URL)                           # shared with db.crm (same file)
 Session = sessionmaker(bind=engine)
 Base = declarative_base()
 
+def session_scope(commit: bool = True):
+    """with session_scope() as s: ... — see db.engine.session_scope."""
+    return _session_scope(Session, commit=commit)
+
 def gen_id():
     return str(uuid.uuid4())
 
@@ -21,27 +29,172 @@ class JobPosting(Base):
     url = Column(String, unique=True)
     jd_text = Column(Text)
     posted_at = Column(DateTime, default=datetime.utcnow)
-    status = Column(String, default="ingested")  # ingested|scored|approved|applied
-    __table_args__ = (UniqueConstraint('url', name='uq_url'),)
+    status = Column(String, default="ingested")  # ingested|scored|approved|applied|closed
+    __table_args__ = (
+        UniqueConstraint('url', name='uq_url'),
+        Index('ix_job_company_title_location', 'company', 'title', 'location'),  # ingest dedupe key
+        Index('ix_job_posted_at', 'posted_at'),                 # queue: newest first
+        Index('ix_job_status_posted_at', 'status', 'posted_at'),  # queue: status filter
+    )
 
 class FitScore(Base):
     __tablename__ = "fit_scores"
     id = Column(Integer, primary_key=True, autoincrement=True)
-    job_id = Column(String)
+    job_id = Column(String, ForeignKey("job_postings.id", ondelete="CASCADE"))
     total = Column(Float)
     semantic = Column(Float)
     keywords = Column(Float)
     rationale = Column(JSON)
     created_at = Column(DateTime, default=datetime.utcnow)
+    __table_args__ = (Index('ix_fit_scores_job_created', 'job_id', 'created_at'),)  # latest score per job
 
 class Artifact(Base):
     __tablename__ = "artifacts"
     id = Column(Integer, primary_key=True, autoincrement=True)
-    job_id = Column(String)
+    job_id = Column(String, ForeignKey("job_postings.id", ondelete="CASCADE"))
     resume_path = Column(String)
     cover_letter_path = Column(String)
     qa_json = Column(JSON)
     created_at = Column(DateTime, default=datetime.utcnow)
+    __table_args__ = (Index('ix_artifacts_job_created', 'job_id', 'created_at'),)  # latest artifact per job
+
+class BoardCursor(Base):
+    """Per-board high-water mark so re-ingesting only touches new/changed postings."""
+    __tablename__ = "board_cursors"
+    board = Column(String, primary_key=True)   # "<ats>:<slug>", e.g. "greenhouse:stripe"
+    high_water = Column(String)                # newest updated_at/createdAt seen on the board
+    seen = Column(JSON)                        # {ats_job_id: [stamp, url]}
+    filter_hash = Column(String)               # ProfileFilter.fingerprint the seen ids were judged by
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class JobDuplicate(Base):
+    """Near-duplicate posting (re-post / multi-location copy) -> its canonical job."""
+    __tablename__ = "job_duplicates"
+    job_id = Column(String, ForeignKey("job_postings.id", ondelete="CASCADE"), primary_key=True)
+    canonical_id = Column(String, ForeignKey("job_postings.id", ondelete="CASCADE"), index=True)
+    similarity = Column(Float)                 # estimated Jaccard of JD shingles
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class RoleFitScore(Base):
+    """RoleFit v2 probability for a job under one resume and one classifier file (agents/rolefit.py)."""
+    __tablename__ = "rolefit_scores"
+    job_id = Column(String, ForeignKey("job_postings.id", ondelete="CASCADE"), primary_key=True)
+    resume_hash = Column(String, primary_key=True)     # sha256 prefix of the resume markdown
+    model_version = Column(String, primary_key=True)   # sha256 prefix of models/fit_clf.joblib
+    prob = Column(Float)
+    created_at = Column(DateTime, default=datetime.utcnow)
 
 def init_db():
+    # create_all only adds missing tables; indexes and foreign keys introduced later
+    # reach existing databases through the versioned migrations
+    from db.migrations import migrate
     Base.metadata.create_all(engine)
+    migrate(engine)
+
+def _insert_ignore(table):
+    """INSERT that silently skips rows violating a unique constraint (e.g. a re-seen url)."""
+    if engine.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return insert(table)
+    return dialect_insert(table).on_conflict_do_nothing()
+
+def bulk_add_postings(s, postings: Iterable[dict], chunk: int = 500) -> dict:
+    """
+    Insert normalized postings (dicts with company/title/location/jd_text and optionally
+    url/posted_at/status) in bulk. Rows whose (company, title, location) already exists in
+    the DB or earlier in the batch are skipped via one set-based lookup per chunk, and the
+    rest go out as a single executemany INSERT ... ON CONFLICT DO NOTHING (which also
+    absorbs re-seen urls). Caller owns the transaction. Returns {"kept": n, "deduped": m}.
+    """
+    rows, seen, deduped = [], set(), 0
+    for p in postings:
+        key = (p.get("company"), p.get("title"), p.get("location"))
+        if key in seen:
+            deduped += 1
+            continue
+        seen.add(key)
+        rows.append((key, p))
+
+    kept = 0
+    cols = JobPosting.__table__.c
+    for i in range(0, len(rows), chunk):
+        batch = rows[i:i + chunk]
+        existing = set(s.execute(
+            select(cols.company, cols.title, cols.location)
+            .where(tuple_(cols.company, cols.title, cols.location).in_([k for k, _ in batch]))
+        ).all())
+        now = datetime.utcnow()
+        values = [{
+            "id": gen_id(),
+            "company": p.get("company"),
+            "title": p.get("title"),
+            "location": p.get("location"),
+            "url": p.get("url"),
+            "jd_text": p.get("jd_text"),
+            "posted_at": p.get("posted_at") or now,
+            "status": p.get("status") or "new",
+        } for k, p in batch if k not in existing]
+        deduped += len(batch) - len(values)
+        if not values:
+            continue
+        res = s.execute(_insert_ignore(JobPosting.__table__), values)
+        n = res.rowcount if res.rowcount is not None and res.rowcount >= 0 else len(values)
+        kept += n
+        deduped += len(values) - n
+    return {"kept": kept, "deduped": deduped}
+
+OPEN_STATUSES = ("new", "ingested", "scored")
+
+def load_cursor(s, board: str) -> Tuple[Dict[str, list], str | None]:
+    """(seen, filter_hash) of the board's cursor; ({}, None) for a new board."""
+    row = s.get(BoardCursor, board)
+    return (dict(row.seen or {}), row.filter_hash) if row else ({}, None)
+
+def save_cursor(s, board: str, seen: Dict[str, list], filter_hash: str | None = None) -> None:
+    stamps = [v[0] for v in seen.values() if v and v[0]]
+    row = s.get(BoardCursor, board)
+    if row is None:
+        row = BoardCursor(board=board)
+        s.add(row)
+    row.seen = seen
+    row.filter_hash = filter_hash
+    row.high_water = max(stamps) if stamps else None
+    row.updated_at = datetime.utcnow()
+
+def refresh_postings(s, postings: Iterable[dict]) -> Set[str]:
+    """
+    Update title/location/jd_text of postings whose url is already in the DB (and reopen
+    them if they had been closed). Returns the set of urls that matched; the caller should
+    bulk_add_postings the rest.
+    """
+    by_url = {p["url"]: p for p in postings if p.get("url")}
+    if not by_url:
+        return set()
+    cols = JobPosting.__table__.c
+    known = set(s.execute(select(cols.url).where(cols.url.in_(list(by_url)))).scalars())
+    if known:
+        s.execute(
+            update(JobPosting.__table__)
+            .where(cols.url == bindparam("b_url"))
+            .values(title=bindparam("b_title"), location=bindparam("b_location"), jd_text=bindparam("b_jd")),
+            [{"b_url": u, "b_title": by_url[u].get("title"), "b_location": by_url[u].get("location"),
+              "b_jd": by_url[u].get("jd_text")} for u in known],
+        )
+        s.execute(update(JobPosting.__table__)
+                  .where(cols.url.in_(list(known)), cols.status == "closed")
+                  .values(status="new"))
+    return known
+
+def close_postings(s, urls: Iterable[str]) -> int:
+    """Mark still-open postings whose url vanished from its board as closed."""
+    urls = [u for u in urls if u]
+    if not urls:
+        return 0
+    cols = JobPosting.__table__.c
+    res = s.execute(update(JobPosting.__table__)
+                    .where(cols.url.in_(urls), cols.status.in_(OPEN_STATUSES))
+                    .values(status="closed"))
+    return res.rowcount or 0
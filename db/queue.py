@@ -0,0 +1,151 @@
+# db/queue.py
+"""
+Read side of the Applications Queue and the dashboards.
+
+queue_rows() returns a page of jobs, each with its latest FitScore and Artifact
+(ROW_NUMBER() windows, one per table) and its duplicate flag: the page's job ids
+first, then one joined query for them, instead of a score query and an artifact
+query per job. Filters and sort are applied in SQL and queue_count() sizes the pager. The *_counts helpers compute KPIs with
+GROUP BY in SQL rather than loading every row into pandas.
+
+The CRM tables (db.crm) live in the same database file (same DB_URL), so
+outreach_by_company() can join them to job_postings directly.
+"""
+from __future__ import annotations
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import aliased
+
+from db.models import JobPosting, FitScore, Artifact, JobDuplicate
+from db.crm import Contact, OutreachEvent
+
+class QueueRow(NamedTuple):
+    job: JobPosting
+    score: Optional[FitScore]            # latest by created_at
+    artifact: Optional[Artifact]         # latest by created_at
+    duplicate: Optional[JobDuplicate]    # set when the job is a near-duplicate ...
+    canonical: Optional[JobPosting]      # ... of this posting
+
+def _latest(model, job_ids: Sequence[str] | None = None):
+    """(alias of model over its newest row per job_id, the row-number column)."""
+    rn = func.row_number().over(partition_by=model.job_id,
+                                order_by=(model.created_at.desc(), model.id.desc())).label("rn")
+    sub = select(model, rn)
+    if job_ids is not None:
+        sub = sub.where(model.job_id.in_(list(job_ids)))
+    sub = sub.subquery()
+    return aliased(model, sub), sub.c.rn
+
+def _job_filters(q, status: str | None, company: str | None):
+    if status is not None:
+        # NULL status is shown (and counted) as "new"
+        q = q.where(or_(JobPosting.status == status, JobPosting.status.is_(None)) if status == "new"
+                    else JobPosting.status == status)
+    if company is not None:
+        q = q.where(JobPosting.company == company)
+    return q
+
+# UI label -> queue_query(sort=...)
+QUEUE_SORTS = {"Newest": "posted", "Fit score": "score"}
+
+def queue_query(status: str | None = None, company: str | None = None,
+                min_score: float | None = None, sort: str = "posted",
+                job_ids: Sequence[str] | None = None):
+    """
+    SELECT job, latest score, latest artifact, duplicate, canonical job, filtered by
+    status / company (equality, served by the job_postings indexes) / latest score,
+    newest postings first or (sort="score") best fit first, unscored jobs last.
+    job_ids restricts the query, window subqueries included, to those jobs.
+    """
+    fs, fs_rn = _latest(FitScore, job_ids)
+    art, art_rn = _latest(Artifact, job_ids)
+    canon = aliased(JobPosting)
+    q = (select(JobPosting, fs, art, JobDuplicate, canon)
+         .outerjoin(fs, and_(fs.job_id == JobPosting.id, fs_rn == 1))
+         .outerjoin(art, and_(art.job_id == JobPosting.id, art_rn == 1))
+         .outerjoin(JobDuplicate, JobDuplicate.job_id == JobPosting.id)
+         .outerjoin(canon, canon.id == JobDuplicate.canonical_id))
+    q = _job_filters(q, status, company)
+    if job_ids is not None:
+        q = q.where(JobPosting.id.in_(list(job_ids)))
+    if min_score is not None:
+        q = q.where(fs.total >= min_score)
+    if sort == "score":
+        q = q.order_by(fs.total.desc().nulls_last(), JobPosting.posted_at.desc(), JobPosting.id)
+    else:
+        q = q.order_by(JobPosting.posted_at.desc(), JobPosting.id)
+    return q
+
+def _latest_total():
+    """Correlated scalar: the job's latest FitScore.total (one ix_fit_scores_job_created seek per job)."""
+    return (select(FitScore.total).where(FitScore.job_id == JobPosting.id)
+            .order_by(FitScore.created_at.desc(), FitScore.id.desc()).limit(1)
+            .correlate(JobPosting).scalar_subquery())
+
+def _page_ids_query(status: str | None = None, company: str | None = None,
+                    min_score: float | None = None, sort: str = "posted"):
+    """SELECT job_postings.id with queue_query()'s filters and order, without the joins."""
+    q = _job_filters(select(JobPosting.id), status, company)
+    if min_score is not None or sort == "score":
+        total = _latest_total()
+        if min_score is not None:
+            q = q.where(total >= min_score)
+        if sort == "score":
+            return q.order_by(total.desc().nulls_last(), JobPosting.posted_at.desc(), JobPosting.id)
+    return q.order_by(JobPosting.posted_at.desc(), JobPosting.id)
+
+def queue_rows(s, limit: int | None = None, offset: int = 0, **filters) -> List[QueueRow]:
+    """
+    One page (LIMIT/OFFSET) of queue_query(**filters), or every row when limit is None.
+    A page is fetched in two steps: the page's job ids from job_postings alone (index
+    range scans, with per-job index seeks for the latest score when filtering or
+    sorting on it), then the joined rows for just those ids.
+    """
+    if limit is None:
+        return [QueueRow(*row) for row in s.execute(queue_query(**filters)).all()]
+    ids = list(s.execute(_page_ids_query(**filters).limit(limit).offset(offset)).scalars())
+    if not ids:
+        return []
+    # the ids already satisfy the filters; repeating them would steer SQLite to the
+    # status index instead of primary-key lookups
+    rows = [QueueRow(*row) for row in s.execute(queue_query(job_ids=ids)).all()]
+    pos = {job_id: i for i, job_id in enumerate(ids)}
+    return sorted(rows, key=lambda r: pos[r.job.id])
+
+def queue_count(s, **filters) -> int:
+    """Rows queue_rows() would return without a limit (the joins are 1:1, so jobs are counted)."""
+    filters.pop("sort", None)
+    inner = _page_ids_query(**filters).order_by(None).subquery()
+    return s.scalar(select(func.count()).select_from(inner)) or 0
+
+def job_companies(s) -> List[str]:
+    """Distinct non-empty companies, for the queue's company filter."""
+    q = (select(JobPosting.company).where(JobPosting.company.is_not(None), JobPosting.company != "")
+         .distinct().order_by(JobPosting.company))
+    return list(s.execute(q).scalars())
+
+def job_status_counts(s) -> Dict[str, int]:
+    """{status: jobs}; a missing status counts as "new"."""
+    status = func.coalesce(JobPosting.status, "new")
+    return dict(s.execute(select(status, func.count()).group_by(status)).all())
+
+def outreach_counts(s) -> Dict[str, int]:
+    """{outcome: events}; events without an outcome count as "sent"."""
+    outcome = func.coalesce(OutreachEvent.outcome, "sent")
+    return dict(s.execute(select(outcome, func.count()).group_by(outcome)).all())
+
+def contact_count(s) -> int:
+    return s.scalar(select(func.count()).select_from(Contact)) or 0
+
+def outreach_by_company(s, outcomes: Sequence[str] | None = None) -> List[tuple]:
+    """[(company, outcome, events)] via outreach_events -> job_postings; unknown jobs as "—"."""
+    company = func.coalesce(JobPosting.company, "—")
+    outcome = func.coalesce(OutreachEvent.outcome, "sent")
+    q = (select(company, outcome, func.count())
+         .select_from(OutreachEvent)
+         .outerjoin(JobPosting, JobPosting.id == OutreachEvent.job_id)
+         .group_by(company, outcome))
+    if outcomes is not None:
+        q = q.where(outcome.in_(list(outcomes)))
+    return [tuple(r) for r in s.execute(q).all()]
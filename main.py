@@ -1,15 +1,39 @@
 # main.py
+"""
+Score every ingested job, then generate artifacts for the top-N:
+
+    python main.py --top-n 5                 # live calls, concurrently
+    python main.py --top-n 300 --batch       # one Batch API job (cheaper, async), waits and ingests
+    python main.py --top-n 300 --batch --no-wait
+    python main.py --collect batch_abc123    # ingest a finished batch later
+"""
+import argparse, json, os, time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import yaml
 from pathlib import Path
 from dotenv import load_dotenv
-from db.models import init_db, Session, JobPosting, FitScore, Artifact
-from agents.scorer import fit_score
-from rag.store import SimpleStore
-from agents.composer import compose_artifacts
+from sqlalchemy import and_, select
+from db.models import init_db, session_scope, JobPosting, FitScore, Artifact, JobDuplicate, OPEN_STATUSES
+from db.queue import _latest
+from agents.scorer import fit_score_many, BATCH_SIZE
+from agents.rolefit import store_rolefit
+from rag.job_index import job_context
+from agents.composer import compose_artifacts, artifact_prompts, write_artifacts
+from agents.prep_agent import prep_prompts, PREP_FILE
+from agents.star_agent import star_prompts, STAR_FILE
+from agents.llm import usage_summary
+from agents.budget import savings_summary
+from agents.batch import request_line, write_jsonl, submit, wait, results
+from scripts.dedupe_jobs import mark_duplicates
 
 load_dotenv()
 init_db()
 
+CONCURRENCY = int(os.getenv("ARTIFACT_CONCURRENCY", "8"))       # LLM calls in flight
+JOB_TIMEOUT = float(os.getenv("ARTIFACT_JOB_TIMEOUT", "120"))   # seconds per job, retries included
+BATCH_DIR = Path("data/batch")
+BATCH_KINDS = ("artifacts", "prep", "star")
+
 def load_base_resume() -> str:
     return Path("data/base_resume.md").read_text()
 
@@ -17,8 +41,18 @@ def required_keywords():
     prof = yaml.safe_load(Path("data/profile.yaml").read_text())
     return prof.get("must_have_keywords", [])
 
-def main(top_n=2):
-    s = Session()
+def _out_dir(job) -> str:
+    return f"artifacts/{job.company}_{job.title}".replace(" ", "_")
+
+def main(top_n=2, batch_size=BATCH_SIZE, concurrency=CONCURRENCY, job_timeout=JOB_TIMEOUT,
+         batch=False, wait_for_batch=True, poll_interval=30.0):
+    with session_scope() as s:
+        run(s, top_n=top_n, batch_size=batch_size, concurrency=concurrency, job_timeout=job_timeout,
+            batch=batch, wait_for_batch=wait_for_batch, poll_interval=poll_interval)
+
+def run(s, top_n=2, batch_size=BATCH_SIZE, concurrency=CONCURRENCY, job_timeout=JOB_TIMEOUT,
+        batch=False, wait_for_batch=True, poll_interval=30.0):
+    """Score ingested jobs and generate artifacts for the top_n, in session s (committed as it goes)."""
     jobs = s.query(JobPosting).filter(JobPosting.status.in_(["ingested","scored"])).all()
     if not jobs:
         print("No jobs found. Run the seed script first.")
@@ -27,33 +61,189 @@ def main(top_n=2):
     base_resume = load_base_resume()
     req_kws = required_keywords()
 
-    # Score all jobs
-    for job in jobs:
-        sc = fit_score(job.jd_text, base_resume, req_kws)
+    # Score all jobs (resume encoded once, JDs in batches)
+    scores = fit_score_many([job.jd_text for job in jobs], base_resume, req_kws, batch_size=batch_size)
+    for job, sc in zip(jobs, scores):
         s.merge(FitScore(job_id=job.id,
                          total=sc["total"],
                          semantic=sc["semantic"],
                          keywords=sc["keywords"],
                          rationale=sc["rationale"]))
         job.status = "scored"
+    # RoleFit's only feature is this same JD/resume cosine: reuse it instead of re-embedding
+    store_rolefit(s, {job.id: sc["semantic"] for job, sc in zip(jobs, scores)}, base_resume)
+    dup = mark_duplicates(s)
     s.commit()
+    if dup["duplicates"]:
+        print(f"Skipping {dup['duplicates']} near-duplicate posting(s) in {dup['clusters']} cluster(s)")
 
-    # Take top-N and generate artifacts
-    top = s.query(FitScore).order_by(FitScore.total.desc()).limit(top_n).all()
-    for fs in top:
-        job = s.query(JobPosting).filter_by(id=fs.job_id).first()
-        store = SimpleStore()
-        store.add_texts([job.jd_text, f"{job.company} — {job.title}"])
-        ctx = store.search(f"{job.company} {job.title}", k=3)
+    # Take top-N by latest score (open, canonical postings only) and generate artifacts
+    fs, fs_rn = _latest(FitScore)
+    jobs = list(s.execute(
+        select(JobPosting)
+        .join(fs, and_(fs.job_id == JobPosting.id, fs_rn == 1))
+        .where(JobPosting.status.in_(OPEN_STATUSES), ~JobPosting.id.in_(select(JobDuplicate.job_id)))
+        .order_by(fs.total.desc()).limit(top_n)).scalars())
+    if batch:
+        # nightly runs only pick up jobs that have no artifacts yet and aren't waiting
+        # in a submitted batch that hasn't been --collect'ed
+        have = set(s.execute(select(Artifact.job_id).distinct()).scalars())
+        pending = pending_batch_jobs()
+        waiting = {pending[j.id] for j in jobs if j.id not in have and j.id in pending}
+        if waiting:
+            print(f"Skipping jobs already in uncollected batch(es) {', '.join(sorted(waiting))}; "
+                  f"ingest them with --collect")
+        jobs = [j for j in jobs if j.id not in have and j.id not in pending]
+        if not jobs:
+            print("Every top job already has artifacts or a pending batch; nothing to batch.")
+            return
+        batch_id = submit_batch(jobs, base_resume)
+        if wait_for_batch:
+            collect_batch(s, batch_id, poll_interval=poll_interval)
+        return
 
-        out_dir = f"artifacts/{job.company}_{job.title}".replace(" ", "_")
-        resume_p, cl_p, payload = compose_artifacts(job, base_resume, ctx, out_dir)
+    t0 = time.perf_counter()
+    done = generate_artifacts(jobs, base_resume, concurrency=concurrency, job_timeout=job_timeout)
+    for job, (resume_p, cl_p, payload) in done:
         s.add(Artifact(job_id=job.id,
                        resume_path=resume_p,
                        cover_letter_path=cl_p,
                        qa_json=payload))
         print(f"Generated: {resume_p} and {cl_p}")
     s.commit()
+    print(f"Artifacts: {len(done)}/{len(jobs)} jobs in {time.perf_counter() - t0:.1f}s")
+    for tag, u in usage_summary().items():
+        print(f"LLM {tag}: {u['calls']} calls ({u['failed']} failed), "
+              f"{u['input_tokens']}+{u['output_tokens']} tokens, mean {u['mean_latency_s']:.1f}s")
+    for agent, b in savings_summary().items():
+        print(f"Prompt budget {agent}: {b['trimmed']}/{b['calls']} prompts trimmed, "
+              f"{b['tokens_before']} -> {b['tokens_after']} JD+resume tokens ({b['saved']} saved)")
+
+def generate_artifacts(jobs, base_resume, concurrency=CONCURRENCY, job_timeout=JOB_TIMEOUT):
+    """
+    Compose artifacts for jobs with up to `concurrency` LLM calls in flight.
+    Retrieval runs here first (the FAISS index and embedder stay on this thread) and
+    only compose_artifacts goes to the pool; each job gets job_timeout seconds across
+    its retries (agents.llm backs off on 429s).
+    Returns [(job, (resume_path, cover_letter_path, payload))] for the jobs that
+    succeeded; failures are reported and skipped. Callers write to the DB.
+    A job listed twice is composed once: two workers would write the same out_dir.
+    """
+    work = []
+    for job in {job.id: job for job in jobs}.values():
+        ctx = job_context(job, f"{job.company} {job.title}", k=3)
+        work.append((job, ctx, _out_dir(job)))
+
+    done = []
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        futs = {pool.submit(compose_artifacts, job, base_resume, ctx, out_dir, timeout=job_timeout): job
+                for job, ctx, out_dir in work}
+        for fut in as_completed(futs):
+            job = futs[fut]
+            try:
+                done.append((job, fut.result()))
+            except Exception as e:
+                print(f"Failed {job.company} — {job.title}: {type(e).__name__}: {e}")
+    return done
+
+def submit_batch(jobs, base_resume, kinds=BATCH_KINDS) -> str:
+    """
+    Write composer/prep/STAR requests for jobs to data/batch/<stamp>.jsonl and submit
+    them as one batch (custom_id "<kind>:<job_id>"). Returns the batch id, which is
+    also saved next to the file.
+    """
+    lines = []
+    for job in jobs:
+        if "artifacts" in kinds:
+            ctx = job_context(job, f"{job.company} {job.title}", k=3)
+            lines.append(request_line(f"artifacts:{job.id}", *artifact_prompts(job, base_resume, ctx)))
+        if "prep" in kinds:
+            ctx = job_context(job, f"{job.company} {job.title} product news mission values", k=5)
+            lines.append(request_line(f"prep:{job.id}", *prep_prompts(job.company, job.title, job.jd_text, ctx)))
+        if "star" in kinds:
+            ctx = job_context(job, f"{job.company} {job.title} interview questions topics", k=5)
+            lines.append(request_line(f"star:{job.id}", *star_prompts(job.company, job.title, job.jd_text,
+                                                                      base_resume, ctx)))
+    path = write_jsonl(lines, BATCH_DIR / f"artifacts-{time.strftime('%Y%m%d-%H%M%S')}.jsonl")
+    batch_id = submit(path, metadata={"source": "main.py", "jobs": str(len(jobs))})
+    path.with_suffix(".batch").write_text(batch_id)
+    print(f"Submitted batch {batch_id}: {len(lines)} requests for {len(jobs)} jobs ({path})")
+    return batch_id
+
+def pending_batch_jobs() -> dict:
+    """
+    {job_id: batch_id} for submissions in BATCH_DIR not collected yet: a <stamp>.batch
+    file without a <stamp>.collected marker, its jobs read from the <stamp>.jsonl input.
+    """
+    pending = {}
+    for marker in sorted(BATCH_DIR.glob("*.batch")):
+        src = marker.with_suffix(".jsonl")
+        if marker.with_suffix(".collected").exists() or not src.exists():
+            continue
+        batch_id = marker.read_text().strip()
+        with open(src) as f:
+            for line in f:
+                if line.strip():
+                    pending[json.loads(line)["custom_id"].partition(":")[2]] = batch_id
+    return pending
+
+def _mark_collected(batch_id: str, status: str) -> None:
+    for marker in BATCH_DIR.glob("*.batch"):
+        if marker.read_text().strip() == batch_id:
+            marker.with_suffix(".collected").write_text(status)
+
+def collect_batch(s, batch_id: str, poll_interval: float = 30.0) -> dict:
+    """
+    Wait for a batch, then write its files and Artifact rows. Safe to re-run: an
+    artifacts result whose Artifact row (tagged with batch_id) exists is skipped,
+    and prep/STAR files are simply rewritten. The submission is then marked collected,
+    so later --batch runs may pick its jobs again if they still lack artifacts.
+    """
+    def show(b):
+        rc = b.request_counts
+        print(f"batch {b.id}: {b.status}" + (f" {rc.completed}/{rc.total} done, {rc.failed} failed" if rc else ""))
+
+    b = wait(batch_id, interval=poll_interval, on_poll=show)
+    if b.status != "completed":
+        print(f"Batch {batch_id} ended as {b.status}; ingesting whatever output it has.")
+    done = set(s.execute(select(Artifact.job_id)
+                         .where(Artifact.qa_json["batch_id"].as_string() == batch_id)).scalars())
+    st = {"artifacts": 0, "prep": 0, "star": 0, "skipped": 0, "failed": 0}
+    for cid, (text, err) in results(b).items():
+        kind, _, job_id = cid.partition(":")
+        job = s.get(JobPosting, job_id)
+        if err or job is None or kind not in st:
+            st["failed"] += 1
+            print(f"Failed {cid}: {err or 'unknown job'}")
+            continue
+        out_dir = _out_dir(job)
+        if kind == "artifacts":
+            if job_id in done:
+                st["skipped"] += 1
+                continue
+            resume_p, cl_p, payload = write_artifacts(out_dir, text)
+            payload["batch_id"] = batch_id
+            s.add(Artifact(job_id=job.id, resume_path=resume_p, cover_letter_path=cl_p, qa_json=payload))
+            done.add(job_id)
+        else:
+            Path(out_dir).mkdir(parents=True, exist_ok=True)
+            (Path(out_dir) / (PREP_FILE if kind == "prep" else STAR_FILE)).write_text(text.strip())
+        st[kind] += 1
+    s.commit()
+    _mark_collected(batch_id, b.status)
+    print(f"Ingested batch {batch_id}: " + " ".join(f"{k}={v}" for k, v in st.items()))
+    return st
 
 if __name__ == "__main__":
-    main()
+    ap = argparse.ArgumentParser(description="Score ingested jobs and generate artifacts for the best ones.")
+    ap.add_argument("--top-n", type=int, default=2)
+    ap.add_argument("--batch", action="store_true", help="Submit composer/prep/STAR requests as one Batch API job.")
+    ap.add_argument("--no-wait", action="store_true", help="With --batch: submit and exit; ingest later with --collect.")
+    ap.add_argument("--collect", metavar="BATCH_ID", help="Wait for a submitted batch and ingest its results.")
+    ap.add_argument("--poll-interval", type=float, default=30.0)
+    args = ap.parse_args()
+    if args.collect:
+        with session_scope() as s:
+            collect_batch(s, args.collect, poll_interval=args.poll_interval)
+    else:
+        main(top_n=args.top_n, batch=args.batch, wait_for_batch=not args.no_wait, poll_interval=args.poll_interval)
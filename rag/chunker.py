@@ -0,0 +1,128 @@
+# rag/chunker.py
+"""
+Section-aware JD chunker for retrieval.
+
+all-MiniLM-L6-v2 only reads the first 256 word pieces of its input, so embedding
+a whole JD throws most of it away. chunk_jd() works on the plain text that
+utils.html_text.html_to_text produces (one line per block, "• " bullets):
+
+  1. split it into sections at heading-like lines ("Responsibilities",
+     "What you'll do", "Who you are:" ...) and label each one
+     (about / responsibilities / requirements / preferred / benefits / other),
+  2. break each section into items (bullets, or lines),
+  3. pack consecutive items into chunks of at most max_tokens, repeating the last
+     `overlap` items of a chunk at the start of the next, and prefixing every chunk
+     with its heading so a lone bullet still says what it is.
+"""
+from __future__ import annotations
+import re
+from typing import Dict, List, Optional
+
+MAX_TOKENS = 200   # leaves headroom under MiniLM's 256 word pieces
+OVERLAP = 1        # items repeated between consecutive chunks of a section
+
+# first match wins, so the more specific labels come first
+SECTION_PATTERNS = [
+    ("preferred", r"nice to have|preferred|bonus|plus if|extra credit"),
+    ("benefits", r"benefit|perks|what we offer|compensation|salary|pay range|total rewards"),
+    ("requirements", r"requirement|qualification|looking for|who you are|you have|you bring|must have|skills"),
+    ("responsibilities", r"responsib|you('|’)?ll do|you will|work on|day[- ]to[- ]day|duties|will:|in this role|the role will"),
+    ("about", r"about|who we are|our team|the team|our mission|overview|the role"),
+]
+_SECTION_RX = [(name, re.compile(rx, re.I)) for name, rx in SECTION_PATTERNS]
+_TOKEN_RX = re.compile(r"\w+|[^\w\s]")
+BULLET = "•"
+
+def count_tokens(text: str) -> int:
+    """Cheap stand-in for the word-piece count: words + punctuation marks."""
+    return len(_TOKEN_RX.findall(text))
+
+def section_label(heading: Optional[str]) -> str:
+    if not heading:
+        return "about"
+    for name, rx in _SECTION_RX:
+        if rx.search(heading):
+            return name
+    return "other"
+
+def _is_heading(line: str) -> bool:
+    if line.startswith(BULLET) or len(line) > 80:
+        return False
+    if line.endswith(":"):
+        return True
+    # short, not a sentence, no figures, and names a known section ("Benefits", "What you'll do")
+    return (len(line.split()) <= 8 and not line.endswith((".", "!", "?"))
+            and not any(c.isdigit() for c in line) and section_label(line) != "other")
+
+def _items(line: str) -> List[str]:
+    """A line can hold several bullets when the source HTML left <li> unclosed."""
+    if BULLET not in line:
+        return [line]
+    parts = [p.strip() for p in line.split(BULLET)]
+    lead = [parts[0]] if parts[0] else []
+    return lead + [f"{BULLET} {p}" for p in parts[1:] if p]
+
+def _split_long(item: str, max_tokens: int) -> List[str]:
+    """Break one oversized item at sentence ends, then hard-wrap by words."""
+    out, cur = [], []
+    for sent in re.split(r"(?<=[.;!?])\s+", item):
+        words = sent.split()
+        while words:
+            room = max_tokens - count_tokens(" ".join(cur))
+            take, n = [], 0
+            for w in words:
+                t = count_tokens(w)
+                if n + t > room and (take or cur):
+                    break
+                take.append(w); n += t
+            cur.extend(take); words = words[len(take):]
+            if words:
+                out.append(" ".join(cur)); cur = []
+    if cur:
+        out.append(" ".join(cur))
+    return out
+
+def split_sections(text: str) -> List[Dict]:
+    """[{"section", "heading", "items"}] in document order; leading text has no heading."""
+    sections: List[Dict] = []
+    cur: Dict = {"section": "about", "heading": None, "items": []}
+    for raw in (text or "").splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+        for item in _items(line):
+            # the heading can share a line with the first bullet ("You will:• Design ...")
+            if _is_heading(item):
+                if cur["items"]:
+                    sections.append(cur)
+                cur = {"section": section_label(item), "heading": item.rstrip(":").strip(), "items": []}
+            else:
+                cur["items"].append(item)
+    if cur["items"]:
+        sections.append(cur)
+    return [s for s in sections if s["items"]]
+
+def chunk_jd(text: str, max_tokens: int = MAX_TOKENS, overlap: int = OVERLAP) -> List[Dict]:
+    """
+    Overlapping, heading-prefixed chunks of a plain-text JD:
+    [{"section", "heading", "text"}], each at most ~max_tokens.
+    """
+    chunks: List[Dict] = []
+    for sec in split_sections(text):
+        head = f"{sec['heading']}:" if sec["heading"] else ""
+        budget = max(16, max_tokens - count_tokens(head))
+        items = [piece for it in sec["items"] for piece in
+                 (_split_long(it, budget) if count_tokens(it) > budget else [it])]
+
+        start = 0
+        while start < len(items):
+            end, used = start, 0
+            while end < len(items) and (end == start or used + count_tokens(items[end]) <= budget):
+                used += count_tokens(items[end]); end += 1
+            body = "\n".join(items[start:end])
+            chunks.append({"section": sec["section"], "heading": sec["heading"],
+                           "text": f"{head}\n{body}" if head else body})
+            if end >= len(items):
+                break
+            start = max(start + 1, end - overlap)  # always make progress
+    return chunks
@@ -0,0 +1,130 @@
+# rag/embed_cache.py
+"""
+Content-addressed embedding cache shared by the scorer, RoleFit, the RAG store and
+the trainer.
+
+Vectors live in one SQLite table (data/cache/embeddings.sqlite3):
+    key = sha1(model name, normalize flag, text) -> float32 blob
+so a JD or resume is embedded once for its lifetime, across runs and Streamlit
+reruns. Each row carries a last_used stamp; once the table grows past max_rows
+the least recently used rows are evicted.
+
+    vecs = encode_cached(model, "all-MiniLM-L6-v2", texts)   # (n, dim) float32
+"""
+from __future__ import annotations
+import hashlib, os, sqlite3, threading, time
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+CACHE_PATH = Path(os.getenv("EMBED_CACHE_PATH", "data/cache/embeddings.sqlite3"))
+MAX_ROWS = int(os.getenv("EMBED_CACHE_MAX_ROWS", "200000"))
+
+def _key(model_name: str, text: str, normalize: bool) -> str:
+    h = hashlib.sha1()
+    for part in (model_name, "1" if normalize else "0", text):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+class EmbedCache:
+    def __init__(self, path: str | Path = CACHE_PATH, max_rows: int = MAX_ROWS):
+        self.path = Path(path)
+        self.max_rows = max_rows
+        self._lock = threading.Lock()  # one connection, shared by Streamlit's script threads
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""CREATE TABLE IF NOT EXISTS embeddings (
+                                key TEXT PRIMARY KEY, dim INTEGER NOT NULL,
+                                vec BLOB NOT NULL, last_used REAL NOT NULL)""")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_embeddings_last_used ON embeddings(last_used)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        found: Dict[str, np.ndarray] = {}
+        if not keys:
+            return found
+        uniq = list(dict.fromkeys(keys))
+        with self._lock:
+            db = self._db()
+            for i in range(0, len(uniq), 500):  # stay under SQLite's bound-parameter limit
+                part = uniq[i:i + 500]
+                marks = ",".join("?" * len(part))
+                for key, dim, blob in db.execute(
+                        f"SELECT key, dim, vec FROM embeddings WHERE key IN ({marks})", part):
+                    found[key] = np.frombuffer(blob, dtype=np.float32, count=dim)
+            if found:
+                now = time.time()
+                db.executemany("UPDATE embeddings SET last_used=? WHERE key=?",
+                               [(now, k) for k in found])
+                db.commit()
+        return found
+
+    def put_many(self, items: Dict[str, np.ndarray]) -> None:
+        if not items:
+            return
+        now = time.time()
+        rows = [(k, int(v.shape[0]), np.ascontiguousarray(v, dtype=np.float32).tobytes(), now)
+                for k, v in items.items()]
+        with self._lock:
+            db = self._db()
+            db.executemany("INSERT OR REPLACE INTO embeddings(key, dim, vec, last_used) VALUES (?,?,?,?)", rows)
+            self._evict(db)
+            db.commit()
+
+    def _evict(self, db: sqlite3.Connection) -> None:
+        (n,) = db.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        if n > self.max_rows:
+            # trim to 90% so we don't evict on every insert once full
+            drop = n - int(self.max_rows * 0.9)
+            db.execute("""DELETE FROM embeddings WHERE key IN (
+                              SELECT key FROM embeddings ORDER BY last_used LIMIT ?)""", (drop,))
+
+    def clear(self) -> None:
+        with self._lock:
+            db = self._db()
+            db.execute("DELETE FROM embeddings")
+            db.commit()
+
+_default: Optional[EmbedCache] = None
+_default_lock = threading.Lock()
+
+def default_cache() -> EmbedCache:
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = EmbedCache()
+        return _default
+
+def encode_cached(model, model_name: str, texts: Sequence[str], normalize: bool = True,
+                  batch_size: int = 32, cache: EmbedCache | None = None) -> np.ndarray:
+    """
+    model.encode(texts) through the cache: returns an (n, dim) float32 array in input
+    order, encoding only the texts (deduplicated) that were never seen with this model.
+    """
+    texts = [t or "" for t in texts]
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+    cache = cache or default_cache()
+    keys = [_key(model_name, t, normalize) for t in texts]
+    found = cache.get_many(keys)
+
+    missing: Dict[str, str] = {}
+    for k, t in zip(keys, texts):
+        if k not in found:
+            missing.setdefault(k, t)
+    if missing:
+        vecs = model.encode(list(missing.values()), batch_size=batch_size,
+                            convert_to_numpy=True, normalize_embeddings=normalize)
+        fresh = {k: np.asarray(v, dtype=np.float32) for k, v in zip(missing, vecs)}
+        cache.put_many(fresh)
+        found.update(fresh)
+    return np.vstack([found[k] for k in keys])
@@ -0,0 +1,62 @@
+# rag/embedder.py
+"""
+Process-wide SentenceTransformer registry.
+
+Every module gets its encoder from here instead of constructing its own, so a model
+is loaded at most once per process, on first use rather than at import time. Hub
+aliases are canonicalized ("sentence-transformers/all-MiniLM-L6-v2" and
+"all-MiniLM-L6-v2" are the same model, same instance, same cache keys).
+
+    from rag.embedder import encode
+    vecs = encode(["some JD", "resume"])        # (2, 384) float32, normalized, cached
+"""
+from __future__ import annotations
+import threading
+from typing import Dict, Sequence
+
+import numpy as np
+
+from rag.embed_cache import encode_cached
+
+DEFAULT_MODEL = "all-MiniLM-L6-v2"
+_HUB_PREFIX = "sentence-transformers/"
+
+_models: Dict[str, object] = {}
+_lock = threading.Lock()
+
+def canonical_name(name: str | None = None) -> str:
+    name = (name or DEFAULT_MODEL).strip()
+    return name[len(_HUB_PREFIX):] if name.startswith(_HUB_PREFIX) else name
+
+def get_model(name: str | None = None):
+    """The shared SentenceTransformer for name, loaded on first call (thread-safe)."""
+    key = canonical_name(name)
+    model = _models.get(key)
+    if model is None:
+        with _lock:
+            model = _models.get(key)
+            if model is None:  # another thread may have loaded it while we waited
+                from sentence_transformers import SentenceTransformer  # heavy: torch import
+                model = SentenceTransformer(key)
+                _models[key] = model
+    return model
+
+def loaded_models() -> list[str]:
+    return list(_models)
+
+class _LazyModel:
+    """Stand-in passed to encode_cached so the model is only loaded on a cache miss."""
+    def __init__(self, name: str):
+        self.name = name
+
+    def encode(self, *args, **kwargs):
+        return get_model(self.name).encode(*args, **kwargs)
+
+def encode(texts: Sequence[str], model_name: str | None = None, normalize: bool = True,
+           batch_size: int = 32) -> np.ndarray:
+    """Embed texts with the shared model, through the persistent embedding cache."""
+    key = canonical_name(model_name)
+    texts = list(texts)
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+    return encode_cached(_LazyModel(key), key, texts, normalize=normalize, batch_size=batch_size)
@@ -0,0 +1,298 @@
+# rag/job_index.py
+"""
+Persistent vector index over every ingested JD (and any company notes).
+
+Files under data/index/ (JOB_INDEX_DIR):
+  jobs.faiss      IndexIDMap2 over normalized chunk embeddings; the inner index is
+                  flat by default, or IVF-Flat / HNSW / IVF-PQ via JOB_INDEX_MODE
+                  (see rag.store). IVF modes start flat and are retrained into the
+                  requested mode once the corpus is big enough.
+  meta.sqlite3    docs(id, job_id, company, kind, section, text); id is the FAISS id
+
+Each JD is stored as a "Company — Title" header plus the overlapping, section-aware
+chunks from rag.chunker (kind="jd", section=responsibilities/requirements/...), so
+every part of a long JD is searchable and hits map back to their job.
+
+Readers memory-map jobs.faiss (faiss.IO_FLAG_MMAP, falling back to a normal read),
+so opening it is cheap and pages are shared between processes. Writers reload it
+into memory, add/replace a job's chunks, and write it back atomically. Searches can
+be restricted to a job_id, company, kind and/or section via an IDSelectorBatch built from the
+metadata table; small filtered sets (one job's chunks) are scored exactly instead,
+since graph/bucket search degrades badly under very selective filters.
+
+If jobs.faiss and meta.sqlite3 ever disagree (a crash between the two writes, or
+two writers), the index is rebuilt from the metadata texts on load; the embedding
+cache makes that cheap.
+
+    python -m rag.job_index --backfill              # index every job in the DB
+    python -m rag.job_index --reindex               # re-chunk every indexed job (chunker change)
+    python -m rag.job_index --note Acme "Acme ships developer tools; values: ..."
+"""
+from __future__ import annotations
+import argparse, os, sqlite3, sys, threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import faiss
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from rag.chunker import chunk_jd
+from rag.embedder import encode, canonical_name
+from rag.store import build_index, index_mode, min_train_points, search_params
+
+INDEX_DIR = Path(os.getenv("JOB_INDEX_DIR", "data/index"))
+MODEL_NAME = "all-MiniLM-L6-v2"
+INDEX_MODE = os.getenv("JOB_INDEX_MODE", "flat")
+EXACT_MAX = 4096   # filtered searches over at most this many chunks skip the ANN index
+
+class JobIndex:
+    def __init__(self, root: str | Path = INDEX_DIR, model_name: str = MODEL_NAME,
+                 mode: str = INDEX_MODE):
+        self.root = Path(root)
+        self.model_name = canonical_name(model_name)
+        self.mode = mode
+        self.index_path = self.root / "jobs.faiss"
+        self._lock = threading.RLock()
+        self._index = None
+        self._mmapped = False
+        self._mtime = None
+        self._meta: Optional[sqlite3.Connection] = None
+
+    # --- storage ---
+    def _db(self) -> sqlite3.Connection:
+        if self._meta is None:
+            self.root.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(self.root / "meta.sqlite3"), check_same_thread=False, timeout=30)
+            db.execute("""CREATE TABLE IF NOT EXISTS docs (
+                              id INTEGER PRIMARY KEY AUTOINCREMENT, job_id TEXT, company TEXT,
+                              kind TEXT NOT NULL, section TEXT, text TEXT NOT NULL)""")
+            if "section" not in {r[1] for r in db.execute("PRAGMA table_info(docs)")}:
+                db.execute("ALTER TABLE docs ADD COLUMN section TEXT")  # indexes built before chunking
+            db.execute("CREATE INDEX IF NOT EXISTS ix_docs_job ON docs(job_id)")
+            db.execute("CREATE INDEX IF NOT EXISTS ix_docs_company ON docs(company)")
+            db.commit()
+            self._meta = db
+        return self._meta
+
+    def _read(self, writable: bool):
+        if writable:
+            return faiss.read_index(str(self.index_path)), False
+        try:
+            return faiss.read_index(str(self.index_path), faiss.IO_FLAG_MMAP), True
+        except RuntimeError:
+            return faiss.read_index(str(self.index_path)), False  # index type without mmap support
+
+    def _load(self, writable: bool = False):
+        with self._lock:
+            mtime = self.index_path.stat().st_mtime_ns if self.index_path.exists() else None
+            if (self._index is not None and mtime == self._mtime
+                    and (not self._mmapped or not writable)):
+                return self._index  # still current (another process may have rewritten the file)
+            (n_docs,) = self._db().execute("SELECT COUNT(*) FROM docs").fetchone()
+            if self.index_path.exists():
+                self._index, self._mmapped = self._read(writable)
+                self._mtime = mtime
+                if self._index.ntotal != n_docs:
+                    self._rebuild()
+            elif n_docs:
+                self._rebuild()
+            else:
+                self._index = None
+            return self._index
+
+    def _rebuild(self):
+        rows = self._db().execute("SELECT id, text FROM docs ORDER BY id").fetchall()
+        self._index, self._mmapped = None, False
+        if rows:
+            ids = np.array([r[0] for r in rows], dtype="int64")
+            self._add_vectors(ids, encode([r[1] for r in rows], self.model_name))
+        self._write()
+
+    def _add_vectors(self, ids: np.ndarray, X: np.ndarray):
+        X = np.ascontiguousarray(X, dtype="float32")
+        if self._index is None:
+            self._index = faiss.IndexIDMap2(build_index(self.mode, X))  # trained on this batch
+        self._index.add_with_ids(X, ids)
+
+    def _needs_rebuild(self, removed: bool, n: int) -> bool:
+        """n: vectors the index will hold after this write."""
+        if self._index is None:
+            return False
+        current = index_mode(self._index)
+        if removed and current == "hnsw":
+            return True  # HNSW graphs don't support remove_ids
+        # an IVF mode that fell back to flat while the corpus was small: retrain once it's big enough
+        return current == "flat" != self.mode and n >= min_train_points(self.mode)
+
+    def _write(self):
+        if self._index is None:
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_path.with_suffix(f".{os.getpid()}.tmp")
+        faiss.write_index(self._index, str(tmp))
+        os.replace(tmp, self.index_path)
+        self._mtime = self.index_path.stat().st_mtime_ns
+
+    # --- writes ---
+    def _replace_docs(self, docs: Sequence[tuple], drop_job_ids: Iterable[str] = ()) -> int:
+        """docs: (job_id, company, kind, section, text). Drops old chunks of drop_job_ids first."""
+        with self._lock:
+            self._load(writable=True)
+            db = self._db()
+            try:
+                drop = list(drop_job_ids)
+                old = [r[0] for jid in drop for r in db.execute("SELECT id FROM docs WHERE job_id=?", (jid,))]
+                hnsw = self._index is not None and index_mode(self._index) == "hnsw"
+                if old and self._index is not None and not hnsw:
+                    self._index.remove_ids(faiss.IDSelectorBatch(np.array(old, dtype="int64")))
+                db.executemany("DELETE FROM docs WHERE id=?", [(i,) for i in old])
+                ids = [db.execute("INSERT INTO docs(job_id, company, kind, section, text) VALUES (?,?,?,?,?)",
+                                  d).lastrowid for d in docs]
+                n_after = (self._index.ntotal if self._index is not None else 0) + len(ids) - (len(old) if hnsw else 0)
+                if self._needs_rebuild(removed=bool(old), n=n_after):
+                    self._rebuild()  # reads this connection's uncommitted rows
+                else:
+                    if ids:
+                        self._add_vectors(np.array(ids, dtype="int64"), encode([d[4] for d in docs], self.model_name))
+                    self._write()
+                db.commit()
+            except Exception:
+                db.rollback()
+                self._index = self._mtime = None  # in-memory index may be ahead of meta: reload
+                raise
+            return len(ids)
+
+    def add_jobs(self, jobs: Iterable) -> int:
+        """
+        Index (or re-index) JobPosting-like objects/dicts; returns chunks written.
+        All chunks of all jobs are embedded in one batched call.
+        """
+        docs, job_ids = [], []
+        for j in jobs:
+            get = j.get if isinstance(j, dict) else lambda k, _j=j: getattr(_j, k, None)
+            jid, company, title = get("id"), get("company") or "", get("title") or ""
+            job_ids.append(jid)
+            docs.append((jid, company, "header", None, f"{company} — {title}"))
+            docs.extend((jid, company, "jd", c["section"], c["text"]) for c in chunk_jd(get("jd_text") or ""))
+        return self._replace_docs(docs, drop_job_ids=job_ids) if job_ids else 0
+
+    def add_note(self, company: str, text: str) -> int:
+        return self._replace_docs([(None, company, "note", c["section"], c["text"]) for c in chunk_jd(text)])
+
+    def remove_jobs(self, job_ids: Iterable[str]) -> None:
+        self._replace_docs([], drop_job_ids=job_ids)
+
+    # --- reads ---
+    def indexed_job_ids(self, job_ids: Sequence[str] | None = None) -> set:
+        db = self._db()
+        if job_ids is None:
+            return {r[0] for r in db.execute("SELECT DISTINCT job_id FROM docs WHERE job_id IS NOT NULL")}
+        found = set()
+        for i in range(0, len(job_ids), 500):
+            part = list(job_ids[i:i + 500])
+            found.update(r[0] for r in db.execute(
+                f"SELECT DISTINCT job_id FROM docs WHERE job_id IN ({','.join('?' * len(part))})", part))
+        return found
+
+    def search(self, query: str, k: int = 5, job_id: str | None = None, company: str | None = None,
+               kind: str | None = None, section: str | None = None) -> List[Dict]:
+        """Top-k chunks for query, optionally restricted by job_id / company / kind / section (ANDed)."""
+        index = self._load()
+        if index is None or index.ntotal == 0:
+            return []
+        q = encode([query], self.model_name)
+        sel = None
+        where = [(c, v) for c, v in (("job_id", job_id), ("company", company), ("kind", kind),
+                                     ("section", section)) if v is not None]
+        if where:
+            sql = "SELECT id, text FROM docs WHERE " + " AND ".join(f"{c}=?" for c, _ in where)
+            rows = self._db().execute(sql, [v for _, v in where]).fetchall()
+            if not rows:
+                return []
+            if len(rows) <= EXACT_MAX:
+                # exact cosine over the subset; vectors come straight from the embedding cache
+                scores = encode([r[1] for r in rows], self.model_name) @ q[0]
+                top = np.argsort(-scores)[:k]
+                return self._hits([(rows[i][0], float(scores[i])) for i in top])
+            sel = faiss.IDSelectorBatch(np.array([r[0] for r in rows], dtype="int64"))
+        # keep sel referenced until the search returns: the params object doesn't own it
+        D, I = index.search(q, k, params=search_params(index, sel=sel))
+        return self._hits([(int(i), float(d)) for i, d in zip(I[0], D[0]) if i >= 0])
+
+    def _hits(self, hits: List[tuple]) -> List[Dict]:
+        if not hits:
+            return []
+        meta = {r[0]: r[1:] for r in self._db().execute(
+            f"SELECT id, job_id, company, kind, section, text FROM docs WHERE id IN ({','.join('?' * len(hits))})",
+            [i for i, _ in hits])}
+        return [dict(zip(("job_id", "company", "kind", "section", "text"), meta[i]), score=d)
+                for i, d in hits if i in meta]
+
+_shared: Optional[JobIndex] = None
+_shared_lock = threading.Lock()
+
+def shared_index() -> JobIndex:
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = JobIndex()
+        return _shared
+
+def job_context(job, query: str, k: int = 3, index: JobIndex | None = None) -> List[str]:
+    """
+    RAG snippets for one job: its most relevant JD passages plus any notes on its
+    company, best first. Jobs ingested before the index existed are indexed on first use.
+    """
+    index = index or shared_index()
+    if job.id not in index.indexed_job_ids([job.id]):
+        index.add_jobs([job])
+    hits = index.search(query, k, job_id=job.id)
+    hits += index.search(query, k, company=job.company, kind="note")
+    return [h["text"] for h in sorted(hits, key=lambda h: -h["score"])[:k]]
+
+def index_postings(s, urls: Iterable[str], index: JobIndex | None = None) -> int:
+    """
+    Incremental update after ingest: (re)index the JobPostings behind these urls.
+    Returns chunks written; 0 (with a warning) when sentence-transformers isn't installed,
+    so ingestion never fails on the index.
+    """
+    from db.models import JobPosting
+    try:
+        import sentence_transformers  # noqa: F401
+    except ImportError:
+        print("[job_index] sentence-transformers not installed; skipping index update "
+              "(run `python -m rag.job_index --backfill` later)")
+        return 0
+    urls = [u for u in urls if u]
+    jobs = []
+    for i in range(0, len(urls), 500):
+        jobs += s.query(JobPosting).filter(JobPosting.url.in_(urls[i:i + 500])).all()
+    return (index or shared_index()).add_jobs(jobs) if jobs else 0
+
+def main():
+    ap = argparse.ArgumentParser(description="Maintain the persistent JD/company-notes vector index.")
+    ap.add_argument("--backfill", action="store_true", help="Index every job not yet in the index.")
+    ap.add_argument("--reindex", action="store_true", help="Re-chunk and re-embed every indexed job.")
+    ap.add_argument("--rebuild", action="store_true", help="Rebuild jobs.faiss from the metadata store.")
+    ap.add_argument("--note", nargs=2, metavar=("COMPANY", "TEXT"), help="Add a company note.")
+    args = ap.parse_args()
+
+    idx = shared_index()
+    if args.rebuild:
+        with idx._lock:
+            idx._rebuild()
+        print(f"Rebuilt {idx.index_path}")
+    if args.backfill or args.reindex:
+        from db.models import session_scope, JobPosting
+        done = set() if args.reindex else idx.indexed_job_ids()
+        with session_scope(commit=False) as s:
+            todo = [j for j in s.query(JobPosting).all() if j.id not in done]
+        for i in range(0, len(todo), 256):
+            idx.add_jobs(todo[i:i + 256])
+        print(f"Indexed {len(todo)} jobs ({len(done)} already present)")
+    if args.note:
+        print(f"Added {idx.add_note(*args.note)} note chunks for {args.note[0]}")
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,129 @@
 # rag/store.py
-from sentence_transformers import SentenceTransformer
+"""
+FAISS index construction shared by SimpleStore and rag.job_index.
+
+Index modes (all inner product over normalized embeddings, i.e. cosine):
+  flat      IndexFlatIP: exhaustive scan, exact, no training
+  ivf_flat  IVF{nlist},Flat: k-means buckets, scans nprobe of them
+  hnsw      HNSW{M},Flat: graph search, tuned with efSearch, no training
+  ivf_pq    IVF{nlist},PQ{m}x{bits}: IVF over product-quantized codes (smallest)
+
+IVF modes are trained on the vectors passed to build_index (a sample is enough).
+When there are too few of them for k-means to be meaningful the index silently
+falls back to flat, so small corpora behave exactly as before.
+"""
+from __future__ import annotations
+import math, os
 import faiss
 import numpy as np
+from rag.embedder import encode
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+
+INDEX_MODES = ("flat", "ivf_flat", "hnsw", "ivf_pq")
+NPROBE = int(os.getenv("FAISS_NPROBE", "16"))
+EF_SEARCH = int(os.getenv("FAISS_EF_SEARCH", "64"))
+HNSW_M = 32
+PQ_BITS = 8
+TRAIN_SAMPLE = 100_000   # k-means doesn't improve much past this
+MIN_NLIST = 16           # fewer buckets than this isn't worth the IVF overhead
+PTS_PER_CENTROID = 39    # faiss warns below this many training points per centroid
+
+def default_nlist(n: int) -> int:
+    # ~4*sqrt(n) buckets, the usual starting point, capped by what n points can train
+    return max(1, min(65536, int(4 * math.sqrt(max(n, 1))), n // PTS_PER_CENTROID))
+
+def min_train_points(mode: str, pq_bits: int = PQ_BITS) -> int:
+    """Fewest training vectors for mode to be built as requested rather than as flat."""
+    if mode == "ivf_flat":
+        return PTS_PER_CENTROID * MIN_NLIST
+    if mode == "ivf_pq":
+        return PTS_PER_CENTROID * max(MIN_NLIST, 2 ** pq_bits)
+    return 0
+
+def index_spec(mode: str, n: int, dim: int, nlist: int | None = None, hnsw_m: int = HNSW_M,
+               pq_m: int | None = None, pq_bits: int = PQ_BITS) -> str:
+    """faiss.index_factory string for mode given n training vectors ('Flat' if n is too small)."""
+    if mode not in INDEX_MODES:
+        raise ValueError(f"unknown index mode {mode!r}; expected one of {', '.join(INDEX_MODES)}")
+    if mode == "hnsw":
+        return f"HNSW{hnsw_m},Flat"
+    if mode == "flat":
+        return "Flat"
+    if n < min_train_points(mode, pq_bits):
+        return "Flat"
+    nlist = nlist or default_nlist(n)
+    if mode == "ivf_flat":
+        return f"IVF{nlist},Flat"
+    # PQ sub-quantizers must divide dim; 8 dims per code byte is a good default
+    pq_m = pq_m or max(1, dim // 8)
+    while dim % pq_m:
+        pq_m -= 1
+    return f"IVF{nlist},PQ{pq_m}x{pq_bits}"
+
+def build_index(mode: str, X: np.ndarray, **spec_kw) -> faiss.Index:
+    """Empty index of the requested mode, trained on (a sample of) X when it needs training."""
+    n, dim = X.shape
+    index = faiss.index_factory(dim, index_spec(mode, n, dim, **spec_kw), faiss.METRIC_INNER_PRODUCT)
+    if not index.is_trained:
+        sample = X
+        if n > TRAIN_SAMPLE:
+            sample = X[np.random.default_rng(0).choice(n, TRAIN_SAMPLE, replace=False)]
+        index.train(np.ascontiguousarray(sample, dtype="float32"))
+    if isinstance(faiss.downcast_index(index), faiss.IndexHNSW):
+        faiss.downcast_index(index).hnsw.efSearch = EF_SEARCH
+    return index
+
+def base_index(index: faiss.Index) -> faiss.Index:
+    """The real index under IndexIDMap/IndexIDMap2 wrappers."""
+    index = faiss.downcast_index(index)
+    while isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        index = faiss.downcast_index(index.index)
+    return index
+
+def index_mode(index: faiss.Index) -> str:
+    inner = base_index(index)
+    if isinstance(inner, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(inner, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(inner, faiss.IndexIVF):
+        return "ivf_flat"
+    return "flat"
+
+def search_params(index: faiss.Index, sel=None, nprobe: int | None = None,
+                  ef_search: int | None = None):
+    """SearchParameters of the type the index expects (IVF/HNSW reject the generic one)."""
+    inner = base_index(index)
+    if isinstance(inner, faiss.IndexIVF):
+        return faiss.SearchParametersIVF(sel=sel, nprobe=nprobe or NPROBE)
+    if isinstance(inner, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(sel=sel, efSearch=ef_search or EF_SEARCH)
+    return faiss.SearchParameters(sel=sel) if sel is not None else None
 
 class SimpleStore:
-    def __init__(self):
-        self.model = SentenceTransformer("all-MiniLM-L6-v2")
+    def __init__(self, model_name: str = MODEL_NAME, mode: str = "flat",
+                 nprobe: int | None = None, ef_search: int | None = None, **index_kw):
+        """
+        mode: one of INDEX_MODES. IVF modes are trained on the first add_texts() batch
+        (falling back to flat if it is too small), so add the bulk of the corpus first.
+        """
+        self.model_name = model_name  # shared, lazily loaded via rag.embedder
+        self.mode, self.nprobe, self.ef_search, self.index_kw = mode, nprobe, ef_search, index_kw
         self.index = None
         self.texts = []
 
     def add_texts(self, texts):
         if not texts: return
         self.texts.extend(texts)
-        X = self.model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+        X = encode(texts, self.model_name)
         if self.index is None:
-            self.index = faiss.IndexFlatIP(X.shape[1])
+            self.index = build_index(self.mode, X, **self.index_kw)
         self.index.add(X)
 
     def search(self, query, k=5):
         if self.index is None: return []
-        q = self.model.encode([query], convert_to_numpy=True, normalize_embeddings=True)
-        D, I = self.index.search(q, k)
-        return [self.texts[i] for i in I[0] if i < len(self.texts)]
+        q = encode([query], self.model_name)
+        params = search_params(self.index, nprobe=self.nprobe, ef_search=self.ef_search)
+        D, I = self.index.search(q, k, params=params)
+        return [self.texts[i] for i in I[0] if 0 <= i < len(self.texts)]
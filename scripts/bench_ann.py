@@ -0,0 +1,84 @@
+# scripts/bench_ann.py
+"""
+Recall-vs-latency benchmark of the rag.store index modes against exact flat search.
+
+By default it uses clustered synthetic unit vectors (384-d, like all-MiniLM-L6-v2);
+--from-job-index uses the real chunk vectors in data/index/jobs.faiss instead.
+For every mode and search setting it reports recall@k against IndexFlatIP, mean
+query latency, build time and serialized size.
+
+    python -m scripts.bench_ann --n 200000 --queries 1000
+    python -m scripts.bench_ann --from-job-index --modes ivf_flat hnsw
+"""
+from __future__ import annotations
+import argparse, sys, time
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from rag.store import INDEX_MODES, build_index, index_mode, search_params
+
+SWEEP = {"flat": [None], "ivf_flat": [1, 4, 16, 64], "ivf_pq": [1, 4, 16, 64], "hnsw": [16, 32, 64, 128]}
+
+def synthetic(n: int, dim: int, clusters: int = 256, seed: int = 0) -> np.ndarray:
+    """Unit vectors around random centers: closer to real embeddings than uniform noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype("float32")
+    X = centers[rng.integers(0, clusters, n)] + 0.6 * rng.standard_normal((n, dim)).astype("float32")
+    faiss.normalize_L2(X)
+    return X
+
+def job_index_vectors(path: Path) -> np.ndarray:
+    index = faiss.read_index(str(path))
+    ids = faiss.vector_to_array(faiss.downcast_index(index).id_map)
+    return np.vstack([index.reconstruct(int(i)) for i in ids]).astype("float32")
+
+def recall(found: np.ndarray, truth: np.ndarray) -> float:
+    return float(np.mean([len(set(f) & set(t)) / len(t) for f, t in zip(found, truth)]))
+
+def main():
+    ap = argparse.ArgumentParser(description="Recall@k / latency of ANN index modes vs exact flat search.")
+    ap.add_argument("--n", type=int, default=100_000, help="Corpus size (synthetic).")
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--queries", type=int, default=500)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--modes", nargs="+", default=list(INDEX_MODES), choices=INDEX_MODES)
+    ap.add_argument("--from-job-index", nargs="?", const="data/index/jobs.faiss", default=None,
+                    help="Benchmark on the vectors of an existing job index instead of synthetic data.")
+    args = ap.parse_args()
+
+    if args.from_job_index:
+        X = job_index_vectors(Path(args.from_job_index))
+        rng = np.random.default_rng(1)
+        Q = X[rng.choice(len(X), min(args.queries, len(X)), replace=False)]
+    else:
+        X = synthetic(args.n + args.queries, args.dim)
+        X, Q = X[:args.n], X[args.n:]
+    print(f"corpus={len(X)} dim={X.shape[1]} queries={len(Q)} k={args.k}")
+
+    exact = faiss.IndexFlatIP(X.shape[1]); exact.add(X)
+    _, truth = exact.search(Q, args.k)
+
+    print(f"{'mode':9s} {'param':>12s} {'recall@k':>9s} {'ms/query':>9s} {'build_s':>8s} {'size_MB':>8s}")
+    for mode in args.modes:
+        t0 = time.perf_counter()
+        index = build_index(mode, X)
+        index.add(X)
+        build_s = time.perf_counter() - t0
+        size_mb = faiss.serialize_index(index).nbytes / 2**20
+        actual = index_mode(index)
+        if actual != mode:
+            print(f"{mode:9s} {'-':>12s}  fell back to {actual} (too few vectors to train)")
+            continue
+        for p in SWEEP[mode]:
+            params = search_params(index, nprobe=p, ef_search=p) if p else None
+            t0 = time.perf_counter()
+            _, found = index.search(Q, args.k, params=params)
+            ms = 1000 * (time.perf_counter() - t0) / len(Q)
+            label = "-" if p is None else (f"efSearch={p}" if mode == "hnsw" else f"nprobe={p}")
+            print(f"{mode:9s} {label:>12s} {recall(found, truth):9.3f} {ms:9.3f} {build_s:8.1f} {size_mb:8.1f}")
+
+if __name__ == "__main__":
+    main()
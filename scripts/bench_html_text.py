@@ -0,0 +1,69 @@
+# scripts/bench_html_text.py
+"""
+Benchmark utils.html_text.html_to_text against the old BeautifulSoup routine
+on the JD HTML fixtures in data/fixtures/jd_html/, and check the outputs match.
+
+    python -m scripts.bench_html_text --repeat 200
+"""
+from __future__ import annotations
+import argparse, sys, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from utils.html_text import html_to_text
+
+FIXTURES = Path("data/fixtures/jd_html")
+
+def bs4_html_to_text(html: str) -> str:
+    """The converter the ingesters used before utils.html_text."""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html or "", "html.parser")
+    for br in soup.find_all("br"): br.replace_with("\n")
+    for li in soup.find_all("li"):
+        li.insert_before("• "); li.append("\n")
+    for p in soup.find_all("p"): p.append("\n")
+    text = soup.get_text()
+    return "\n".join(line.rstrip() for line in text.splitlines() if line.strip())
+
+def _time(fn, docs, repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for d in docs:
+            fn(d)
+    return time.perf_counter() - t0
+
+def main():
+    ap = argparse.ArgumentParser(description="HTML->text converter benchmark over JD fixtures.")
+    ap.add_argument("--dir", default=str(FIXTURES))
+    ap.add_argument("--repeat", type=int, default=200, help="Passes over the whole corpus.")
+    args = ap.parse_args()
+
+    paths = sorted(Path(args.dir).glob("*.html"))
+    if not paths:
+        print(f"No fixtures in {args.dir}"); sys.exit(1)
+    docs = [p.read_text() for p in paths]
+    kb = sum(len(d.encode()) for d in docs) / 1024
+    print(f"{len(docs)} fixtures, {kb:.1f} KiB total, {args.repeat} passes")
+
+    try:
+        import bs4  # noqa: F401
+        have_bs4 = True
+    except ImportError:
+        have_bs4 = False
+        print("beautifulsoup4 not installed: skipping the baseline and the equality check")
+
+    if have_bs4:
+        mismatched = [p.name for p, d in zip(paths, docs) if bs4_html_to_text(d) != html_to_text(d)]
+        print(f"identical output: {len(docs) - len(mismatched)}/{len(docs)}"
+              + (f"  (differs: {', '.join(mismatched)})" if mismatched else ""))
+
+    n = len(docs) * args.repeat
+    t_new = _time(html_to_text, docs, args.repeat)
+    print(f"html_to_text      {t_new:8.3f}s  {1e6 * t_new / n:8.1f} us/doc")
+    if have_bs4:
+        t_old = _time(bs4_html_to_text, docs, args.repeat)
+        print(f"bs4 (html.parser) {t_old:8.3f}s  {1e6 * t_old / n:8.1f} us/doc")
+        print(f"speedup           {t_old / t_new:8.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+# scripts/bench_queries.py
+"""
+Query-latency benchmark for the UI's hot lookups, before and after the db.migrations
+indexes, on a synthetic SQLite database (100k jobs by default).
+
+The database is built from the current models, then every secondary index is
+dropped to get the "before" schema (what create_all() left on databases created
+before the migrations); "after" is the same file once migrate() has run.
+
+    python -m scripts.bench_queries --jobs 100000 --reps 20
+"""
+from __future__ import annotations
+import argparse, os, random, sys, tempfile, time
+from datetime import datetime, timedelta
+from pathlib import Path
+from statistics import median
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+STATUSES = ["new", "scored", "applied", "skipped", "closed"]
+
+def build(engine, n_jobs: int, seed: int = 0) -> list:
+    """Jobs with 1-3 fit scores each, artifacts for ~5%, contacts and outreach for ~2%. Returns job ids."""
+    from db.models import JobPosting, FitScore, Artifact
+    from db.crm import Contact, OutreachEvent
+    rng = random.Random(seed)
+    t0 = datetime(2024, 1, 1)
+    companies = [f"Company {i}" for i in range(max(1, n_jobs // 50))]
+    jobs = [{"id": f"job-{i:07d}", "company": rng.choice(companies), "title": f"Engineer {i % 40}",
+             "location": "Remote", "url": f"https://example.com/{i}", "jd_text": "Python SQL Spark " * 20,
+             "posted_at": t0 + timedelta(minutes=rng.randrange(500_000)), "status": rng.choice(STATUSES)}
+            for i in range(n_jobs)]
+    scores, arts, contacts, events = [], [], [], []
+    for j in jobs:
+        for k in range(rng.randint(1, 3)):
+            scores.append({"job_id": j["id"], "total": rng.random(), "semantic": rng.random(), "keywords": 0.5,
+                           "created_at": j["posted_at"] + timedelta(hours=k)})
+        if rng.random() < 0.05:
+            arts.append({"job_id": j["id"], "resume_path": "r.md", "cover_letter_path": "c.md",
+                         "created_at": j["posted_at"]})
+    for i in range(max(1, n_jobs // 50)):
+        contacts.append({"id": i + 1, "name": f"Recruiter {i}", "company": rng.choice(companies),
+                         "email": f"r{i}@example.com", "created_at": t0})
+    for j in rng.sample(jobs, max(1, n_jobs // 50)):
+        events.append({"job_id": j["id"], "contact_id": rng.randint(1, len(contacts)), "channel": "email",
+                       "template_name": "t", "outcome": rng.choice(["sent", "reply", "interview", None])})
+    with engine.begin() as conn:
+        for table, rows in ((JobPosting, jobs), (FitScore, scores), (Artifact, arts),
+                            (Contact, contacts), (OutreachEvent, events)):
+            conn.execute(table.__table__.insert(), rows)
+    return [j["id"] for j in jobs]
+
+def drop_secondary_indexes(engine):
+    from sqlalchemy import inspect
+    with engine.begin() as conn:
+        insp = inspect(conn)
+        for table in insp.get_table_names():
+            for ix in insp.get_indexes(table):
+                conn.exec_driver_sql(f'DROP INDEX IF EXISTS "{ix["name"]}"')
+
+def cases(job_ids: list, rng: random.Random):
+    """[(label, fn(session))]: the queries the queue, job details and dashboard run."""
+    from db.models import FitScore, Artifact
+    from db.crm import Contact, OutreachEvent
+    from db.queue import queue_rows, queue_count, job_status_counts, outreach_by_company
+    pick = lambda: rng.choice(job_ids)
+    return [
+        ("queue page, newest (25)", lambda s: queue_rows(s, limit=25, offset=0)),
+        ("queue page, status=applied", lambda s: queue_rows(s, limit=25, offset=0, status="applied")),
+        ("queue count, status=applied", lambda s: queue_count(s, status="applied")),
+        ("queue page, by fit score", lambda s: queue_rows(s, limit=25, offset=0, sort="score")),
+        ("latest FitScore of a job", lambda s: s.query(FitScore).filter_by(job_id=pick())
+                                               .order_by(FitScore.created_at.desc()).first()),
+        ("latest Artifact of a job", lambda s: s.query(Artifact).filter_by(job_id=pick())
+                                               .order_by(Artifact.created_at.desc()).first()),
+        ("outreach events of a job", lambda s: s.query(OutreachEvent).filter_by(job_id=pick())
+                                               .order_by(OutreachEvent.id.desc()).limit(10).all()),
+        ("contacts of a company", lambda s: s.query(Contact).filter(Contact.company == "Company 7").all()),
+        ("jobs by status (GROUP BY)", job_status_counts),
+        ("outreach x company (join)", outreach_by_company),
+    ]
+
+_deadline = [float("inf")]
+
+def _install_cap(engine):
+    """Interrupt any statement still running past _deadline (SQLite progress handler)."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_conn, _):
+        dbapi_conn.set_progress_handler(lambda: int(time.perf_counter() > _deadline[0]), 10_000)
+
+def run(engine, job_ids, reps: int, cap: float) -> dict:
+    """Median ms per query; None when a run exceeded cap seconds (it is interrupted)."""
+    from sqlalchemy.exc import OperationalError
+    from sqlalchemy.orm import Session
+    out = {}
+    for label, fn in cases(job_ids, random.Random(1)):
+        times = []
+        for _ in range(reps):
+            with Session(engine) as s:
+                t0 = time.perf_counter()
+                _deadline[0] = t0 + cap
+                try:
+                    fn(s)
+                except OperationalError:
+                    times = None
+                    break
+                times.append(time.perf_counter() - t0)
+        _deadline[0] = float("inf")
+        out[label] = median(times) * 1000 if times else None
+    return out
+
+def main():
+    ap = argparse.ArgumentParser(description="Hot-query latency before/after the db.migrations indexes.")
+    ap.add_argument("--jobs", type=int, default=100_000)
+    ap.add_argument("--reps", type=int, default=20, help="Runs per query (median reported).")
+    ap.add_argument("--cap", type=float, default=30.0, help="Give up on a query after this many seconds.")
+    ap.add_argument("--keep", help="Write the synthetic database here instead of a temp file.")
+    args = ap.parse_args()
+
+    tmp = None
+    if args.keep:
+        path = Path(args.keep)
+    else:
+        tmp = tempfile.TemporaryDirectory()
+        path = Path(tmp.name) / "bench.db"
+    # db.models / db.crm bind their engines at import: point them at the bench file first
+    os.environ["DB_URL"] = f"sqlite:///{path}"
+    from db.models import Base, engine
+    from db.migrations import migrate, schema_version
+    _install_cap(engine)
+
+    t0 = time.perf_counter()
+    import db.crm  # noqa: F401  (contacts/outreach_events on the same metadata)
+    Base.metadata.create_all(engine)
+    job_ids = build(engine, args.jobs)
+    drop_secondary_indexes(engine)
+    print(f"built {args.jobs} jobs in {time.perf_counter() - t0:.1f}s -> {path}")
+
+    before = run(engine, job_ids, args.reps, args.cap)
+    schema_version.drop(engine, checkfirst=True)
+    t0 = time.perf_counter()
+    version = migrate(engine)
+    print(f"migrate() to version {version} in {time.perf_counter() - t0:.2f}s")
+    after = run(engine, job_ids, args.reps, args.cap)
+
+    print(f"\n{'query':32s} {'before ms':>10s} {'after ms':>10s} {'speedup':>8s}")
+    fmt = lambda ms: f"{ms:10.2f}" if ms is not None else f"{'>' + format(args.cap * 1000, '.0f'):>10s}"
+    for label in before:
+        b, a = before[label], after[label]
+        speedup = (f"{'>' if b is None else ''}{(b or args.cap * 1000) / a:.1f}x" if a else "-").rjust(8)
+        print(f"{label:32s} {fmt(b)} {fmt(a)} {speedup}")
+    if tmp:
+        engine.dispose()
+        tmp.cleanup()
+
+if __name__ == "__main__":
+    main()
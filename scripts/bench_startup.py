@@ -0,0 +1,66 @@
+# scripts/bench_startup.py
+"""
+Startup-latency benchmark for the embedding stack: what importing the app's
+agents costs, how long the first request takes (model load + encode), and what a
+warm request costs afterwards. Each phase runs in a fresh interpreter with an empty
+embedding cache, so nothing is shared between measurements.
+
+    python -m scripts.bench_startup --runs 3
+"""
+from __future__ import annotations
+import argparse, json, os, subprocess, sys, tempfile
+from pathlib import Path
+from statistics import median
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# runs inside the child interpreter; prints one JSON line
+PROBE = r"""
+import json, sys, time
+sys.path.insert(0, {root!r})
+t0 = time.perf_counter()
+import agents.scorer, agents.rolefit, rag.store
+from rag import embedder
+t_import = time.perf_counter() - t0
+
+jd, resume = "Machine learning engineer: Python, SQL, Spark, AWS.", open({resume!r}).read()
+t0 = time.perf_counter()
+agents.scorer.fit_score(jd, resume, ["python", "sql"])
+t_first = time.perf_counter() - t0
+
+t0 = time.perf_counter()
+agents.rolefit._cos_sim(jd + " Airflow.", resume)      # same model under its hub alias
+for i in range(3):                                      # the app builds one store per click
+    s = rag.store.SimpleStore(); s.add_texts([jd, "Acme - MLE %d" % i]); s.search("Acme MLE", k=2)
+t_warm = time.perf_counter() - t0
+
+print(json.dumps({{"import_s": t_import, "first_s": t_first, "warm_s": t_warm,
+                  "models": embedder.loaded_models()}}))
+"""
+
+def _probe(resume: Path) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, EMBED_CACHE_PATH=str(Path(tmp) / "emb.sqlite3"))
+        out = subprocess.run([sys.executable, "-c", PROBE.format(root=str(ROOT), resume=str(resume))],
+                             cwd=ROOT, env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+def main():
+    ap = argparse.ArgumentParser(description="Import / first-request / warm-request latency of the embedding stack.")
+    ap.add_argument("--runs", type=int, default=3, help="Fresh interpreters to average over (median).")
+    ap.add_argument("--resume", default=str(ROOT / "data" / "base_resume.md"))
+    args = ap.parse_args()
+
+    try:
+        import sentence_transformers  # noqa: F401
+    except ImportError:
+        print("sentence-transformers not installed: nothing to benchmark"); sys.exit(1)
+
+    results = [_probe(Path(args.resume)) for _ in range(args.runs)]
+    for key, label in (("import_s", "import agents + rag"), ("first_s", "first fit_score (load)"),
+                       ("warm_s", "rolefit + 3 SimpleStores")):
+        print(f"{label:26s} {median(r[key] for r in results):8.3f}s")
+    print(f"models loaded              {', '.join(results[-1]['models']) or '(none)'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# scripts/board_cursor.py
+"""
+Incremental ingestion against a per-board cursor (db.models.BoardCursor).
+
+The cursor remembers, for every ATS job id seen on a board, its last update stamp
+(Greenhouse updated_at, Lever updatedAt/createdAt, Ashby updatedAt/publishedAt) and
+its url. On the next run unchanged postings are skipped before filtering or HTML
+conversion, new/changed ones are upserted by url, and ids that disappeared from the
+board close their rows instead of leaving them as stale "new" jobs.
+
+The cursor also stores the ProfileFilter fingerprint it was built under. When the
+profile changes, every posting is re-evaluated, so ones dropped before can now be
+kept. A changed posting that no longer passes the filters is closed by its url.
+"""
+from __future__ import annotations
+from typing import Dict, List
+
+from db.models import load_cursor, save_cursor, refresh_postings, bulk_add_postings, close_postings
+
+class BoardDelta:
+    def __init__(self, s, board: str, complete: bool = True, filter_hash: str | None = None):
+        """
+        complete=False means the fetch was truncated (e.g. by --limit): nothing can be
+        inferred about missing ids, so no rows are closed and old cursor entries are kept.
+        filter_hash is the ProfileFilter.fingerprint postings are judged by this run.
+        """
+        self.s, self.board, self.complete, self.filter_hash = s, board, complete, filter_hash
+        self.prev, self.prev_hash = load_cursor(s, board)
+        self.refilter = self.prev_hash != filter_hash   # filters changed: nothing counts as unchanged
+        self.now: Dict[str, list] = {}
+        self.evaluated: List[str] = []             # ids re-evaluated this run (not skipped)
+
+    def unchanged(self, job_id, stamp, url) -> bool:
+        """Record the posting and report whether it is identical to the last run's copy."""
+        if job_id is None:
+            return False  # untrackable: always evaluate
+        key, stamp = str(job_id), str(stamp or "")
+        self.now[key] = [stamp, url]
+        prev = self.prev.get(key)
+        # no stamp -> no way to tell an edit apart, so re-evaluate (refresh_postings updates in place)
+        if bool(stamp) and prev is not None and prev[0] == stamp and not self.refilter:
+            return True
+        self.evaluated.append(key)
+        return False
+
+    def finish(self, postings: List[dict]) -> dict:
+        """
+        Upsert the kept postings, close vanished ones and evaluated ones the filters now
+        drop, persist the cursor. Caller commits.
+        """
+        known = refresh_postings(self.s, postings)
+        stats = bulk_add_postings(self.s, [p for p in postings if p.get("url") not in known])
+        stats["updated"] = len(known)
+        stats["urls"] = [p["url"] for p in postings if p.get("url")]  # new/changed: for the vector index
+        kept = set(stats["urls"])
+        # re-evaluated but dropped: a no-op unless the posting was kept on an earlier run
+        gone = [self.now[k][1] for k in self.evaluated if self.now[k][1] not in kept]
+        filter_hash = self.filter_hash
+        if self.complete:
+            gone += [v[1] for k, v in self.prev.items() if k not in self.now and v]
+            seen = self.now
+        else:
+            seen = {**self.prev, **self.now}
+            if self.refilter:
+                # ids past the limit were judged by the old filters: re-evaluate all next run
+                filter_hash = self.prev_hash
+        stats["closed"] = close_postings(self.s, gone)
+        save_cursor(self.s, self.board, seen, filter_hash)
+        return stats
@@ -0,0 +1,53 @@
+# scripts/dedupe_jobs.py
+"""
+Mark near-duplicate postings (the same role re-posted under a new URL, or copied
+across locations) in the job_duplicates table, using MinHash/LSH over JD shingles
+(utils.near_dupes). Exact (company, title, location) repeats are already dropped at
+ingest; this catches the ones that differ in location, URL or a few words.
+
+Each cluster keeps one canonical job: one that already has artifacts if any,
+otherwise the earliest posted. main.py skips artifact generation for the rest.
+
+    python -m scripts.dedupe_jobs --threshold 0.8
+"""
+from __future__ import annotations
+import argparse, sys, time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from sqlalchemy import delete, select
+from db.models import session_scope, JobPosting, JobDuplicate, Artifact, init_db
+from utils.near_dupes import near_duplicate_groups
+
+def mark_duplicates(s, threshold: float = 0.8, cross_company: bool = False) -> dict:
+    """Recompute job_duplicates from scratch. Caller commits."""
+    rows = s.execute(select(JobPosting.id, JobPosting.company, JobPosting.jd_text, JobPosting.posted_at)).all()
+    with_art = set(s.execute(select(Artifact.job_id).distinct()).scalars())
+    meta = {r.id: r for r in rows}
+    groups = near_duplicate_groups(
+        [(r.id, r.jd_text or "") for r in rows], threshold=threshold,
+        same_group=None if cross_company else {r.id: (r.company or "").strip().lower() for r in rows},
+        canonical=lambda i: (i not in with_art, meta[i].posted_at or datetime.max, i))
+
+    s.execute(delete(JobDuplicate))
+    dupes = [JobDuplicate(job_id=d, canonical_id=canon, similarity=sim)
+             for canon, members in groups for d, sim in members]
+    s.add_all(dupes)
+    return {"jobs": len(rows), "clusters": len(groups), "duplicates": len(dupes)}
+
+def main():
+    ap = argparse.ArgumentParser(description="Flag near-duplicate job postings (MinHash/LSH over JD text).")
+    ap.add_argument("--threshold", type=float, default=0.8, help="Estimated Jaccard similarity to call a duplicate.")
+    ap.add_argument("--cross-company", action="store_true", help="Also match postings across different companies.")
+    args = ap.parse_args()
+
+    init_db()
+    t0 = time.perf_counter()
+    with session_scope() as s:
+        st = mark_duplicates(s, threshold=args.threshold, cross_company=args.cross_company)
+    print(f"jobs={st['jobs']} clusters={st['clusters']} duplicates={st['duplicates']} "
+          f"in {time.perf_counter() - t0:.1f}s")
+
+if __name__ == "__main__":
+    main()
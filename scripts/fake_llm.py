@@ -0,0 +1,216 @@
+# scripts/fake_llm.py
+"""
+Local stand-in for the OpenAI API, for exercising the LLM stages offline:
+  POST /v1/chat/completions and /v1/responses answer after --latency seconds with a
+  canned JSON payload (resume_bullets + cover_letter, or a dummy object matching the
+  requested json_schema for structured-output calls), streamed as server-sent
+  events when the request asks for "stream": true;
+  with --max-inflight N, requests beyond N concurrent ones get a 429 with Retry-After;
+  POST /v1/files, POST /v1/batches, GET /v1/batches/{id} and GET /v1/files/{id}/content
+  emulate the Batch API (a batch completes --batch-delay seconds after creation).
+
+    python -m scripts.fake_llm --port 8766 --latency 2 --max-inflight 4
+    OPENAI_BASE_URL=http://127.0.0.1:8766/v1 OPENAI_API_KEY=x python main.py
+"""
+from __future__ import annotations
+import argparse, email, json, threading, time, uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CANNED = {
+    "resume_bullets": ["Built and shipped ML pipelines in Python and SQL.",
+                       "Cut model serving latency by batching inference."],
+    "cover_letter": "Dear hiring team, ... (fake LLM response)",
+}
+
+def from_schema(schema: dict):
+    """A minimal instance of a JSON schema (strings, arrays, nested objects)."""
+    t = schema.get("type")
+    if t == "object":
+        return {k: from_schema(v) for k, v in schema.get("properties", {}).items()}
+    if t == "array":
+        return [from_schema(schema.get("items", {"type": "string"}))]
+    if t in ("number", "integer"):
+        return 0
+    if t == "boolean":
+        return False
+    return "fake text"
+
+def requested_schema(req: dict):
+    fmt = (req.get("response_format") or {}).get("json_schema") or ((req.get("text") or {}).get("format") or {})
+    return fmt.get("schema")
+
+def completion(path: str, req: dict):
+    """(response body, reply text) for a chat/completions or responses request, else (None, None)."""
+    schema = requested_schema(req)
+    text = json.dumps(from_schema(schema)) if schema else "```json\n" + json.dumps(CANNED) + "\n```"
+    model = req.get("model", "fake")
+    if path.endswith("/chat/completions"):
+        return {"id": f"chatcmpl-{uuid.uuid4().hex}", "object": "chat.completion",
+                "created": int(time.time()), "model": model,
+                "usage": {"prompt_tokens": 500, "completion_tokens": 200, "total_tokens": 700},
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": text}}]}, text
+    if path.endswith("/responses"):
+        return {"id": f"resp_{uuid.uuid4().hex}", "object": "response", "created_at": int(time.time()),
+                "model": model, "status": "completed",
+                "usage": {"input_tokens": 500, "output_tokens": 200, "total_tokens": 700},
+                "output": [{"type": "message", "id": f"msg_{uuid.uuid4().hex}", "status": "completed",
+                            "role": "assistant",
+                            "content": [{"type": "output_text", "text": text, "annotations": []}]}]}, text
+    return None, None
+
+class FakeLLM(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 1.0
+    max_inflight = 0      # 0 = unlimited
+    retry_after = 1.0
+    batch_delay = 2.0
+    files: dict = {}      # file id -> bytes (uploads and batch outputs)
+    batches: dict = {}
+    _inflight = 0
+    _lock = threading.Lock()
+    stats = {"ok": 0, "rate_limited": 0}
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, code: int, body: dict, headers: dict | None = None):
+        data = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, body: dict, text: str, pieces: int = 8):
+        """Send text in `pieces` deltas as SSE, in the shape of the endpoint that was called."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        step = max(1, len(text) // pieces)
+        if body["object"] == "chat.completion":
+            base = {"id": body["id"], "object": "chat.completion.chunk", "created": body["created"],
+                    "model": body["model"]}
+            events = [dict(base, choices=[{"index": 0, "delta": {"content": text[i:i + step]},
+                                           "finish_reason": None}])
+                      for i in range(0, len(text), step)]
+            events.append(dict(base, choices=[], usage=body["usage"]))
+        else:
+            events = [{"type": "response.output_text.delta", "item_id": body["output"][0]["id"],
+                       "output_index": 0, "content_index": 0, "delta": text[i:i + step]}
+                      for i in range(0, len(text), step)]
+            events.append({"type": "response.completed", "response": body})
+        for ev in events:
+            self.wfile.write(f"data: {json.dumps(ev)}\n\n".encode())
+            self.wfile.flush()
+            time.sleep(0.01)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.close_connection = True
+
+    def _read(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def do_GET(self):
+        parts = self.path.rstrip("/").split("/")          # ['', 'v1', 'batches', id] ...
+        cls = type(self)
+        if parts[2:3] == ["batches"] and len(parts) == 4 and parts[3] in cls.batches:
+            b = cls.batches[parts[3]]
+            if time.time() >= b.pop("_ready_at", 0):
+                b.update(status="completed", completed_at=int(time.time()))
+            return self._send(200, b)
+        if parts[2:3] == ["files"] and len(parts) == 5 and parts[4] == "content" and parts[3] in cls.files:
+            data = cls.files[parts[3]]
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            return self.wfile.write(data)
+        self._send(404, {"error": {"message": f"unknown path {self.path}"}})
+
+    def _upload(self):
+        """POST /v1/files (multipart): keep the file part in memory."""
+        raw = self._read()
+        msg = email.message_from_bytes(b"Content-Type: " + self.headers["Content-Type"].encode() + b"\r\n\r\n" + raw)
+        data = next((part.get_payload(decode=True) for part in msg.walk() if part.get_filename()), b"")
+        fid = f"file-{uuid.uuid4().hex[:12]}"
+        type(self).files[fid] = data
+        self._send(200, {"id": fid, "object": "file", "bytes": len(data), "created_at": int(time.time()),
+                         "filename": "batch.jsonl", "purpose": "batch", "status": "processed"})
+
+    def _create_batch(self, req: dict):
+        """POST /v1/batches: answer every line now, report completion after --batch-delay."""
+        cls = type(self)
+        out = []
+        for line in cls.files.get(req.get("input_file_id"), b"").decode().splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            body, _ = completion(item["url"], item["body"])
+            out.append({"id": f"batch_req_{uuid.uuid4().hex[:12]}", "custom_id": item["custom_id"], "error": None,
+                        "response": {"status_code": 200, "request_id": uuid.uuid4().hex, "body": body}})
+        out_id = f"file-{uuid.uuid4().hex[:12]}"
+        cls.files[out_id] = "".join(json.dumps(o) + "\n" for o in out).encode()
+        bid = f"batch_{uuid.uuid4().hex[:12]}"
+        cls.batches[bid] = {"id": bid, "object": "batch", "endpoint": req.get("endpoint"),
+                            "input_file_id": req.get("input_file_id"), "completion_window": "24h",
+                            "status": "in_progress", "created_at": int(time.time()),
+                            "output_file_id": out_id, "error_file_id": None, "metadata": req.get("metadata"),
+                            "request_counts": {"total": len(out), "completed": len(out), "failed": 0},
+                            "_ready_at": time.time() + cls.batch_delay}
+        self._send(200, {k: v for k, v in cls.batches[bid].items() if not k.startswith("_")})
+
+    def do_POST(self):
+        if self.path.rstrip("/").endswith("/files"):
+            return self._upload()
+        req = json.loads(self._read() or b"{}")
+        if self.path.rstrip("/").endswith("/batches"):
+            return self._create_batch(req)
+        cls = type(self)
+        with cls._lock:
+            limited = cls.max_inflight and cls._inflight >= cls.max_inflight
+            if limited:
+                cls.stats["rate_limited"] += 1
+            else:
+                cls._inflight += 1
+        if limited:
+            return self._send(429, {"error": {"message": "Rate limit reached (fake)", "type": "requests",
+                                              "code": "rate_limit_exceeded"}},
+                              {"retry-after": str(cls.retry_after)})
+        try:
+            time.sleep(cls.latency)
+            body, text = completion(self.path, req)
+            if body is None:
+                return self._send(404, {"error": {"message": f"unknown path {self.path}"}})
+            if req.get("stream"):
+                self._stream(body, text)
+            else:
+                self._send(200, body)
+            with cls._lock:
+                cls.stats["ok"] += 1
+        finally:
+            with cls._lock:
+                cls._inflight -= 1
+
+def main():
+    ap = argparse.ArgumentParser(description="Fake OpenAI endpoint with configurable latency and 429s.")
+    ap.add_argument("--port", type=int, default=8766)
+    ap.add_argument("--latency", type=float, default=1.0, help="Seconds per successful request.")
+    ap.add_argument("--max-inflight", type=int, default=0, help="429 above this many concurrent requests (0 = never).")
+    ap.add_argument("--retry-after", type=float, default=1.0)
+    ap.add_argument("--batch-delay", type=float, default=2.0, help="Seconds before a batch reports completed.")
+    args = ap.parse_args()
+
+    FakeLLM.latency, FakeLLM.max_inflight, FakeLLM.retry_after = args.latency, args.max_inflight, args.retry_after
+    FakeLLM.batch_delay = args.batch_delay
+    srv = ThreadingHTTPServer(("127.0.0.1", args.port), FakeLLM)
+    print(f"fake LLM on http://127.0.0.1:{args.port}/v1 (latency={args.latency}s, max_inflight={args.max_inflight})")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n{FakeLLM.stats}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# scripts/http_cache.py
+"""
+On-disk conditional-request cache for ATS board fetches.
+
+Each board URL maps to one file under data/cache/http/:
+  <sha1>.meta.json  -> {"url", "etag", "last_modified", "tag"}
+On the next run we send If-None-Match / If-Modified-Since; a 304 means the
+board is unchanged and the caller can skip parse/filter/insert entirely
+(get_json returns None). Bodies aren't kept: a 304 never needs one.
+
+A 200's validators are only held in memory until the caller has ingested the body
+and calls save(url); if parsing or ingest fails they are never written, so the
+board isn't answered with 304 until its content changes.
+
+A cache built with tag (the ingesters pass their ProfileFilter.fingerprint) ignores
+entries stored under another tag: after a profile change the board is fetched
+unconditionally so postings the old filters dropped are looked at again.
+"""
+from __future__ import annotations
+import hashlib, json, os
+from pathlib import Path
+from typing import Any, Dict
+
+import requests
+
+CACHE_DIR = Path(os.getenv("HTTP_CACHE_DIR", "data/cache/http"))
+
+class HttpCache:
+    def __init__(self, root: str | Path = CACHE_DIR, tag: str | None = None):
+        self.root, self.tag = Path(root), tag
+        self._pending: Dict[str, dict] = {}     # url -> validators of a 200 not saved yet
+
+    def with_tag(self, tag: str | None) -> "HttpCache":
+        return self if tag == self.tag else HttpCache(self.root, tag)
+
+    def _path(self, url: str) -> Path:
+        return self.root / f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}.meta.json"
+
+    def validators(self, url: str) -> dict:
+        meta_p = self._path(url)
+        if not meta_p.exists():
+            return {}
+        try:
+            meta = json.loads(meta_p.read_text())
+        except (OSError, ValueError):
+            return {}
+        if meta.get("tag") != self.tag:
+            return {}
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def save(self, url: str) -> None:
+        """Persist the validators of url's last 200 (call once its body is safely ingested)."""
+        meta = self._pending.pop(url, None)
+        if meta is None:
+            return  # 304, or nothing to revalidate with next time
+        self.root.mkdir(parents=True, exist_ok=True)
+        meta_p = self._path(url)
+        # write-then-rename so concurrent runner threads never see a torn file
+        tmp = meta_p.with_suffix(meta_p.suffix + f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(meta))
+        os.replace(tmp, meta_p)
+
+    def invalidate(self, url: str) -> None:
+        """Drop validators so the next fetch is unconditional (e.g. after a failed ingest)."""
+        self._pending.pop(url, None)
+        self._path(url).unlink(missing_ok=True)
+
+    def get_json(self, url: str, session=None, timeout: int = 30) -> Any:
+        """
+        Conditional GET. Returns parsed JSON on 200, or None on 304 Not Modified.
+        Raises requests.HTTPError for other error statuses. A 200's validators are
+        kept for save(url).
+        """
+        r = (session or requests).get(url, headers=self.validators(url), timeout=timeout)
+        if r.status_code == 304:
+            return None
+        r.raise_for_status()
+        data = r.json()
+        etag, last_mod = r.headers.get("ETag"), r.headers.get("Last-Modified")
+        if etag or last_mod:
+            self._pending[url] = {"url": url, "etag": etag, "last_modified": last_mod, "tag": self.tag}
+        return data
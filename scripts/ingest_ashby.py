@@ -1,112 +1,94 @@
 # scripts/ingest_ashby.py
 from __future__ import annotations
-import argparse, requests, re, sys
+import argparse, os, requests, sys
 from pathlib import Path
 from typing import List, Dict, Any
-from bs4 import BeautifulSoup
 from datetime import datetime
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
-from db.models import Session, JobPosting
-import yaml
+from db.models import session_scope, init_db
+from scripts.board_cursor import BoardDelta
+from scripts.http_cache import HttpCache
+from scripts.profile_filter import ProfileFilter
+from utils.html_text import html_to_text
+from rag.job_index import index_postings
 
-REMOTE_TOKENS = ["remote","remote - us","remote (us)","remote, us","us (remote)","usa (remote)","united states (remote)"]
-ROLE_SYNONYMS = ["machine learning","ml","ml engineer","mlops","ml ops","data scientist","software engineer","backend","data engineer","analytics"]
+ASHBY_API = os.getenv("ASHBY_API", "https://api.ashbyhq.com")
 
-def _norm(s:str)->str:
-    return re.sub(r"\s+"," ",(s or "").lower()).strip()
-
-def load_profile()->dict:
-    p=Path("data/profile.yaml")
-    return yaml.safe_load(p.read_text()) if p.exists() else {}
-
-def _html_to_text(html:str)->str:
-    soup=BeautifulSoup(html or "","html.parser")
-    for br in soup.find_all("br"): br.replace_with("\n")
-    for li in soup.find_all("li"):
-        li.insert_before("• "); li.append("\n")
-    for p in soup.find_all("p"): p.append("\n")
-    text=soup.get_text()
-    return "\n".join(line.rstrip() for line in text.splitlines() if line.strip())
-
-def allow_title(raw_title:str, profile:dict)->bool:
-    t=_norm(raw_title)
-    wanted=[_norm(x) for x in (profile.get("target_roles") or [])]
-    if not wanted: return True
-    # strict match first
-    if any(all(piece in t for piece in role.split()) for role in wanted):
-        return True
-    # loose synonyms/chunks
-    tokens=set(ROLE_SYNONYMS)
-    for w in wanted:
-        for chunk in re.split(r"[^a-z]+", w):
-            if len(chunk)>=3: tokens.add(chunk)
-    return any(tok in t for tok in tokens)
-
-def allow_location(raw_loc:str, profile:dict)->bool:
-    loc=_norm(raw_loc)
-    wants=[_norm(x) for x in (profile.get("locations") or [])]
-    if not wants: return True
-    if any(tok in loc for tok in REMOTE_TOKENS):
-        return any("remote" in w for w in wants)
-    return any(w in loc for w in wants)
-
-def allow_keywords(desc_html:str, profile:dict)->bool:
-    text=_norm(_html_to_text(desc_html))
-    must=[_norm(k) for k in (profile.get("must_have_keywords") or [])]
-    if not must: return True
-    min_req=int((profile.get("filters") or {}).get("min_must_keywords", len(must)))
-    return sum(1 for k in must if k in text) >= min_req
-
-def _fetch(job_board_name:str, include_comp:bool, limit:int)->List[Dict[str,Any]]:
+def _url(job_board_name:str, include_comp:bool)->str:
     # ✅ Correct public endpoint per Ashby docs
     # https://api.ashbyhq.com/posting-api/job-board/{JOB_BOARD_NAME}
-    url=f"https://api.ashbyhq.com/posting-api/job-board/{job_board_name}"
+    url=f"{ASHBY_API}/posting-api/job-board/{job_board_name}"
     if include_comp: url += "?includeCompensation=true"
-    r=requests.get(url, timeout=30)
-    r.raise_for_status()
-    data=r.json() or {}
-    rows=data.get("jobs") or []
-    return rows[:limit]
-
-def ingest(job_board_name:str, limit:int=200, include_comp:bool=False)->dict:
-    profile=load_profile()
-    s=Session()
-    stats={"org":job_board_name,"fetched":0,"kept":0,"deduped":0,"drop_role":0,"drop_loc":0,"drop_kw":0}
-
-    rows=_fetch(job_board_name, include_comp, limit)
-    stats["fetched"]=len(rows)
-    company = job_board_name.replace("-"," ").title()
-
-    for j in rows:
-        title = j.get("title") or ""
-        location = j.get("location") or ""
-        jd_html = j.get("descriptionHtml") or j.get("descriptionPlain") or ""
-
-        if not allow_title(title, profile):   stats["drop_role"]+=1; continue
-        if not allow_location(location, profile): stats["drop_loc"]+=1; continue
-        if not allow_keywords(jd_html, profile):  stats["drop_kw"]+=1; continue
-
-        exists=(s.query(JobPosting)
-                 .filter(JobPosting.company==company)
-                 .filter(JobPosting.title==title)
-                 .filter(JobPosting.location==location)
-                 .first())
-        if exists:
-            stats["deduped"]+=1
-            continue
-
-        s.add(JobPosting(
-            company=company,
-            title=title,
-            location=location,
-            jd_text=_html_to_text(jd_html),
-            posted_at=datetime.utcnow(),
-            status="new",
-        ))
-        stats["kept"]+=1
-
-    s.commit()
+    return url
+
+def _fetch(job_board_name:str, include_comp:bool, session=None, cache:HttpCache|None=None)->List[Dict[str,Any]]|None:
+    url=_url(job_board_name, include_comp)
+    if cache is not None:
+        data=cache.get_json(url, session=session, timeout=30)
+        if data is None:
+            return None  # 304: board unchanged since last run
+    else:
+        r=(session or requests).get(url, timeout=30)
+        r.raise_for_status()
+        data=r.json()
+    return (data or {}).get("jobs") or []
+
+def ingest(job_board_name:str, limit:int=200, include_comp:bool=False, cache:HttpCache|None=None)->dict:
+    pf=ProfileFilter()
+    if cache is not None:
+        cache=cache.with_tag(pf.fingerprint)  # profile changed -> unconditional refetch
+    try:
+        rows=_fetch(job_board_name, include_comp, cache=cache)
+        if rows is None:
+            return {"org":job_board_name,"not_modified":True,"fetched":0,"kept":0,"deduped":0,"unchanged":0,"updated":0,"closed":0,"drop_role":0,"drop_loc":0,"drop_kw":0}
+        st=ingest_rows(job_board_name, rows, pf, limit=limit)
+        if cache is not None:
+            # a truncated fetch must not 304 a later run with a larger limit
+            (cache.save if len(rows)<=limit else cache.invalidate)(_url(job_board_name, include_comp))
+        return st
+    except Exception:
+        if cache is not None:
+            cache.invalidate(_url(job_board_name, include_comp))
+        raise
+
+def ingest_rows(job_board_name:str, rows:List[Dict[str,Any]], pf:ProfileFilter|None=None, limit:int=200)->dict:
+    pf=pf or ProfileFilter()
+    with session_scope() as s:
+        delta=BoardDelta(s, f"ashby:{job_board_name}", complete=len(rows)<=limit, filter_hash=pf.fingerprint)
+        rows=rows[:limit]
+        stats={"org":job_board_name,"fetched":len(rows),"kept":0,"deduped":0,"unchanged":0,"drop_role":0,"drop_loc":0,"drop_kw":0}
+        company = job_board_name.replace("-"," ").title()
+        pending = []
+
+        for j in rows:
+            if delta.unchanged(j.get("id"), j.get("updatedAt") or j.get("publishedAt"), j.get("jobUrl")):
+                stats["unchanged"]+=1
+                continue
+
+            title = j.get("title") or ""
+            location = j.get("location") or ""
+            jd_html = j.get("descriptionHtml") or j.get("descriptionPlain") or ""
+
+            reason=pf.drop_reason(title, location)
+            if reason is None:
+                jd_text=html_to_text(jd_html)  # converted once: kw rule + stored row
+                if not pf.allow_keywords(jd_text): reason="kw"
+            if reason:
+                stats[f"drop_{reason}"]+=1
+                continue
+
+            pending.append(dict(
+                company=company,
+                title=title,
+                location=location,
+                url=j.get("jobUrl"),
+                jd_text=jd_text,
+                posted_at=datetime.utcnow(),
+                status="new",
+            ))
+
+        stats.update(delta.finish(pending))
     return stats
 
 def main():
@@ -114,18 +96,30 @@ def main():
     ap.add_argument("--org", action="append", required=True, help="Ashby job board name (e.g., notion, openai). Can repeat.")
     ap.add_argument("--limit", type=int, default=200)
     ap.add_argument("--include-comp", action="store_true", help="Include compensation fields")
+    ap.add_argument("--no-cache", action="store_true", help="Skip the ETag/Last-Modified cache and always refetch.")
+    ap.add_argument("--no-index", action="store_true", help="Don't update the JD vector index (data/index/).")
     args=ap.parse_args()
 
+    init_db()
+    cache=None if args.no_cache else HttpCache()
     total=0
+    touched=[]
     for org in args.org:
         try:
-            st=ingest(org, limit=args.limit, include_comp=args.include_comp)
-            print(f"[ashby:{org}] fetched={st['fetched']} kept={st['kept']} drop(role={st['drop_role']}, loc={st['drop_loc']}, kw={st['drop_kw']}) deduped={st['deduped']}")
+            st=ingest(org, limit=args.limit, include_comp=args.include_comp, cache=cache)
+            if st.get("not_modified"):
+                print(f"[ashby:{org}] not modified (304), skipped")
+                continue
+            print(f"[ashby:{org}] fetched={st['fetched']} kept={st['kept']} drop(role={st['drop_role']}, loc={st['drop_loc']}, kw={st['drop_kw']}) deduped={st['deduped']} unchanged={st['unchanged']} updated={st['updated']} closed={st['closed']}")
             total += st["kept"]
+            touched += st["urls"]
         except requests.HTTPError as e:
             print(f"[ashby:{org}] HTTP error: {e}")
         except Exception as e:
             print(f"[ashby:{org}] failed: {e}")
+    if touched and not args.no_index:
+        with session_scope(commit=False) as s:
+            print(f"Indexed {index_postings(s, touched)} JD chunks")
     print(f"Done. Total added: {total}")
 
 if __name__=="__main__":
@@ -1,163 +1,133 @@
 # scripts/ingest_greenhouse.py
 from __future__ import annotations
-import argparse, re, requests, sys
+import argparse, os, requests, sys
 from pathlib import Path
 from typing import List, Dict, Any
-from bs4 import BeautifulSoup
 from datetime import datetime
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
-from db.models import Session, JobPosting
-
-import yaml  # pip install pyyaml
-
-REMOTE_TOKENS = [
-    "remote", "remote - us", "remote - usa", "us (remote)", "usa (remote)",
-    "united states (remote)", "us remote", "remote, us", "remote (us)"
-]
-
-ROLE_SYNONYMS = [
-    "machine learning", "ml", "ml engineer", "mlops", "ml ops",
-    "data scientist", "software engineer", "backend", "data engineer"
-]
-
-def _norm(s: str) -> str:
-    return re.sub(r"\s+", " ", (s or "").lower()).strip()
-
-def load_profile() -> dict:
-    p = Path("data/profile.yaml")
-    return yaml.safe_load(p.read_text()) if p.exists() else {}
-
-def _html_to_text(html: str) -> str:
-    soup = BeautifulSoup(html or "", "html.parser")
-    for br in soup.find_all("br"): br.replace_with("\n")
-    for li in soup.find_all("li"):
-        li.insert_before("• "); li.append("\n")
-    for p in soup.find_all("p"): p.append("\n")
-    text = soup.get_text()
-    return "\n".join(line.rstrip() for line in text.splitlines() if line.strip())
-
-def allow_title(raw_title: str, profile: dict) -> bool:
-    t = _norm(raw_title)
-    wanted = [_norm(x) for x in (profile.get("target_roles") or [])]
-    loosen = bool((profile.get("filters") or {}).get("loosen_role_match", True))
-    # if no targets provided, allow all
-    if not wanted:
-        return True
-    # strict = all words in role appear in title (rare)
-    strict_hit = any(all(piece in t for piece in role.split()) for role in wanted)
-    if strict_hit:
-        return True
-    if not loosen:
-        return False
-    # loose: any synonym OR any target token chunk appears
-    tokens = set(ROLE_SYNONYMS)
-    for w in wanted:
-        # break "Software Engineer (Backend)" into useful chunks
-        for chunk in re.split(r"[^a-z]+", w):
-            if len(chunk) >= 3:
-                tokens.add(chunk)
-    return any(tok in t for tok in tokens)
-
-def allow_location(raw_loc: str, profile: dict) -> bool:
-    loc = _norm(raw_loc)
-    wants = [_norm(x) for x in (profile.get("locations") or [])]
-    if not wants:
-        return True
-    is_remote = any(tok in loc for tok in REMOTE_TOKENS)
-    if is_remote:
-        # allow if user listed any remote-like preference
-        if any("remote" in w for w in wants):
-            # if user hinted US in their remote strings, prefer US-tagged remotes
-            wants_us = any(("us" in w) or ("usa" in w) or ("united states" in w) for w in wants)
-            if wants_us and not any(u in loc for u in ["us", "usa", "united states"]):
-                # still allow generic "remote" if no country shown
-                return True
-            return True
-        return False
-    # non-remote: substring match
-    return any(w in loc for w in wants)
-
-def allow_keywords(jd_html: str, profile: dict) -> bool:
-    text = _norm(_html_to_text(jd_html))
-    must = [_norm(k) for k in (profile.get("must_have_keywords") or [])]
-    if not must:
-        return True
-    min_req = int((profile.get("filters") or {}).get("min_must_keywords", len(must)))
-    hits = sum(1 for k in must if k in text)
-    return hits >= min_req
-
-def _fetch_greenhouse_jobs(board: str, limit: int = 200) -> List[Dict[str, Any]]:
-    url = f"https://boards-api.greenhouse.io/v1/boards/{board}/jobs?content=true"
-    r = requests.get(url, timeout=30)
-    r.raise_for_status()
-    data = r.json() or {}
-    return (data.get("jobs") or [])[:limit]
-
-def ingest_board(board: str, limit: int = 200) -> dict:
-    profile = load_profile()
-    s = Session()
-    stats = {"board": board, "fetched": 0, "kept": 0, "deduped": 0,
-             "drop_role": 0, "drop_loc": 0, "drop_kw": 0}
-
-    rows = _fetch_greenhouse_jobs(board, limit)
-    stats["fetched"] = len(rows)
-
-    for j in rows:
-        title = j.get("title") or ""
-        company = (j.get("departments") or [{}])[0].get("name") or board.capitalize()
-        location_obj = j.get("offices") or j.get("location") or {}
-        if isinstance(location_obj, dict):
-            location = location_obj.get("name") or ""
-        elif isinstance(location_obj, list) and location_obj:
-            location = (location_obj[0] or {}).get("name") or ""
-        else:
-            location = ""
-        jd_html = j.get("content") or ""
-
-        if not allow_title(title, profile):   stats["drop_role"] += 1; continue
-        if not allow_location(location, profile): stats["drop_loc"] += 1; continue
-        if not allow_keywords(jd_html, profile):  stats["drop_kw"] += 1; continue
-
-        exists = (s.query(JobPosting)
-                    .filter(JobPosting.company == company)
-                    .filter(JobPosting.title == title)
-                    .filter(JobPosting.location == location)
-                    .first())
-        if exists:
-            stats["deduped"] += 1; continue
-
-        s.add(JobPosting(
-            company=company,
-            title=title,
-            location=location,
-            jd_text=_html_to_text(jd_html),
-            posted_at=datetime.utcnow(),
-            status="new",
-        ))
-        stats["kept"] += 1
-
-    s.commit()
+from db.models import session_scope, init_db
+from scripts.board_cursor import BoardDelta
+from scripts.http_cache import HttpCache
+from scripts.profile_filter import ProfileFilter
+from utils.html_text import html_to_text
+from rag.job_index import index_postings
+
+# Overridable so the runner can be pointed at a local stub server
+GREENHOUSE_API = os.getenv("GREENHOUSE_API", "https://boards-api.greenhouse.io")
+
+def _board_url(board: str) -> str:
+    return f"{GREENHOUSE_API}/v1/boards/{board}/jobs?content=true"
+
+def _fetch_greenhouse_jobs(board: str, session=None,
+                           cache: HttpCache | None = None) -> List[Dict[str, Any]] | None:
+    """All board rows, or None when the conditional cache says the board is unchanged (304)."""
+    url = _board_url(board)
+    if cache is not None:
+        data = cache.get_json(url, session=session, timeout=30)
+        if data is None:
+            return None
+    else:
+        r = (session or requests).get(url, timeout=30)
+        r.raise_for_status()
+        data = r.json()
+    return (data or {}).get("jobs") or []
+
+def ingest_board(board: str, limit: int = 200, cache: HttpCache | None = None) -> dict:
+    pf = ProfileFilter()
+    if cache is not None:
+        cache = cache.with_tag(pf.fingerprint)  # profile changed -> unconditional refetch
+    try:
+        rows = _fetch_greenhouse_jobs(board, cache=cache)
+        if rows is None:
+            return {"board": board, "not_modified": True, "fetched": 0, "kept": 0, "deduped": 0,
+                    "unchanged": 0, "updated": 0, "closed": 0, "drop_role": 0, "drop_loc": 0, "drop_kw": 0}
+        st = ingest_rows(board, rows, pf, limit=limit)
+        if cache is not None:
+            # a truncated fetch must not 304 a later run with a larger limit
+            (cache.save if len(rows) <= limit else cache.invalidate)(_board_url(board))
+        return st
+    except Exception:
+        if cache is not None:
+            cache.invalidate(_board_url(board))
+        raise
+
+def ingest_rows(board: str, rows: List[Dict[str, Any]], pf: ProfileFilter | None = None,
+                limit: int = 200) -> dict:
+    """Filter + upsert already-fetched board rows (used by ingest_board and the runner)."""
+    pf = pf or ProfileFilter()
+    with session_scope() as s:
+        delta = BoardDelta(s, f"greenhouse:{board}", complete=len(rows) <= limit,
+                           filter_hash=pf.fingerprint)
+        rows = rows[:limit]
+        stats = {"board": board, "fetched": len(rows), "kept": 0, "deduped": 0, "unchanged": 0,
+                 "drop_role": 0, "drop_loc": 0, "drop_kw": 0}
+        pending = []
+
+        for j in rows:
+            if delta.unchanged(j.get("id"), j.get("updated_at"), j.get("absolute_url")):
+                stats["unchanged"] += 1; continue
+
+            title = j.get("title") or ""
+            company = (j.get("departments") or [{}])[0].get("name") or board.capitalize()
+            location_obj = j.get("offices") or j.get("location") or {}
+            if isinstance(location_obj, dict):
+                location = location_obj.get("name") or ""
+            elif isinstance(location_obj, list) and location_obj:
+                location = (location_obj[0] or {}).get("name") or ""
+            else:
+                location = ""
+            jd_html = j.get("content") or ""
+
+            reason = pf.drop_reason(title, location)
+            if reason is None:
+                jd_text = html_to_text(jd_html)  # converted once: kw rule + stored row
+                if not pf.allow_keywords(jd_text): reason = "kw"
+            if reason:
+                stats[f"drop_{reason}"] += 1; continue
+
+            pending.append(dict(
+                company=company,
+                title=title,
+                location=location,
+                url=j.get("absolute_url"),
+                jd_text=jd_text,
+                posted_at=datetime.utcnow(),
+                status="new",
+            ))
+
+        stats.update(delta.finish(pending))
     return stats
 
 def main():
     ap = argparse.ArgumentParser(description="Ingest jobs from Greenhouse with profile.yaml filters.")
     ap.add_argument("--board", action="append", required=True, help="Greenhouse slug (e.g., stripe, figma). Can repeat.")
     ap.add_argument("--limit", type=int, default=200)
+    ap.add_argument("--no-cache", action="store_true", help="Skip the ETag/Last-Modified cache and always refetch.")
+    ap.add_argument("--no-index", action="store_true", help="Don't update the JD vector index (data/index/).")
     args = ap.parse_args()
 
-    total = 0
+    init_db()
+    cache = None if args.no_cache else HttpCache()
+    total, touched = 0, []
     for b in args.board:
         try:
-            st = ingest_board(b, limit=args.limit)
+            st = ingest_board(b, limit=args.limit, cache=cache)
+            if st.get("not_modified"):
+                print(f"[{b}] not modified (304), skipped")
+                continue
             print(f"[{b}] fetched={st['fetched']} kept={st['kept']} "
                   f"drop(role={st['drop_role']}, loc={st['drop_loc']}, kw={st['drop_kw']}) "
-                  f"deduped={st['deduped']}")
+                  f"deduped={st['deduped']} unchanged={st['unchanged']} updated={st['updated']} closed={st['closed']}")
             total += st["kept"]
+            touched += st["urls"]
         except requests.HTTPError as e:
             print(f"[{b}] HTTP error: {e}")
         except Exception as e:
             print(f"[{b}] failed: {e}")
+    if touched and not args.no_index:
+        with session_scope(commit=False) as s:
+            print(f"Indexed {index_postings(s, touched)} JD chunks")
     print(f"Done. Total added: {total}")
 
 if __name__ == "__main__":
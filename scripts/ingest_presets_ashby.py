@@ -1,24 +1,19 @@
 # scripts/ingest_presets_ashby.py
 from __future__ import annotations
-import argparse, subprocess, sys
+import argparse, sys
 from pathlib import Path
 
-def read_list(p):
-    path=Path(p)
-    return [ln.strip() for ln in path.read_text().splitlines() if ln.strip() and not ln.strip().startswith("#")]
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from scripts import ingest_runner
 
 def main():
     ap=argparse.ArgumentParser(description="Ingest many Ashby orgs from data/ashby_orgs.txt")
     ap.add_argument("--file", default="data/ashby_orgs.txt")
     ap.add_argument("--limit", type=int, default=100)
+    ap.add_argument("--workers", type=int, default=8)
+    ap.add_argument("--no-cache", action="store_true")
     args=ap.parse_args()
-    orgs=read_list(args.file)
-    total=0
-    for o in orgs:
-        print(f"[ingest:ashby] → {o}")
-        rc=subprocess.run([sys.executable,"-m","scripts.ingest_ashby","--org",o,"--limit",str(args.limit)],check=False)
-        total |= rc.returncode
-    print("[ingest:ashby] Done."); sys.exit(total)
+    sys.exit(ingest_runner.main(["--source","ashby","--file",args.file,"--limit",str(args.limit),"--workers",str(args.workers)]+(["--no-cache"] if args.no_cache else [])))
 
 if __name__=="__main__":
     main()
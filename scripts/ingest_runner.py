@@ -0,0 +1,206 @@
+# scripts/ingest_runner.py
+"""
+In-process ingestion runner for Greenhouse, Lever and Ashby boards.
+
+Boards are fetched concurrently on a bounded thread pool that shares one
+keep-alive requests.Session (pooled connections), with a per-host cap so a
+single ATS API is never hit by more than N requests at once. Parsing,
+filtering and DB writes stay on the calling thread, in completion order,
+so SQLite only ever sees one writer.
+
+    python -m scripts.ingest_runner --limit 50
+    python -m scripts.ingest_runner --source greenhouse --slug notion --slug figma
+
+Point the GREENHOUSE_API / LEVER_API / ASHBY_API env vars at a local stub
+server to exercise the runner without network access.
+"""
+from __future__ import annotations
+import argparse, sys, threading, time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from db.models import session_scope, init_db
+from scripts import ingest_greenhouse, ingest_lever, ingest_ashby
+from scripts.http_cache import HttpCache
+from scripts.profile_filter import ProfileFilter
+from rag.job_index import index_postings
+
+# source -> (preset file, fetch(slug, session, cache), ingest_rows(slug, rows, pf, limit), url(slug))
+SOURCES: Dict[str, Tuple[str, Callable, Callable, Callable]] = {
+    "greenhouse": (
+        "data/greenhouse_slugs.txt",
+        lambda slug, session, cache: ingest_greenhouse._fetch_greenhouse_jobs(slug, session=session, cache=cache),
+        ingest_greenhouse.ingest_rows,
+        ingest_greenhouse._board_url,
+    ),
+    "lever": (
+        "data/lever_slugs.txt",
+        lambda slug, session, cache: ingest_lever._fetch(slug, session=session, cache=cache),
+        ingest_lever.ingest_rows,
+        ingest_lever._url,
+    ),
+    "ashby": (
+        "data/ashby_orgs.txt",
+        lambda slug, session, cache: ingest_ashby._fetch(slug, False, session=session, cache=cache),
+        ingest_ashby.ingest_rows,
+        lambda slug: ingest_ashby._url(slug, False),
+    ),
+}
+
+HOSTS = {
+    "greenhouse": lambda: urlsplit(ingest_greenhouse.GREENHOUSE_API).netloc,
+    "lever": lambda: urlsplit(ingest_lever.LEVER_API).netloc,
+    "ashby": lambda: urlsplit(ingest_ashby.ASHBY_API).netloc,
+}
+
+def read_slugs(file_path: str) -> List[str]:
+    p = Path(file_path)
+    if not p.exists():
+        print(f"[ingest_runner] Slug file not found: {p}")
+        return []
+    return [ln.strip() for ln in p.read_text().splitlines() if ln.strip() and not ln.strip().startswith("#")]
+
+def make_session(pool_size: int = 16) -> requests.Session:
+    """One keep-alive session whose connection pool is sized for the worker count."""
+    s = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    s.headers.update({"User-Agent": "ai-job-agent/ingest", "Accept": "application/json"})
+    return s
+
+class HostLimiter:
+    """Caps in-flight requests per host (e.g. every Greenhouse board shares one API host)."""
+
+    def __init__(self, per_host: int):
+        self.per_host = max(1, per_host)
+        self._sems: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if host not in self._sems:
+                self._sems[host] = threading.BoundedSemaphore(self.per_host)
+            return self._sems[host]
+
+def _fetch_one(source: str, slug: str, session: requests.Session, limiter: HostLimiter,
+               cache: HttpCache | None):
+    fetch = SOURCES[source][1]
+    with limiter(HOSTS[source]()):
+        t0 = time.perf_counter()
+        rows = fetch(slug, session, cache)
+    return rows, time.perf_counter() - t0
+
+def run(tasks: List[Tuple[str, str]], limit: int = 50, workers: int = 16, per_host: int = 4,
+        pf: ProfileFilter | None = None, session: requests.Session | None = None,
+        cache: HttpCache | None = None) -> List[dict]:
+    """
+    Fetch every (source, slug) concurrently and ingest each board as soon as it arrives.
+    Boards answered with 304 by the conditional cache are skipped (not_modified=True).
+    Boards that did answer are diffed against their BoardCursor: postings whose update stamp
+    hasn't moved are skipped, changed ones are updated in place, vanished ones are closed.
+    Returns one stats dict per board: source, slug, fetched, kept, deduped, unchanged, updated,
+    closed, drop_*, fetch_s, not_modified, error.
+    """
+    pf = pf or ProfileFilter()  # compiled once for every board in the run
+    if cache is not None:
+        cache = cache.with_tag(pf.fingerprint)  # profile changed -> unconditional refetch
+    session = session or make_session(workers)
+    limiter = HostLimiter(per_host)
+    results: List[dict] = []
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(_fetch_one, src, slug, session, limiter, cache): (src, slug)
+                   for src, slug in tasks}
+        for fut in as_completed(futures):
+            src, slug = futures[fut]
+            _, _, ingest_rows, url_for = SOURCES[src]
+            st = {"source": src, "slug": slug, "fetched": 0, "kept": 0, "deduped": 0,
+                  "unchanged": 0, "updated": 0, "closed": 0, "urls": [],
+                  "drop_role": 0, "drop_loc": 0, "drop_kw": 0, "fetch_s": 0.0,
+                  "not_modified": False, "error": None}
+            try:
+                rows, elapsed = fut.result()
+                st["fetch_s"] = elapsed
+                if rows is None:
+                    st["not_modified"] = True
+                else:
+                    st.update({k: v for k, v in ingest_rows(slug, rows, pf, limit).items() if k in st})
+                    if cache is not None:
+                        # a truncated fetch must not 304 a later run with a larger limit
+                        (cache.save if len(rows) <= limit else cache.invalidate)(url_for(slug))
+            except requests.HTTPError as e:
+                st["error"] = f"HTTP error: {e}"
+            except Exception as e:
+                st["error"] = f"failed: {e}"
+                if cache is not None:
+                    # this body never made it into the DB: drop older validators too, refetch in full next run
+                    cache.invalidate(url_for(slug))
+            results.append(st)
+    return results
+
+def print_summary(results: List[dict], wall_s: float) -> None:
+    for st in sorted(results, key=lambda r: (r["source"], r["slug"])):
+        tag = f"[{st['source']}:{st['slug']}]"
+        if st["error"]:
+            print(f"{tag} {st['error']}")
+            continue
+        if st["not_modified"]:
+            print(f"{tag} not modified (304), skipped fetch={st['fetch_s']:.2f}s")
+            continue
+        print(f"{tag} fetched={st['fetched']} kept={st['kept']} "
+              f"drop(role={st['drop_role']}, loc={st['drop_loc']}, kw={st['drop_kw']}) "
+              f"deduped={st['deduped']} unchanged={st['unchanged']} updated={st['updated']} "
+              f"closed={st['closed']} fetch={st['fetch_s']:.2f}s")
+    ok = [r for r in results if not r["error"]]
+    print(f"Done. boards={len(results)} ok={len(ok)} failed={len(results) - len(ok)} "
+          f"not_modified={sum(1 for r in ok if r['not_modified'])} "
+          f"fetched={sum(r['fetched'] for r in ok)} added={sum(r['kept'] for r in ok)} "
+          f"updated={sum(r['updated'] for r in ok)} closed={sum(r['closed'] for r in ok)} "
+          f"in {wall_s:.1f}s")
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Concurrently ingest Greenhouse/Lever/Ashby boards with profile.yaml filters.")
+    ap.add_argument("--source", action="append", choices=sorted(SOURCES),
+                    help="Restrict to one ATS. Can repeat. Default: all three.")
+    ap.add_argument("--slug", action="append", help="Board slug to ingest instead of the preset file (needs exactly one --source).")
+    ap.add_argument("--file", help="Override the preset slug file (needs exactly one --source).")
+    ap.add_argument("--limit", type=int, default=50, help="Per-board job limit.")
+    ap.add_argument("--workers", type=int, default=16, help="Concurrent fetches overall.")
+    ap.add_argument("--per-host", type=int, default=4, help="Concurrent fetches per ATS host.")
+    ap.add_argument("--no-cache", action="store_true", help="Skip the ETag/Last-Modified cache and always refetch.")
+    ap.add_argument("--no-index", action="store_true", help="Don't update the JD vector index (data/index/).")
+    args = ap.parse_args(argv)
+
+    sources = args.source or list(SOURCES)
+    if (args.slug or args.file) and len(sources) != 1:
+        ap.error("--slug/--file need exactly one --source")
+
+    tasks: List[Tuple[str, str]] = []
+    for src in sources:
+        slugs = args.slug or read_slugs(args.file or SOURCES[src][0])
+        tasks.extend((src, slug) for slug in slugs)
+    if not tasks:
+        print("[ingest_runner] No boards to ingest. Edit the data/*_slugs.txt files first.")
+        return 0
+
+    init_db()  # board_cursors may be new
+    t0 = time.perf_counter()
+    results = run(tasks, limit=args.limit, workers=args.workers, per_host=args.per_host,
+                  cache=None if args.no_cache else HttpCache())
+    touched = [u for r in results for u in r["urls"]]
+    if touched and not args.no_index:
+        # one index write for the whole run rather than one per board
+        with session_scope(commit=False) as s:
+            print(f"Indexed {index_postings(s, touched)} JD chunks")
+    print_summary(results, time.perf_counter() - t0)
+    return 1 if any(r["error"] for r in results) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+# scripts/profile_filter.py
+"""
+ProfileFilter: the role / location / must-keyword rules from data/profile.yaml,
+compiled once and shared by every ingester and scripts/cleanup_jobs.
+
+Each rule is one compiled alternation regex, so a title, a location or a JD
+body is scanned exactly once no matter how many roles/keywords the profile has.
+"""
+from __future__ import annotations
+import hashlib, json, re
+from pathlib import Path
+from typing import Iterable, List, Optional, Set
+
+import yaml
+
+REMOTE_TOKENS = [
+    "remote", "remote - us", "remote - usa", "us (remote)", "usa (remote)",
+    "united states (remote)", "us remote", "remote, us", "remote (us)"
+]
+
+ROLE_SYNONYMS = [
+    "machine learning", "ml", "ml engineer", "mlops", "ml ops",
+    "data scientist", "software engineer", "backend", "data engineer"
+]
+
+US_TOKENS = ["us", "usa", "united states"]
+
+def _norm(s: str) -> str:
+    return re.sub(r"\s+", " ", (s or "").lower()).strip()
+
+def load_profile() -> dict:
+    p = Path("data/profile.yaml")
+    return (yaml.safe_load(p.read_text()) or {}) if p.exists() else {}
+
+class _Matcher:
+    """
+    One alternation regex that reports every needle occurring as a substring of the text.
+    Matching is a zero-width lookahead tried at each position, longest needle first; any
+    other needle matching at that position is a prefix of the longest one, so those are
+    added from a precomputed table. Equivalent to {n for n in needles if n in text}.
+    """
+
+    def __init__(self, needles: Iterable[str]):
+        uniq = sorted({n for n in needles if n}, key=len, reverse=True)
+        self._prefixes = {n: frozenset(m for m in uniq if n.startswith(m)) for n in uniq}
+        self._rx = re.compile("(?=(" + "|".join(map(re.escape, uniq)) + "))") if uniq else None
+
+    def hits(self, text: str) -> Set[str]:
+        found: Set[str] = set()
+        if self._rx is not None:
+            for m in self._rx.finditer(text):
+                found |= self._prefixes[m.group(1)]
+        return found
+
+class ProfileFilter:
+    """
+    Compiled profile rules. Build once per run, then call drop_reason() per posting.
+
+    loosen_roles:       None -> profile.filters.loosen_role_match (default True)
+    min_must:           None -> profile.filters.min_must_keywords (default: all must-haves)
+    remote_requires_us: reject remote postings that don't mention the US when the
+                        profile's own locations mention it (used by cleanup_jobs)
+
+    fingerprint is a hash of everything the rules are built from: board cursors and the
+    HTTP cache store it so a changed profile re-evaluates postings dropped before.
+    """
+
+    RULES = ("role", "loc", "kw")
+
+    def __init__(self, profile: dict | None = None, *, loosen_roles: bool | None = None,
+                 min_must: int | None = None, remote_requires_us: bool = False):
+        profile = load_profile() if profile is None else (profile or {})
+        filters = profile.get("filters") or {}
+        rules = {k: profile.get(k) for k in ("target_roles", "locations", "must_have_keywords", "filters")}
+        rules.update(loosen_roles=loosen_roles, min_must=min_must, remote_requires_us=remote_requires_us)
+        self.fingerprint = hashlib.sha1(json.dumps(rules, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+        # --- role ---
+        wanted = [_norm(x) for x in (profile.get("target_roles") or [])]
+        self._role_pieces = [frozenset(role.split()) for role in wanted]
+        loosen = filters.get("loosen_role_match", True) if loosen_roles is None else loosen_roles
+        self._loose_tokens: Set[str] = set()
+        if wanted and loosen:
+            # break "Software Engineer (Backend)" into useful chunks
+            self._loose_tokens = set(ROLE_SYNONYMS)
+            for w in wanted:
+                self._loose_tokens.update(c for c in re.split(r"[^a-z]+", w) if len(c) >= 3)
+        self._role = _Matcher(set().union(*self._role_pieces, self._loose_tokens)) if wanted else None
+
+        # --- location ---
+        self._wants = [_norm(x) for x in (profile.get("locations") or [])]
+        self._wants_remote = any("remote" in w for w in self._wants)
+        self._need_us = remote_requires_us and any(
+            ("us" in w) or ("usa" in w) or ("united states" in w) for w in self._wants)
+        self._loc = _Matcher(self._wants + REMOTE_TOKENS + US_TOKENS) if self._wants else None
+
+        # --- keywords ---
+        self.must = [_norm(k) for k in (profile.get("must_have_keywords") or [])]
+        self.min_must = int(filters.get("min_must_keywords", len(self.must)) if min_must is None else min_must)
+        self._kw = _Matcher(self.must) if self.must else None
+
+    def allow_title(self, raw_title: str) -> bool:
+        if self._role is None:
+            return True  # if no targets provided, allow all
+        hits = self._role.hits(_norm(raw_title))
+        # strict = all words of some target role appear in the title; loose = any synonym/chunk
+        return any(pieces <= hits for pieces in self._role_pieces) or bool(hits & self._loose_tokens)
+
+    def allow_location(self, raw_loc: str) -> bool:
+        if self._loc is None:
+            return True
+        hits = self._loc.hits(_norm(raw_loc))
+        if hits.intersection(REMOTE_TOKENS):
+            if not self._wants_remote:
+                return False
+            return not self._need_us or bool(hits.intersection(US_TOKENS))
+        return any(w in hits for w in self._wants)
+
+    def keyword_hits(self, text: str) -> Set[str]:
+        return self._kw.hits(_norm(text)) if self._kw is not None else set()
+
+    def allow_keywords(self, text: str) -> bool:
+        if self._kw is None:
+            return True
+        return len(self.keyword_hits(text)) >= self.min_must
+
+    def drop_reason(self, title: str, location: str, text: str | None = None) -> Optional[str]:
+        """
+        First failing rule ("role", "loc", "kw") or None if the posting is kept.
+        text is plain JD text; pass None to check only title/location (the kw rule is then
+        skipped), so callers can defer HTML conversion until the cheap rules pass.
+        """
+        if not self.allow_title(title):
+            return "role"
+        if not self.allow_location(location):
+            return "loc"
+        if text is not None and not self.allow_keywords(text):
+            return "kw"
+        return None
+
+    def drop_reasons(self, title: str, location: str, text: str) -> List[str]:
+        """Every failing rule, for diagnostics (no short-circuit)."""
+        checks = (self.allow_title(title), self.allow_location(location), self.allow_keywords(text))
+        return [rule for rule, ok in zip(self.RULES, checks) if not ok]
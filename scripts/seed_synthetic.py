@@ -1,8 +1,7 @@
 # scripts/seed_synthetic.py
-from db.models import init_db, Session, JobPosting
+from db.models import init_db, session_scope, JobPosting
 
 init_db()
-s = Session()
 jobs = [
     dict(title="Machine Learning Engineer (Data focus)", company="Acme Health", location="Boston, MA",
          url="https://example.com/jobs/acme-mle", jd_text="""
@@ -25,8 +24,8 @@ Build backend services in Python/FastAPI. Must have: Python, SQL, AWS.
 Nice: Kubernetes, Airflow.
 """),
 ]
-for j in jobs:
-    if not s.query(JobPosting).filter_by(url=j["url"]).first():
-        s.add(JobPosting(**j))
-s.commit()
+with session_scope() as s:
+    for j in jobs:
+        if not s.query(JobPosting).filter_by(url=j["url"]).first():
+            s.add(JobPosting(**j))
 print("Seeded synthetic jobs.")
@@ -6,11 +6,11 @@ Label: 1 if JD looks like a good ML/DS match; else 0.
 Saves models/fit_clf.joblib
 """
 
+import os, sys
 from pathlib import Path
 import joblib
 import numpy as np
 from sklearn.linear_model import LogisticRegression
-from sklearn.metrics.pairwise import cosine_similarity
 import yaml
 
 # --- Resolve project root and data paths robustly ---
@@ -18,12 +18,14 @@ ROOT = Path(__file__).resolve().parents[1]
 DATA_DIR = ROOT / "data"
 MODELS_DIR = ROOT / "models"
 
+EMB_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
 PROFILE_PATH = DATA_DIR / "profile.yaml"
 RESUME_PATH = DATA_DIR / "base_resume.md"
 
-# Lazy import so a clearer error appears if the lib is missing
+# Import up front so a clearer error appears if the lib is missing
 try:
-    from sentence_transformers import SentenceTransformer
+    import sentence_transformers  # noqa: F401  (loaded through rag.embedder)
 except Exception as e:
     raise SystemExit(
         "sentence-transformers is required for training.\n"
@@ -31,6 +33,10 @@ except Exception as e:
         f"Original error: {e}"
     )
 
+sys.path.insert(0, str(ROOT))
+from rag.embed_cache import encode_cached, EmbedCache
+from rag.embedder import get_model, canonical_name
+
 # --- Load profile (optional, not strictly needed for this toy trainer) ---
 PROFILE = {}
 if PROFILE_PATH.exists():
@@ -52,17 +58,15 @@ def make_dataset(n: int = 300):
         raise FileNotFoundError(f"Base resume not found at {RESUME_PATH}")
     resume = RESUME_PATH.read_text()
 
-    enc = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+    # same store the app uses, resolved from the project root rather than the cwd
+    cache = EmbedCache(os.getenv("EMBED_CACHE_PATH") or DATA_DIR / "cache" / "embeddings.sqlite3")
 
-    X, y = [], []
-    for i in range(n):
-        pos = (i % 2 == 0)
-        jd = mk_jd(pos=pos)
-        e1 = enc.encode([jd], normalize_embeddings=True)
-        e2 = enc.encode([resume], normalize_embeddings=True)
-        cos = float(cosine_similarity(e1, e2)[0, 0])
-        X.append([cos])
-        y.append(1 if pos else 0)
+    labels = [i % 2 == 0 for i in range(n)]
+    jds = [mk_jd(pos=pos) for pos in labels]
+    # one cached call: the resume and each distinct JD are embedded at most once
+    E = encode_cached(get_model(EMB_NAME), canonical_name(EMB_NAME), [resume] + jds, cache=cache)
+    X = [[float(E[0] @ e)] for e in E[1:]]
+    y = [1 if pos else 0 for pos in labels]
     return np.array(X, dtype=float), np.array(y, dtype=int)
 
 def main():
@@ -0,0 +1,68 @@
+import json, threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import main
+from agents import batch, llm
+from db.models import Artifact, JobPosting, session_scope
+from scripts.fake_llm import CANNED, FakeLLM
+
+@pytest.fixture
+def fake_llm(monkeypatch, tmp_path):
+    """scripts.fake_llm on a free port, with the shared client and main's batch/artifact dirs pointed at it."""
+    monkeypatch.setattr(FakeLLM, "latency", 0.0)
+    monkeypatch.setattr(FakeLLM, "batch_delay", 0.3)
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), FakeLLM)
+    srv.daemon_threads = True
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    monkeypatch.setenv("OPENAI_BASE_URL", f"http://127.0.0.1:{srv.server_address[1]}/v1")
+    monkeypatch.setenv("OPENAI_API_KEY", "x")
+    monkeypatch.setattr(llm, "_client", None)
+    monkeypatch.setattr(main, "BATCH_DIR", tmp_path / "batch")
+    monkeypatch.chdir(tmp_path)
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+    llm._client = None
+
+def test_submit_wait_results(fake_llm, tmp_path):
+    polls = []
+    path = batch.write_jsonl([batch.request_line(f"c{i}", "system", f"user {i}") for i in range(3)],
+                             tmp_path / "in.jsonl")
+    b = batch.wait(batch.submit(path), interval=0.05, timeout=5, on_poll=lambda b: polls.append(b.status))
+    assert b.status == "completed"
+    assert polls[0] == "in_progress"
+    out = batch.results(b)
+    assert sorted(out) == ["c0", "c1", "c2"]
+    assert all(err is None and json.dumps(CANNED) in text for text, err in out.values())
+
+def test_collect_ingests_batch_once(fake_llm):
+    with session_scope() as s:
+        job = JobPosting(title="ML Engineer", company="Acme", url="https://example.com/jobs/1",
+                         jd_text="Python", status="scored")
+        s.add(job)
+        s.flush()
+        job_id = job.id
+    lines = [batch.request_line(f"{kind}:{job_id}", "system", "user") for kind in ("artifacts", "prep")]
+    path = batch.write_jsonl(lines, main.BATCH_DIR / "artifacts-test.jsonl")
+    batch_id = batch.submit(path)
+    path.with_suffix(".batch").write_text(batch_id)
+    assert main.pending_batch_jobs() == {job_id: batch_id}
+
+    with session_scope() as s:
+        st = main.collect_batch(s, batch_id, poll_interval=0.05)
+    assert st == {"artifacts": 1, "prep": 1, "star": 0, "skipped": 0, "failed": 0}
+    assert main.pending_batch_jobs() == {}
+    assert path.with_suffix(".collected").read_text() == "completed"
+    with session_scope() as s:
+        art = s.query(Artifact).filter_by(job_id=job_id).one()
+        assert art.qa_json["batch_id"] == batch_id
+        cl_path = art.cover_letter_path
+    with open(cl_path) as f:
+        assert f.read() == CANNED["cover_letter"]
+
+    with session_scope() as s:                        # --collect again: nothing duplicated
+        assert main.collect_batch(s, batch_id, poll_interval=0.05)["skipped"] == 1
+    with session_scope() as s:
+        assert s.query(Artifact).filter_by(job_id=job_id).count() == 1
@@ -0,0 +1,11 @@
+from agents import budget
+
+def test_nested_untracked_restores_outer_state(monkeypatch):
+    monkeypatch.setattr(budget, "_stats", {})
+    with budget.untracked():
+        with budget.untracked():
+            budget.budget_inputs("outreach", "Python and SQL.")
+        budget.budget_inputs("outreach", "Python and SQL.")   # still inside the outer block
+    assert "outreach" not in budget.savings_summary()
+    budget.budget_inputs("outreach", "Python and SQL.")
+    assert budget.savings_summary()["outreach"]["calls"] == 1
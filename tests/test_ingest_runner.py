@@ -0,0 +1,80 @@
+import http.server, json, threading, time
+
+import pytest
+
+from scripts import ingest_greenhouse, ingest_runner
+from scripts.profile_filter import ProfileFilter
+
+class _Stub(http.server.ThreadingHTTPServer):
+    """Greenhouse-shaped board API that answers after `delay` seconds and tracks requests in flight."""
+    daemon_threads = True
+
+    def __init__(self, delay: float):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.delay, self.in_flight, self.max_in_flight = delay, 0, 0
+        self.lock = threading.Lock()
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        srv = self.server
+        with srv.lock:
+            srv.in_flight += 1
+            srv.max_in_flight = max(srv.max_in_flight, srv.in_flight)
+        time.sleep(srv.delay)
+        with srv.lock:
+            srv.in_flight -= 1
+        board = self.path.split("/")[3]
+        body = json.dumps({"jobs": [{"id": 1, "title": f"{board} engineer"}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def stub(monkeypatch):
+    srv = _Stub(delay=0.2)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    monkeypatch.setattr(ingest_greenhouse, "GREENHOUSE_API", f"http://127.0.0.1:{srv.server_address[1]}")
+    ingested = []
+
+    def fake_ingest_rows(slug, rows, pf, limit):
+        ingested.append((slug, rows, threading.current_thread()))
+        return {"fetched": len(rows), "kept": len(rows)}
+
+    file, fetch, _, url = ingest_runner.SOURCES["greenhouse"]
+    monkeypatch.setitem(ingest_runner.SOURCES, "greenhouse", (file, fetch, fake_ingest_rows, url))
+    yield srv, ingested
+    srv.shutdown()
+    srv.server_close()
+
+def _run(boards, workers, per_host):
+    return ingest_runner.run([("greenhouse", b) for b in boards], workers=workers, per_host=per_host,
+                             pf=ProfileFilter({}), cache=None)
+
+def test_fetches_run_concurrently(stub):
+    srv, ingested = stub
+    boards = [f"board{i}" for i in range(8)]
+    t0 = time.perf_counter()
+    results = _run(boards, workers=8, per_host=8)
+    elapsed = time.perf_counter() - t0
+    assert not [r for r in results if r["error"]]
+    assert sorted(r["slug"] for r in results) == boards
+    assert srv.max_in_flight > 2
+    assert elapsed < 8 * srv.delay / 2          # serial fetching would take 1.6s
+
+def test_per_host_cap(stub):
+    srv, _ = stub
+    results = _run([f"board{i}" for i in range(6)], workers=6, per_host=2)
+    assert not [r for r in results if r["error"]]
+    assert srv.max_in_flight == 2
+
+def test_ingest_stays_on_calling_thread(stub):
+    _, ingested = stub
+    _run([f"board{i}" for i in range(4)], workers=4, per_host=4)
+    assert len(ingested) == 4
+    assert {t for _, _, t in ingested} == {threading.current_thread()}
+    assert all(rows[0]["title"] == f"{slug} engineer" for slug, rows, _ in ingested)
@@ -0,0 +1,29 @@
+from utils.near_dupes import near_duplicate_groups
+
+T = ("We are hiring a machine learning engineer to build data pipelines in Python and SQL, "
+     "ship models to production on AWS, and work with analysts on forecasting and experimentation. "
+     "You will own feature stores, batch and streaming jobs, monitoring, and model retraining.")
+
+def test_same_group_pairs_found_when_bucket_starts_with_other_group():
+    docs = [("x", T), ("a1", T), ("a2", T + " extra tail")]
+    groups = near_duplicate_groups(docs, same_group={"x": "Acme", "a1": "Beta", "a2": "Beta"})
+    assert [(c, sorted(k for k, _ in d)) for c, d in groups] == [("a1", ["a2"])]
+
+def test_without_same_group_all_three_cluster():
+    docs = [("x", T), ("a1", T), ("a2", T + " extra tail")]
+    groups = near_duplicate_groups(docs)
+    assert [(c, sorted(k for k, _ in d)) for c, d in groups] == [("x", ["a1", "a2"])]
+
+def test_unrelated_texts_not_grouped():
+    docs = [("a", T), ("b", "Senior accountant for month-end close, audits, and tax filings in Excel.")]
+    assert near_duplicate_groups(docs) == []
+
+def test_large_bucket_verified_in_linear_comparisons(monkeypatch):
+    import utils.near_dupes as nd
+    calls = []
+    real = nd.jaccard_estimate
+    monkeypatch.setattr(nd, "jaccard_estimate", lambda a, b: calls.append(1) or real(a, b))
+    docs = [(f"j{i}", T) for i in range(60)]
+    groups = nd.near_duplicate_groups(docs, same_group={k: "Acme" for k, _ in docs})
+    assert len(groups) == 1 and len(groups[0][1]) == 59
+    assert len(calls) < 3 * 60   # all-pairs would be 1770 per band
@@ -0,0 +1,169 @@
+# utils/html_text.py
+"""
+Streaming HTML -> text for JD bodies, built on the stdlib html.parser.
+
+Produces the same output as the BeautifulSoup routine the ingesters used to run:
+
+    soup = BeautifulSoup(html, "html.parser")
+    <br>  -> "\\n"
+    <li>  -> "• " before the element, "\\n" appended to its content
+    <p>   -> "\\n" appended to its content
+    text  = soup.get_text(), then blank lines dropped and lines right-stripped
+
+but in a single pass with no tree. To stay byte-for-byte compatible it mirrors
+the bits of bs4's html.parser builder that affect text: the open-element stack
+(an end tag closes everything up to the nearest matching open tag, unmatched end
+tags are ignored, void elements never open), whitespace-only runs collapsing to
+" " or "\n" outside <pre>/<textarea>, entity/charref decoding, and which strings
+get_text() skips (comments, doctypes/declarations, processing instructions, and
+anything inside script/style/template/rt/rp).
+
+One deliberate difference: when a JD mixes <br> and <br/>, bs4 leaves the
+self-closed <br/> open, so replace_with() drops all text up to the end of its
+parent. Here <br/> is always just a line break.
+"""
+from __future__ import annotations
+from html.entities import html5
+from html.parser import HTMLParser
+from typing import List
+
+# bs4's HTMLTreeBuilder.empty_element_tags
+VOID_TAGS = frozenset({
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "keygen", "link", "menuitem",
+    "meta", "param", "source", "track", "wbr", "basefont", "bgsound", "command", "frame",
+    "image", "isindex", "nextid", "spacer",
+})
+# strings inside these become Script/Stylesheet/TemplateString/Ruby* and get_text() skips them
+HIDDEN_TAGS = frozenset({"script", "style", "template", "rt", "rp"})
+PRESERVE_WS_TAGS = frozenset({"pre", "textarea"})
+ASCII_SPACES = str.maketrans("", "", "\x20\x0a\x09\x0c\x0d")
+
+class _TextParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.out: List[str] = []
+        self.stack: List[str] = []
+        self.hidden = 0     # open HIDDEN_TAGS elements
+        self.preserve = 0   # open PRESERVE_WS_TAGS elements
+        self._data: List[str] = []  # current text run, flushed at the next non-text event
+        self._closed_voids: List[str] = []  # bs4's already_closed_empty_element
+
+    # --- elements ---
+    def handle_starttag(self, tag, attrs):
+        self._flush()
+        if tag in VOID_TAGS:
+            if tag == "br":
+                self._emit("\n")
+            self._closed_voids.append(tag)
+            return
+        if tag == "li":
+            self._emit("• ")
+        self.stack.append(tag)
+        if tag in HIDDEN_TAGS:
+            self.hidden += 1
+        if tag in PRESERVE_WS_TAGS:
+            self.preserve += 1
+
+    def handle_startendtag(self, tag, attrs):
+        # <br/>, <p/> ... : bs4 opens and immediately closes the element
+        if tag in VOID_TAGS:
+            self._flush()
+            if tag == "br":
+                self._emit("\n")
+            if tag in self._closed_voids:
+                self._closed_voids.remove(tag)
+        else:
+            self.handle_starttag(tag, attrs)
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in self._closed_voids:
+            # "</br>" after "<br>": swallowed without even ending the current text run
+            self._closed_voids.remove(tag)
+            return
+        self._flush()
+        if tag not in self.stack:
+            return  # unmatched end tag: ignored
+        while True:
+            open_tag = self.stack.pop()
+            self._close(open_tag)
+            if open_tag == tag:
+                break
+
+    def _close(self, tag):
+        if tag in HIDDEN_TAGS:
+            self.hidden -= 1
+        if tag in PRESERVE_WS_TAGS:
+            self.preserve -= 1
+        if tag in ("li", "p"):
+            self._emit("\n")
+
+    def close(self):
+        super().close()
+        self._flush()
+        while self.stack:
+            self._close(self.stack.pop())
+
+    # --- text ---
+    def _emit(self, s):
+        self.out.append(s)
+
+    def _flush(self):
+        if not self._data:
+            return
+        data = "".join(self._data)
+        self._data = []
+        if self.hidden:
+            return
+        if not self.preserve and not data.translate(ASCII_SPACES):
+            data = "\n" if "\n" in data else " "
+        self.out.append(data)
+
+    def handle_data(self, data):
+        self._data.append(data)
+
+    def handle_comment(self, data):
+        self._flush()
+
+    def handle_decl(self, decl):
+        self._flush()
+
+    def handle_pi(self, data):
+        self._flush()
+
+    def handle_entityref(self, name):
+        self.handle_data(html5.get(name + ";") or html5.get(name) or "&" + name)
+
+    def handle_charref(self, name):
+        try:
+            code = int(name[1:], 16) if name[:1] in ("x", "X") else int(name)
+        except ValueError:
+            self.handle_data("\N{REPLACEMENT CHARACTER}")
+            return
+        data = None
+        if code < 256:
+            # numeric refs in the C1 range usually mean windows-1252, same fallback as bs4
+            try:
+                data = bytes([code]).decode("windows-1252")
+            except UnicodeDecodeError:
+                pass
+        if not data:
+            try:
+                data = chr(code)
+            except (ValueError, OverflowError):
+                pass
+        self.handle_data(data or "\N{REPLACEMENT CHARACTER}")
+
+    def unknown_decl(self, data):
+        self._flush()
+        if data.upper().startswith("CDATA["):
+            self.handle_data(data[len("CDATA["):])
+            self._flush()
+
+def html_to_text(html: str) -> str:
+    """JD HTML -> plain text with '• ' bullets and one line per block."""
+    p = _TextParser()
+    p.feed(html or "")
+    p.close()
+    text = "".join(p.out)
+    return "\n".join(line.rstrip() for line in text.splitlines() if line.strip())
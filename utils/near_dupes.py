@@ -0,0 +1,133 @@
+# utils/near_dupes.py
+"""
+Near-duplicate detection for JD texts with MinHash + LSH banding.
+
+  shingles   every run of k consecutive word tokens, hashed to 32 bits
+  signature  for each of num_perm universal hash functions (a*x + b) mod p, the
+             minimum over the document's shingles; P[sig_i == sig_j] per row is
+             the Jaccard similarity of the two shingle sets
+  LSH        the signature is cut into `bands` bands of `rows` rows; documents
+             sharing any whole band (and group label, if given) land in the same
+             bucket. With 16 bands x 8 rows, pairs at Jaccard 0.8 collide with
+             probability ~0.94 and pairs at 0.4 with ~0.01.
+  verify     within a bucket, each member is compared with one member of every
+             cluster the bucket has formed so far (members a union-find already
+             joined to one are skipped) and merged into the first it matches at
+             estimated Jaccard >= threshold; a member matching none starts a cluster.
+
+Cost is linear in the corpus (signatures + bucketing); a bucket of m near-identical
+postings costs about m comparisons, not m*(m-1)/2. Everything is vectorized with
+numpy, per document.
+"""
+from __future__ import annotations
+import re, zlib
+from collections import defaultdict
+from typing import Callable, Dict, Hashable, Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+PRIME = np.uint64(4294967291)   # largest prime < 2**32: a*x + b stays below 2**64
+_WORD_RX = re.compile(r"[a-z0-9]+")
+
+class MinHasher:
+    def __init__(self, num_perm: int = 128, shingle: int = 5, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm, self.shingle = num_perm, shingle
+        self.a = rng.integers(1, int(PRIME), num_perm, dtype=np.uint64)[:, None]
+        self.b = rng.integers(0, int(PRIME), num_perm, dtype=np.uint64)[:, None]
+        self._tok: Dict[str, int] = {}  # token -> crc32, shared across documents
+
+    def _shingles(self, text: str) -> np.ndarray:
+        words = _WORD_RX.findall((text or "").lower())
+        if not words:
+            return np.zeros(0, dtype=np.uint64)
+        tok = self._tok
+        ids = np.fromiter((tok[w] if w in tok else tok.setdefault(w, zlib.crc32(w.encode())) for w in words),
+                          dtype=np.uint64, count=len(words))
+        k = min(self.shingle, len(ids))
+        h = np.zeros(len(ids) - k + 1, dtype=np.uint64)
+        for j in range(k):  # FNV-style mix of the k token hashes, kept to 32 bits
+            h = ((h * np.uint64(16777619)) ^ ids[j:len(ids) - k + 1 + j]) & np.uint64(0xFFFFFFFF)
+        return np.unique(h)
+
+    def signature(self, text: str) -> np.ndarray | None:
+        """uint32 signature of length num_perm, or None for a text without words."""
+        sh = self._shingles(text)
+        if not len(sh):
+            return None
+        return ((self.a * sh[None, :] + self.b) % PRIME).min(axis=1).astype(np.uint32)
+
+def lsh_buckets(sigs: Dict[Hashable, np.ndarray], bands: int = 16,
+                group: Dict[Hashable, Hashable] | None = None) -> Iterator[List[Hashable]]:
+    """Buckets (size > 1) of keys whose signatures agree on a whole band and, with group, share a label."""
+    if not sigs:
+        return
+    rows = len(next(iter(sigs.values()))) // bands
+    for b in range(bands):
+        buckets: Dict[tuple, List[Hashable]] = defaultdict(list)
+        for key, sig in sigs.items():
+            label = group.get(key) if group is not None else None
+            buckets[(label, sig[b * rows:(b + 1) * rows].tobytes())].append(key)
+        yield from (m for m in buckets.values() if len(m) > 1)
+
+def jaccard_estimate(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.mean(a == b))
+
+def cluster(sigs: Dict[Hashable, np.ndarray], buckets: Iterable[List[Hashable]],
+            threshold: float) -> List[List[Hashable]]:
+    """
+    Clusters (size > 1) of keys linked by verified pairs (estimated Jaccard >= threshold),
+    via union-find. Per bucket, members already joined to one of the bucket's clusters
+    are skipped; the others are compared with one member of each of those clusters.
+    """
+    parent = {k: k for k in sigs}
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for members in buckets:
+        reps: Dict[Hashable, Hashable] = {}   # cluster root -> its first member in this bucket
+        for m in members:
+            root = find(m)
+            if root in reps:
+                continue
+            for r, rep in reps.items():
+                if jaccard_estimate(sigs[rep], sigs[m]) >= threshold:
+                    parent[root] = r
+                    break
+            else:
+                reps[root] = m
+    groups: Dict[Hashable, List[Hashable]] = defaultdict(list)
+    for k in parent:
+        groups[find(k)].append(k)
+    return [g for g in groups.values() if len(g) > 1]
+
+def near_duplicate_groups(docs: Sequence[Tuple[Hashable, str]], threshold: float = 0.8,
+                          num_perm: int = 128, bands: int = 16, shingle: int = 5,
+                          same_group: Dict[Hashable, Hashable] | None = None,
+                          canonical: Callable[[Hashable], object] | None = None,
+                          ) -> List[Tuple[Hashable, List[Tuple[Hashable, float]]]]:
+    """
+    Cluster (key, text) docs whose estimated Jaccard similarity >= threshold.
+    same_group: optional key -> label (e.g. company); pairs across labels are ignored.
+    canonical:  sort key picking each cluster's canonical member (min wins; default:
+                first in docs order).
+    Returns [(canonical_key, [(duplicate_key, similarity_to_canonical), ...]), ...].
+    """
+    mh = MinHasher(num_perm=num_perm, shingle=shingle)
+    sigs = {}
+    for key, text in docs:
+        sig = mh.signature(text)
+        if sig is not None:
+            sigs[key] = sig
+    if canonical is None:
+        order = {key: i for i, (key, _) in enumerate(docs)}
+        canonical = order.__getitem__
+    out = []
+    for g in cluster(sigs, lsh_buckets(sigs, bands, group=same_group), threshold):
+        canon = min(g, key=canonical)
+        out.append((canon, [(k, jaccard_estimate(sigs[canon], sigs[k])) for k in g if k != canon]))
+    return out